@@ -0,0 +1,291 @@
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import log
+from metrics import metrics
+
+# 文本长度（字符数）达到该值时交给分析进程，较短的文本直接在调用方线程中分析
+ANALYSIS_PROCESS_THRESHOLD = 512 * 1024
+# 分析进程数
+ANALYSIS_WORKERS = max(1, min(2, (os.cpu_count() or 2) - 1))
+# 等待分析结果的最长时间（秒）
+ANALYSIS_TIMEOUT = 30.0
+
+# 任务从提交到拿到结果的耗时（含共享内存写入和进程间传递），以及分析进程中的执行时间
+analysis_latency_histogram = metrics.histogram("analysis.latency")
+analysis_run_histogram = metrics.histogram("analysis.run_time")
+analysis_inline_counter = metrics.counter("analysis.inline")
+analysis_offloaded_counter = metrics.counter("analysis.offloaded")
+
+
+def _worker_main(task_queue, result_queue):
+    """分析进程主循环
+
+    从任务队列取得 (任务序号, 任务名, 共享内存名, 字节数, 参数)，
+    先报告 ("started", 任务序号, 进程号)，便于进程意外退出时找到它正在执行的任务，
+    再从共享内存读取文本并执行 text_analysis.ANALYSIS_JOBS 中的函数，
+    结果以 ("done", 任务序号, 是否成功, 结果, 执行时间) 放入结果队列。
+    """
+    from multiprocessing import shared_memory
+    from text_analysis import ANALYSIS_JOBS
+
+    pid = os.getpid()
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        job_id, name, shm_name, size, args = task
+        result_queue.put(("started", job_id, pid))
+        started = time.perf_counter()
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                text = bytes(shm.buf[:size]).decode('utf-8', 'surrogatepass')
+            finally:
+                shm.close()
+            result = ANALYSIS_JOBS[name](text, *args)
+            text = None
+            result_queue.put(("done", job_id, True, result, time.perf_counter() - started))
+        except Exception as e:
+            result_queue.put(("done", job_id, False, f"{type(e).__name__}: {e}", time.perf_counter() - started))
+
+
+class AnalysisPool:
+    """耗时文本分析的进程池
+
+    多 MB 的文本做正则扫描、语言识别或语法高亮时会长时间占用 GIL，
+    使预览窗口和键盘钩子回调卡顿。超过 ANALYSIS_PROCESS_THRESHOLD 的文本
+    编码后写入共享内存，只把共享内存名称放入任务队列，由分析进程读取并分析，
+    结果通过结果队列返回，由收集线程交给对应的 Future。
+    较短的文本在调用方线程中直接分析，避免进程间传递的开销。
+    分析进程在第一次需要时才启动。
+
+    监视线程等待各分析进程的 sentinel，进程意外退出（崩溃、被结束）时
+    让它正在执行的任务以 RuntimeError 结束、释放共享内存，并启动新的进程代替它。
+    """
+
+    def __init__(self, workers: int = ANALYSIS_WORKERS, threshold: int = ANALYSIS_PROCESS_THRESHOLD):
+        self.workers = workers
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._context = None
+        self._processes = []
+        self._task_queue = None
+        self._result_queue = None
+        self._collector = None
+        self._monitor = None
+        self._wake_reader = None
+        self._wake_writer = None
+        self._pending = {}  # 任务序号 -> (Future, SharedMemory, 提交时刻)
+        self._running = {}  # 分析进程号 -> 正在执行的任务序号
+        self._ids = itertools.count(1)
+        self._failed = False
+
+    def run(self, name: str, text: str, *args, timeout: float = ANALYSIS_TIMEOUT):
+        """执行分析任务并等待结果
+
+        Args:
+            name: text_analysis.ANALYSIS_JOBS 中的任务名
+            text: 要分析的文本
+            *args: 传给任务函数的其他参数
+            timeout: 等待分析进程结果的超时时间（秒）
+
+        Returns:
+            任务函数的返回值
+
+        Raises:
+            TimeoutError: 超时，任务被放弃，其共享内存随即释放
+        """
+        future = self.submit(name, text, *args)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._abandon(future)
+            raise
+
+    def submit(self, name: str, text: str, *args) -> Future:
+        """提交分析任务，文本较短或进程池不可用时在当前线程中执行
+
+        Returns:
+            Future: 任务结果，任务函数出错时以 RuntimeError 结束
+        """
+        from text_analysis import ANALYSIS_JOBS
+
+        if len(text) < self.threshold or not self._ensure_started():
+            analysis_inline_counter.inc()
+            future = Future()
+            try:
+                future.set_result(ANALYSIS_JOBS[name](text, *args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        from multiprocessing import shared_memory
+
+        analysis_offloaded_counter.inc()
+        data = text.encode('utf-8', 'surrogatepass')
+        future = Future()
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        shm.buf[:len(data)] = data
+        size, data = len(data), None
+        job_id = next(self._ids)
+        with self._lock:
+            self._pending[job_id] = (future, shm, time.perf_counter())
+        self._task_queue.put((job_id, name, shm.name, size, args))
+        return future
+
+    def _ensure_started(self) -> bool:
+        """启动分析进程、收集线程和监视线程，启动失败后不再重试"""
+        with self._lock:
+            if self._processes:
+                return True
+            if self._failed:
+                return False
+            try:
+                import multiprocessing
+                self._context = multiprocessing.get_context("spawn")
+                self._task_queue = self._context.Queue()
+                self._result_queue = self._context.Queue()
+                self._wake_reader, self._wake_writer = self._context.Pipe(duplex=False)
+                for index in range(self.workers):
+                    self._processes.append(self._start_worker(index))
+                self._collector = threading.Thread(target=self._collect, name="analysis-results", daemon=True)
+                self._collector.start()
+                self._monitor = threading.Thread(target=self._watch, name="analysis-monitor", daemon=True)
+                self._monitor.start()
+                log.debug("已启动 %d 个分析进程", self.workers)
+                return True
+            except Exception as e:
+                log.error(f"启动分析进程失败，改为在当前线程中分析: {e}")
+                self._failed = True
+                for process in self._processes:
+                    process.kill()
+                self._processes = []
+                return False
+
+    def _start_worker(self, index):
+        process = self._context.Process(target=_worker_main, args=(self._task_queue, self._result_queue),
+                                        name=f"analysis-{index}", daemon=True)
+        process.start()
+        return process
+
+    def _watch(self):
+        """监视线程：等待分析进程退出，不定时唤醒"""
+        from multiprocessing.connection import wait as wait_objects
+
+        while True:
+            with self._lock:
+                processes = list(self._processes)
+            if not processes:
+                break
+            ready = wait_objects([process.sentinel for process in processes] + [self._wake_reader])
+            if self._wake_reader in ready:
+                break
+            for process in processes:
+                if process.sentinel in ready:
+                    self._replace_worker(process)
+
+    def _replace_worker(self, process):
+        """分析进程意外退出：结束它正在执行的任务，并启动新的进程"""
+        with self._lock:
+            if self._failed or process not in self._processes:
+                return
+            index = self._processes.index(process)
+            job_id = self._running.pop(process.pid, None)
+            lost = self._pending.pop(job_id, None) if job_id is not None else None
+            try:
+                self._processes[index] = self._start_worker(index)
+            except Exception as e:
+                log.error(f"重新启动分析进程失败: {e}")
+                del self._processes[index]
+        log.warning(f"分析进程 {process.name} 意外退出（退出码 {process.exitcode}），已重新启动")
+        if lost is not None:
+            future, shm, _ = lost
+            self._release(shm)
+            future.set_exception(RuntimeError(f"分析进程意外退出（退出码 {process.exitcode}）"))
+
+    def _abandon(self, future):
+        """放弃等待超时的任务，释放共享内存，之后返回的结果直接丢弃"""
+        with self._lock:
+            job_id = next((job_id for job_id, entry in self._pending.items() if entry[0] is future), None)
+            entry = self._pending.pop(job_id, None) if job_id is not None else None
+        if entry is not None:
+            # 分析进程已打开的映射在其关闭前仍然有效，尚未打开时读取失败并返回错误
+            self._release(entry[1])
+            future.cancel()
+
+    @staticmethod
+    def _release(shm):
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _collect(self):
+        """收集线程：把结果队列中的结果交给对应的 Future 并释放共享内存"""
+        while True:
+            try:
+                item = self._result_queue.get()
+            except (EOFError, OSError):
+                break
+            if item is None:
+                break
+            if item[0] == "started":
+                _, job_id, pid = item
+                with self._lock:
+                    alive = any(process.pid == pid for process in self._processes)
+                    if alive:
+                        self._running[pid] = job_id
+                        continue
+                    # 开始执行后进程立即退出，监视线程已先处理了它的退出
+                    entry = self._pending.pop(job_id, None)
+                if entry is not None:
+                    self._release(entry[1])
+                    entry[0].set_exception(RuntimeError("分析进程意外退出"))
+                continue
+            _, job_id, ok, result, run_time = item
+            with self._lock:
+                future, shm, submitted_at = self._pending.pop(job_id, (None, None, 0.0))
+                for pid, running_id in list(self._running.items()):
+                    if running_id == job_id:
+                        del self._running[pid]
+            if future is None:
+                continue
+            self._release(shm)
+            analysis_run_histogram.observe(run_time)
+            analysis_latency_histogram.observe(time.perf_counter() - submitted_at)
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+
+    def shutdown(self, timeout: float = 1.0):
+        """停止分析进程，未完成的任务以 CancelledError 结束"""
+        with self._lock:
+            processes, self._processes = self._processes, []
+            pending, self._pending = self._pending, {}
+            # 退出过程中提交的任务在调用方线程中执行，不再启动进程
+            self._failed = True
+        if not processes:
+            return
+        self._wake_writer.send(None)
+        for _ in processes:
+            self._task_queue.put(None)
+        self._result_queue.put(None)
+        deadline = time.perf_counter() + timeout
+        for process in processes:
+            process.join(max(0.0, deadline - time.perf_counter()))
+            if process.is_alive():
+                process.kill()
+        for future, shm, _ in pending.values():
+            future.cancel()
+            self._release(shm)
+
+
+# 全局分析进程池
+analysis_pool = AnalysisPool()
@@ -0,0 +1,65 @@
+# 分析大文本时界面线程的响应：模拟界面线程每 5 ms 醒来一次，记录实际间隔超出的部分，
+# 比较在当前进程中分析与交给分析进程时的卡顿
+#
+#   python benchmarks/bench_analysis_ui.py [文本大小 MB，默认 50]
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_pool import AnalysisPool, analysis_latency_histogram, analysis_run_histogram
+from text_analysis import classify_text
+
+# 模拟界面线程的唤醒周期（秒）
+UI_TICK = 0.005
+LINE = "def handler(event): value = compute(event['x'] + 1)  # 注释 中文 😀 @#$\n"
+
+
+def ui_probe(stop, stalls):
+    """模拟界面线程，记录每次唤醒比预期晚了多少"""
+    last = time.perf_counter()
+    while not stop.is_set():
+        time.sleep(UI_TICK)
+        now = time.perf_counter()
+        stalls.append(now - last - UI_TICK)
+        last = now
+
+
+def measure(label, work):
+    stop = threading.Event()
+    stalls = []
+    probe = threading.Thread(target=ui_probe, args=(stop, stalls))
+    probe.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    result = work()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    probe.join()
+    stalls.sort()
+    print(f"{label}: 分析 {elapsed * 1000:.0f} ms，界面唤醒 {len(stalls)} 次，"
+          f"卡顿 p50 {stalls[len(stalls) // 2] * 1000:.2f} ms，p99 {stalls[int(len(stalls) * 0.99)] * 1000:.1f} ms，"
+          f"最长 {stalls[-1] * 1000:.1f} ms；类型 {result['type']}")
+
+
+def main(size_mb):
+    text = LINE * (size_mb * 1024 * 1024 // len(LINE.encode('utf-8')))
+    print(f"文本 {len(text.encode('utf-8')) / 1e6:.1f} MB（UTF-8）")
+    measure("当前进程", lambda: classify_text(text, True))
+
+    pool = AnalysisPool(workers=1)
+    try:
+        started = time.perf_counter()
+        pool.run("classify_text", "x" * pool.threshold, True)  # 预热，分析进程完成导入
+        print(f"启动分析进程并完成第一个任务 {(time.perf_counter() - started) * 1000:.0f} ms")
+        measure("分析进程", lambda: pool.run("classify_text", text, True, timeout=600))
+        print(f"分析进程：提交到返回最长 {analysis_latency_histogram.maximum * 1000:.0f} ms，"
+              f"执行最长 {analysis_run_histogram.maximum * 1000:.0f} ms")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,133 @@
+# 各类内容的预览压缩率、编码与解码耗时，以及大内容存储的流式压缩
+#
+#   python benchmarks/bench_compression.py
+import glob
+import os
+import random
+import shutil
+import sys
+import sysconfig
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blob_store import BlobStore
+from clipboard_history import HistoryEntry
+from compression import decompress, encode_payload
+from history_store import HistoryStore
+
+PREVIEW_COUNT = 20000
+PREVIEW_LENGTH = 200
+# 每种类型用于统计的预览数
+SAMPLES_PER_TYPE = 2000
+TYPES = ["代码", "日志", "网址", "HTML"]
+PROSE = ("剪贴板 增强 工具 可以 识别 网盘 链接 并 自动 填写 提取码 同时 支持 预览 历史 搜索 功能 "
+         "The quick brown fox jumps over lazy dog documentation").split()
+
+
+def load_sources():
+    """用标准库源码作为代码样本"""
+    paths = glob.glob(os.path.join(sysconfig.get_paths()["stdlib"], "**", "*.py"), recursive=True)[:3000]
+    sources = []
+    for path in paths:
+        if os.path.getsize(path) > 2000:
+            with open(path, encoding="utf-8", errors="ignore") as file:
+                sources.append(file.read())
+    return sources
+
+
+def generate(content_type, sources):
+    if content_type == "代码":
+        source = random.choice(sources)
+        start = random.randrange(max(1, len(source) - PREVIEW_LENGTH))
+        return source[start:start + PREVIEW_LENGTH]
+    if content_type == "日志":
+        return "".join(
+            f"2026-10-{random.randint(1, 28):02d} 12:{random.randint(0, 59):02d}:{random.randint(0, 59):02d},"
+            f"{random.randint(0, 999):03d} [{random.choice(['INFO', 'DEBUG', 'ERROR', 'WARNING'])}] "
+            f"clipboard.monitor: sequence={random.randint(1, 99999)} changed\n"
+            for _ in range(3))[:PREVIEW_LENGTH]
+    if content_type == "网址":
+        host = random.choice(["github.com", "pan.baidu.com", "www.bilibili.com", "docs.python.org"])
+        path = random.choice(["s", "video", "Yuerchu", "3/library"])
+        name = "".join(random.choices("abcdefghijkmnpqrstuvwxyz0123456789", k=random.randint(8, 23)))
+        return f"https://{host}/{path}/{name}?pwd={''.join(random.choices('abcd1234', k=4))}"
+    return " ".join(random.choices(PROSE, k=60))[:PREVIEW_LENGTH]
+
+
+def bench_previews(directory, sources):
+    store = HistoryStore(os.path.join(directory, "history.db"), PREVIEW_COUNT * 5)
+    entries = []
+    started = time.perf_counter()
+    for number in range(PREVIEW_COUNT):
+        content_type = random.choice(TYPES)
+        preview = generate(content_type, sources)
+        entry = HistoryEntry(f"{number:032x}", content_type, number, len(preview), preview)
+        entries.append(entry)
+        store.put(entry)
+    store.flush(120)
+    print(f"写入 {PREVIEW_COUNT} 条预览（后台压缩）：{PREVIEW_COUNT / (time.perf_counter() - started):,.0f} 条/秒")
+    zdict = store._dictionaries.get(store._dict_id, b"")
+    print(f"共享字典 {len(zdict)} 字节")
+
+    for content_type in TYPES:
+        samples = [entry for entry in entries if entry.type == content_type][-SAMPLES_PER_TYPE:]
+        raw = sum(len(entry.preview.encode()) for entry in samples)
+        plain = sum(len(encode_payload(entry.preview, content_type)[1]) for entry in samples)
+        started = time.perf_counter()
+        encoded = [encode_payload(entry.preview, content_type, zdict) for entry in samples]
+        encode_time = (time.perf_counter() - started) / len(samples)
+        started = time.perf_counter()
+        for codec, data in encoded:
+            decompress(data, codec, zdict)
+        decode_time = (time.perf_counter() - started) / len(samples)
+        print(f"{content_type}: 压缩率 无字典 {raw / plain:.2f} / 有字典 {raw / sum(len(data) for _, data in encoded):.2f}，"
+              f"编码 {encode_time * 1e6:.1f} us/条，解码 {decode_time * 1e6:.1f} us/条")
+
+    started = time.perf_counter()
+    loaded = store.load_recent(PREVIEW_COUNT)
+    print(f"加载 {len(loaded)} 条并解压：{(time.perf_counter() - started) * 1000:.0f} ms，"
+          f"内容一致 {loaded[0].preview == entries[-1].preview}")
+    store.close()
+
+
+def bench_blobs(directory, sources):
+    blobs = BlobStore(os.path.join(directory, "blobs"))
+    payloads = {
+        "代码": "\n".join(sources)[:8_000_000],
+        "日志": "".join(generate("日志", sources) for _ in range(60000)),
+        "HTML": "<div class=\"c\"><p>" + "</p><p>".join(generate("HTML", sources) for _ in range(40000)) + "</p></div>",
+    }
+    for number, (content_type, payload) in enumerate(payloads.items()):
+        digest = f"{number:032x}"
+        size = len(payload.encode())
+        started = time.perf_counter()
+        blobs.put(digest, payload, content_type)
+        blobs.flush(120)
+        write_time = time.perf_counter() - started
+        stored = os.path.getsize(blobs.path_for(digest))
+        started = time.perf_counter()
+        blobs.read_head(digest, 4096)
+        head_time = time.perf_counter() - started
+        started = time.perf_counter()
+        assert blobs.read(digest) == payload
+        read_time = time.perf_counter() - started
+        print(f"大内容 {content_type}: {size / 2**20:.1f} MB，压缩率 {size / stored:.1f}，写入 {write_time * 1000:.0f} ms，"
+              f"读取头部 {head_time * 1000:.2f} ms，完整解压 {read_time * 1000:.0f} ms")
+    blobs.close()
+
+
+def main():
+    random.seed(7)
+    sources = load_sources()
+    directory = tempfile.mkdtemp()
+    try:
+        bench_previews(directory, sources)
+        bench_blobs(directory, sources)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
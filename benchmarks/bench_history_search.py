@@ -0,0 +1,65 @@
+# 历史记录全文索引在 10 万条中英文混合条目上的查询耗时
+#
+#   python benchmarks/bench_history_search.py [条目数，默认 100000]
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clipboard_history import HistoryEntry
+from history_search import HistoryIndex
+
+WORDS = ["python", "clipboard", "enhance", "quark", "baidu", "link", "error", "function",
+         "return", "import", "https", "github", "com", "pan", "share"]
+CJK = ("的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定"
+       "行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前"
+       "外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很"
+       "情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手"
+       "角期根论运农指几九区强放决西被干做必战先回则任取据处理府研")
+TYPES = ["文本", "网址", "网盘链接", "邮箱"]
+# (查询, 类型过滤)
+QUERIES = [
+    ("夸克", None),
+    ("quark", "网盘链接"),
+    ("pyth", None),
+    ("clipboard enh", None),
+    ("的", None),
+    ("type:网址 github", None),
+    ("", "网址"),
+    ("中国 python", None),
+]
+RUNS = 20
+
+
+def build_index(count):
+    random.seed(1)
+    index = HistoryIndex()
+    for number in range(count):
+        text = " ".join(random.choices(WORDS, k=6)) + " " + "".join(random.choices(CJK, k=20))
+        content_type = random.choice(TYPES)
+        if number == 42:
+            text = "夸克网盘 https://pan.quark.cn/s/abc123 提取码 xyz9"
+            content_type = "网盘链接"
+        index.add(HistoryEntry(f"{number:x}", content_type, number, len(text), text))
+    return index
+
+
+def main(count):
+    started = time.perf_counter()
+    index = build_index(count)
+    print(f"建立 {count} 条的索引：{time.perf_counter() - started:.1f} s")
+    for query, content_type in QUERIES:
+        timings = []
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            results = index.search(query, content_type)
+            timings.append(time.perf_counter() - started)
+        print(f"{query!r:22} {content_type or '-':6} {len(results):3} 条结果  "
+              f"中位数 {statistics.median(timings) * 1000:.2f} ms  最长 {max(timings) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
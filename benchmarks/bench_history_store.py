@@ -0,0 +1,51 @@
+# 历史记录数据库的持续写入吞吐量与冷启动加载耗时
+#
+#   python benchmarks/bench_history_store.py [条目数，默认 100000]
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clipboard_history import ClipboardHistory, HistoryEntry
+from history_store import HistoryStore
+
+
+def main(count):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "history.db")
+    try:
+        store = HistoryStore(path, max_entries=count, retention_days=30)
+        now = time.time()
+        started = time.perf_counter()
+        for index in range(count):
+            content_type = "文本" if index % 3 else "网址"
+            store.put(HistoryEntry(f"{index:032x}", content_type, now - count + index, 100, "preview text " * 10))
+        enqueued = time.perf_counter() - started
+        store.flush(120)
+        elapsed = time.perf_counter() - started
+        print(f"写入 {count} 条：入队 {count / enqueued:,.0f} 条/秒，持续写入 {count / elapsed:,.0f} 条/秒，"
+              f"数据库中 {store.count()} 条")
+        store.close()
+
+        # 冷启动：重新打开数据库并装入内存中的历史记录
+        started = time.perf_counter()
+        store = HistoryStore(path, max_entries=count)
+        rows = store.load_recent(count)
+        history = ClipboardHistory(count)
+        for entry in reversed(rows):
+            history.add(entry)
+        print(f"冷启动加载 {len(rows)} 条：{(time.perf_counter() - started) * 1000:.0f} ms")
+
+        started = time.perf_counter()
+        rows = store.query("网址", since=now - 5000, limit=50)
+        print(f"按类型和时间查询 {len(rows)} 条：{(time.perf_counter() - started) * 1000:.2f} ms")
+        store.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,85 @@
+# 历史记录 JSON Lines 导出、导入的吞吐量与峰值内存
+#
+#   python benchmarks/bench_history_transfer.py [条目数，默认 200000]
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history_transfer
+from blob_store import BlobStore
+from clipboard_history import HistoryEntry
+from history_store import HistoryStore
+
+WORDS = "剪贴板 增强 网盘 链接 提取码 python clipboard error https github com log".split()
+# 引用大内容存储的条目及其内容
+BLOB_DIGEST = f"{5:032x}"
+BLOB_PAYLOAD = "x" * 200_000
+
+
+def quiet(*args):
+    pass
+
+
+def measure(action, trace=False):
+    """执行 action，返回 (结果, 耗时, 峰值内存)；统计内存时单独运行一次，不影响计时"""
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = action()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    if trace:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(count):
+    random.seed(5)
+    directory = tempfile.mkdtemp()
+    try:
+        source = HistoryStore(os.path.join(directory, "source.db"), 10 ** 7)
+        source.import_entries(
+            HistoryEntry(f"{number:032x}", random.choice(["文本", "网址", "HTML"]), number, 200,
+                         " ".join(random.choices(WORDS, k=30)))
+            for number in range(count))
+        blobs = BlobStore(os.path.join(directory, "blobs"))
+        blobs.put(BLOB_DIGEST, BLOB_PAYLOAD)
+        blobs.flush()
+
+        for extension in (".jsonl", ".jsonl.gz"):
+            path = os.path.join(directory, "history" + extension)
+            exported, export_time, _ = measure(lambda: history_transfer.export_history(source, path, blobs, quiet))
+            _, _, export_peak = measure(lambda: history_transfer.export_history(source, path, blobs, quiet), True)
+
+            target_blobs = BlobStore(os.path.join(directory, "target-blobs" + extension))
+            target = HistoryStore(os.path.join(directory, f"target{extension}.db"), 10 ** 7)
+            (read, added), import_time, _ = measure(
+                lambda: history_transfer.import_history(target, path, target_blobs, quiet))
+            traced = HistoryStore(os.path.join(directory, f"traced{extension}.db"), 10 ** 7)
+            _, _, import_peak = measure(lambda: history_transfer.import_history(traced, path, target_blobs, quiet), True)
+            # 再次导入相同的文件，全部按摘要去重
+            (reread, readded), reimport_time, _ = measure(
+                lambda: history_transfer.import_history(target, path, target_blobs, quiet))
+
+            print(f"{extension}: {exported} 条，文件 {os.path.getsize(path) / 2**20:.1f} MB")
+            print(f"  导出 {exported / export_time:,.0f} 条/秒，峰值内存 {export_peak / 2**20:.1f} MB")
+            print(f"  导入 {read / import_time:,.0f} 条/秒，峰值内存 {import_peak / 2**20:.1f} MB，新增 {added} 条")
+            print(f"  重复导入 {reread / reimport_time:,.0f} 条/秒，新增 {readded} 条")
+            print(f"  大内容已复制 {target_blobs.read(BLOB_DIGEST) == BLOB_PAYLOAD}")
+            for store in (target, traced):
+                store.close()
+            target_blobs.close()
+        source.close()
+        blobs.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,85 @@
+# CF_HTML 摘要提取：流式解析片段与旧版对整个数据做正则替换的耗时比较
+#
+#   python benchmarks/bench_html_extract.py [网页大小 MB，默认 5]
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_extract import extract_html_text
+
+SUMMARY_LIMIT = 100
+REPEAT = 5
+# 小片段：在大网页中只选中了一段文字
+SMALL_FRAGMENT = "<p>选中的一段文字 &amp; <b>加粗</b> 与 <a href=\"https://example.com\">链接</a></p>" * 20
+ROW = ("<tr><td class=\"cell\">第 {0} 行</td><td>数值 {0}</td><td><span style=\"color:red\">备注 &lt;{0}&gt;</span>"
+       "</td></tr>\n")
+HEADER_TEMPLATE = ("Version:0.9\r\nStartHTML:{0:010d}\r\nEndHTML:{1:010d}\r\n"
+                   "StartFragment:{2:010d}\r\nEndFragment:{3:010d}\r\n")
+
+
+def build_cf_html(body_size: int, fragment: str = None) -> bytes:
+    """构造 CF_HTML 数据，fragment 为 None 时整个表格都是选中的片段"""
+    rows, size, index = [], 0, 0
+    while size < body_size:
+        row = ROW.format(index)
+        rows.append(row)
+        size += len(row.encode("utf-8"))
+        index += 1
+    table = "<table>" + "".join(rows) + "</table>"
+    if fragment is None:
+        before, selected, after = "", table, ""
+    else:
+        half = len(rows) // 2
+        before = "<table>" + "".join(rows[:half]) + "</table>"
+        selected = fragment
+        after = "<table>" + "".join(rows[half:]) + "</table>"
+
+    prefix = ("<html><head><style>td { padding: 2px }</style><script>var x = 1;</script></head><body>"
+              + before + "<!--StartFragment-->").encode("utf-8")
+    selected = selected.encode("utf-8")
+    suffix = ("<!--EndFragment-->" + after + "</body></html>").encode("utf-8")
+    header_size = len(HEADER_TEMPLATE.format(0, 0, 0, 0).encode("ascii"))
+    start_fragment = header_size + len(prefix)
+    end_fragment = start_fragment + len(selected)
+    end_html = end_fragment + len(suffix)
+    header = HEADER_TEMPLATE.format(header_size, end_html, start_fragment, end_fragment).encode("ascii")
+    return header + prefix + selected + suffix
+
+
+def old_summary(data: bytes, limit: int):
+    """旧版：解码整个数据（含头部），用正则去掉标签后合并空白"""
+    text = re.sub('<[^<]+?>', '', data.decode("utf-8"))
+    text = ' '.join(text.split())
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+def timed(function, *args):
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(size_mb: float):
+    body_size = int(size_mb * 1024 * 1024)
+    cases = [
+        ("小片段", build_cf_html(body_size, SMALL_FRAGMENT)),
+        ("大片段", build_cf_html(body_size)),
+    ]
+    for name, data in cases:
+        print(f"{name}：CF_HTML {len(data) / 2**20:.1f} MB")
+        old_time, old_text = timed(old_summary, data, SUMMARY_LIMIT)
+        print(f"  旧版正则（整个数据）    {old_time * 1000:8.2f} ms  {old_text[:40]!r}")
+        new_time, (new_text, _) = timed(extract_html_text, data, SUMMARY_LIMIT)
+        print(f"  流式解析（{SUMMARY_LIMIT} 字摘要）  {new_time * 1000:8.2f} ms  {new_text[:40]!r}")
+        full_time, (full_text, _) = timed(extract_html_text, data, len(data))
+        print(f"  流式解析（完整片段）    {full_time * 1000:8.2f} ms  {len(full_text):,} 字")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0)
@@ -0,0 +1,112 @@
+# 空闲时各线程的唤醒次数：以替身模块无界面启动托盘程序，剪贴板不变化、不按键，
+# 统计一段时间内每个线程的主动上下文切换次数（/proc/self/task/*/status，仅 Linux）
+#
+#   python benchmarks/bench_idle_wakeups.py [统计秒数，默认 30]
+#
+# Qt 事件循环由替身代替，不计入；作为对照，另行运行一个与旧版 processEvents 定时器相同周期（50 ms）的线程并统计
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_startup import install_stubs
+
+# 旧版定时调用 app.processEvents 的周期（秒）
+OLD_PROCESS_EVENTS_INTERVAL = 0.05
+# 启动后等待多久再开始统计（秒），跳过启动与首次读取
+SETTLE_TIME = 1.0
+
+
+def voluntary_switches() -> dict:
+    """各线程的主动上下文切换次数，键为线程号"""
+    counts = {}
+    for tid in os.listdir("/proc/self/task"):
+        try:
+            with open(f"/proc/self/task/{tid}/status") as f:
+                for line in f:
+                    if line.startswith("voluntary_ctxt_switches"):
+                        counts[int(tid)] = int(line.split()[1])
+        except OSError:
+            continue
+    return counts
+
+
+def thread_names() -> dict:
+    return {thread.native_id: thread.name for thread in threading.enumerate()}
+
+
+def main(duration: float):
+    install_stubs()
+    import log
+    log.set_debug_mode(False)
+    import func
+
+    directory = tempfile.mkdtemp(prefix="bench_idle_")
+    idle = threading.Event()
+    try:
+        func.CONFIG_FILE = os.path.join(directory, "config.json")
+        func.config.path = func.CONFIG_FILE
+        func.get_sequence_number = lambda: 1
+        snapshot = {"format": "text", "data": "hello", "formats": [], "sequence": 1}
+        func.clipboard_worker.read_snapshot = lambda: mock.Mock(result=lambda timeout=None: snapshot)
+        icon = mock.MagicMock()
+        icon.run.side_effect = lambda setup=None: setup(icon)
+        func.setup_tray_icon = lambda: icon
+        func.QApplication.instance.return_value = None
+        app = mock.MagicMock()
+        func.QApplication.return_value = app
+        # 代替 Qt 事件循环：阻塞等待，不产生唤醒
+        app.exec_.side_effect = lambda: idle.wait() and 0
+
+        main_thread = threading.Thread(target=func.main, name="main", daemon=True)
+        main_thread.start()
+        time.sleep(SETTLE_TIME)
+
+        stop = threading.Event()
+
+        def old_process_events_timer():
+            while not stop.wait(OLD_PROCESS_EVENTS_INTERVAL):
+                pass
+
+        reference = threading.Thread(target=old_process_events_timer, name="旧版 processEvents 定时器（对照）",
+                                     daemon=True)
+        reference.start()
+
+        before = voluntary_switches()
+        time.sleep(duration)
+        after = voluntary_switches()
+        names = thread_names()
+        stop.set()
+
+        print(f"空闲 {duration:.0f} 秒内各线程的唤醒次数（每分钟）：")
+        total = 0
+        for tid, count in sorted(after.items()):
+            delta = count - before.get(tid, count)
+            name = names.get(tid, f"线程 {tid}")
+            if tid == threading.main_thread().native_id:
+                # 本脚本的主线程在统计期间只是 sleep
+                continue
+            per_minute = delta * 60 / duration
+            if name != reference.name:
+                total += per_minute
+            print(f"  {name:<32}{per_minute:8.0f}")
+        print(f"  {'合计（不含对照）':<32}{total:8.0f}")
+
+        idle.set()
+        main_thread.join(2.0)
+        func.scheduler.shutdown(timeout=1.0)
+        if func.history_store is not None:
+            func.history_store.close(timeout=1.0)
+        if func.instance_server is not None:
+            func.instance_server.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 30.0)
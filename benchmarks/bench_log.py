@@ -0,0 +1,67 @@
+# 日志调用在调用方线程中的耗时：关闭的调试日志、写入文件的日志，以及可选的旧版日志模块
+#
+#   python benchmarks/bench_log.py [旧版 log.py 路径，例如 git show 0bd45d0^:log.py 导出的文件]
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log
+
+DISABLED_CALLS = 1_000_000
+# 写出线程的队列长度有限，启用时的调用次数不超过队列长度，测量的是调用方的耗时
+ENABLED_CALLS = 5000
+BASELINE_CALLS = 2000
+
+
+def per_call(stmt, number, namespace):
+    """单次调用的平均耗时（纳秒）"""
+    return timeit.timeit(stmt, globals=namespace, number=number) / number * 1e9
+
+
+def main(baseline_path=None):
+    x, y = 3, 4
+    namespace = {"log": log, "x": x, "y": y}
+    log.set_console(False)
+
+    cases = [
+        ("空调用参照", 'len(())'),
+        ("关闭的调试日志，常量", 'log.debug("Ctrl键释放")'),
+        ("关闭的调试日志，延迟格式化", 'log.debug("窗口定位到: (%d, %d)", x, y)'),
+        ("关闭的调试日志，f-string", 'log.debug(f"窗口定位到: ({x}, {y})")'),
+    ]
+    log.set_debug_mode(False)
+    for name, stmt in cases:
+        print(f"{name:<16}{per_call(stmt, DISABLED_CALLS, namespace):8.0f} ns")
+
+    directory = tempfile.mkdtemp(prefix="bench_log_")
+    try:
+        log.set_debug_mode(True)
+        log.set_log_file(os.path.join(directory, log.LOG_FILE_NAME))
+        cost = per_call('log.debug("窗口定位到: (%d, %d)", x, y)', ENABLED_CALLS, namespace)
+        print(f"{'写入文件的调试日志':<16}{cost:8.0f} ns（调用方）")
+        log.flush(timeout=5.0)
+        log.set_log_file(None)
+        log.flush(timeout=5.0)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if baseline_path:
+        # 旧版在调用方线程中通过 rich 直接输出，这里输出到内存，不计终端的耗时
+        spec = importlib.util.spec_from_file_location("baseline_log", baseline_path)
+        baseline = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(baseline)
+        namespace["baseline"] = baseline
+        with contextlib.redirect_stdout(io.StringIO()):
+            cost = per_call('baseline.debug(f"窗口定位到: ({x}, {y})")', BASELINE_CALLS, namespace)
+        print(f"{'旧版调试日志（总是输出）':<16}{cost:8.0f} ns")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,93 @@
+# 相似内容索引（MinHash LSH）在 1 千、1 万、10 万条历史上的插入与查找耗时，以及逐条比较签名的对照
+#
+#   python benchmarks/bench_near_duplicate.py [最大条目数，默认 100000]
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clipboard_history import HistoryEntry
+from near_duplicate import NearDuplicateIndex, estimate_similarity, minhash
+
+WORDS = ("def return import class value result error warning config request response handler "
+         "clipboard preview history search index window thread process buffer record "
+         "剪贴板 历史 预览 搜索 索引 窗口 线程 进程 缓冲 记录 网盘 链接 提取码 文件 图片").split()
+# 另加随机生成的单词，词汇量过小时不相关的文本也有大量相同片段，不符合实际的剪贴板内容
+EXTRA_WORDS = 5000
+TEXT_WORDS = 60
+# 每插入多少条时有一条是已有内容的修改版
+VARIANT_EVERY = 10
+SIZES = (1000, 10000, 100000)
+QUERIES = 200
+# 逐条比较只在少量查询上计算，10 万条时单次比较已较慢
+BRUTE_FORCE_QUERIES = 20
+
+
+def build_vocabulary(rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    extra = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(EXTRA_WORDS)]
+    return WORDS + extra
+
+
+def random_text(rng, vocabulary):
+    return " ".join(rng.choice(vocabulary) for _ in range(TEXT_WORDS))
+
+
+def variant(rng, text, vocabulary):
+    """修改少量单词，保持相似"""
+    words = text.split()
+    for _ in range(3):
+        words[rng.randrange(len(words))] = rng.choice(vocabulary)
+    return " ".join(words)
+
+
+def main(max_count):
+    rng = random.Random(1)
+    vocabulary = build_vocabulary(rng)
+    index = NearDuplicateIndex()
+    texts = []
+    sizes = [size for size in SIZES if size <= max_count]
+    print(f"{'条目数':>8}{'插入 µs/条':>12}{'签名 µs':>10}{'查找 p50 µs':>13}{'查找 p99 µs':>13}"
+          f"{'逐条比较 µs':>13}{'分组数':>9}")
+    for size in sizes:
+        added, started = len(texts), time.perf_counter()
+        while len(texts) < size:
+            number = len(texts)
+            if texts and number % VARIANT_EVERY == 0:
+                text = variant(rng, rng.choice(texts), vocabulary)
+            else:
+                text = random_text(rng, vocabulary)
+            texts.append(text)
+            index.add(HistoryEntry(f"{number:032x}", "文本", number, len(text), text, text))
+        insert_time = (time.perf_counter() - started) / (size - added)
+
+        queries = [variant(rng, rng.choice(texts), vocabulary) if n % 2 else random_text(rng, vocabulary)
+                   for n in range(QUERIES)]
+        started = time.perf_counter()
+        signatures = [minhash(query) for query in queries]
+        signature_time = (time.perf_counter() - started) / QUERIES
+
+        lookups = []
+        for signature in signatures:
+            started = time.perf_counter()
+            with index._lock:
+                index._nearest(signature)
+            lookups.append(time.perf_counter() - started)
+        lookups.sort()
+
+        started = time.perf_counter()
+        stored = list(index._signatures.values())
+        for signature in signatures[:BRUTE_FORCE_QUERIES]:
+            max(stored, key=lambda other: estimate_similarity(signature, other))
+        brute_force = (time.perf_counter() - started) / BRUTE_FORCE_QUERIES
+
+        print(f"{size:>8,}{insert_time * 1e6:>12.1f}{signature_time * 1e6:>10.1f}"
+              f"{statistics.median(lookups) * 1e6:>13.1f}{lookups[int(len(lookups) * 0.99)] * 1e6:>13.1f}"
+              f"{brute_force * 1e6:>13.0f}{len(index._groups):>9,}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,110 @@
+# 预览窗口在启动时创建与按需创建的比较：启动耗时、空闲内存（RSS），以及按需创建时第一次预览的耗时与释放后的内存
+# 需要 PyQt5，非 Windows 系统上以 offscreen 平台运行，win32api 和 keyboard 以替身代替；仅 Linux（读取 /proc）
+#
+#   python benchmarks/bench_preview_window.py
+import os
+import subprocess
+import sys
+import time
+import types
+from unittest import mock
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+MODES = ("eager", "lazy")
+# 启动后处理事件的空闲时间（秒），之后读取内存
+IDLE_TIME = 1.0
+PREVIEW_TEXT = "def handler(event):\n    return compute(event['x'] + 1)\n" * 40
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def trimmed_rss_mb() -> float:
+    """让 glibc 把已释放的堆内存归还系统后的 RSS，区分真正释放与只是未归还的内存"""
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    return rss_mb()
+
+
+def install_stubs():
+    win32api = types.ModuleType("win32api")
+    win32api.GetCursorPos = lambda: (400, 300)
+    sys.modules.setdefault("win32api", win32api)
+    keyboard = types.ModuleType("keyboard")
+    keyboard.key_to_scan_codes = lambda name: ()
+    keyboard.hook_key = lambda *args: None
+    sys.modules.setdefault("keyboard", keyboard)
+
+
+def idle(app, seconds):
+    from PyQt5.QtCore import QCoreApplication, QEvent
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        time.sleep(0.01)
+
+
+def run(mode):
+    """在单独的进程中运行一种方式，输出测量结果"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    install_stubs()
+    import log
+    log.set_console(False)
+    from PyQt5.QtCore import qInstallMessageHandler
+    from PyQt5.QtWidgets import QApplication
+
+    # offscreen 平台不支持透明度等窗口属性，忽略其警告
+    qInstallMessageHandler(lambda *args: None)
+    started = time.perf_counter()
+    app = QApplication([])
+    import clipboard_preview
+    from clipboard_snapshot import ClipboardSnapshot
+    from clipboard_state import ClipboardState
+    controller = clipboard_preview.ClipboardPreviewController(ClipboardState())
+    controller.setup(app)
+    if mode == "eager":
+        controller.ensure_window()
+    startup = time.perf_counter() - started
+    idle(app, IDLE_TIME)
+    print(f"{mode}: 启动 {startup * 1000:.0f} ms，空闲 RSS {rss_mb():.1f} MB")
+
+    # 第一次预览：按需创建时包含窗口构建
+    controller.ctrl_detector._state = 1  # 视为按住 Ctrl
+    snapshot = ClipboardSnapshot("文本", PREVIEW_TEXT, size=len(PREVIEW_TEXT), head=PREVIEW_TEXT)
+    started = time.perf_counter()
+    controller.update_preview_window(snapshot)
+    controller.show_preview_window()
+    app.processEvents()
+    first_preview = time.perf_counter() - started
+    idle(app, IDLE_TIME)
+    print(f"{mode}: 第一次预览 {first_preview * 1000:.0f} ms，预览后 RSS {rss_mb():.1f} MB")
+
+    controller.ctrl_detector._state = 0
+    controller.hide_preview_window()
+    idle(app, IDLE_TIME)
+    controller.release_window()
+    idle(app, IDLE_TIME)
+    print(f"{mode}: 释放窗口后 RSS {rss_mb():.1f} MB，归还空闲堆内存后 {trimmed_rss_mb():.1f} MB")
+
+
+def main():
+    for mode in MODES:
+        subprocess.run([sys.executable, os.path.abspath(__file__), mode], cwd=REPO_DIR, check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run(sys.argv[1])
+    else:
+        main()
@@ -0,0 +1,73 @@
+# 大文本剪贴板内容的内存占用：旧版结果字典保存完整内容与紧凑快照（ClipboardSnapshot）的比较
+# 以替身剪贴板模拟 pywin32 每次读取都返回新的字符串，监视线程和预览缓存各读取并保存一次；仅 Linux（读取 /proc）
+#
+#   python benchmarks/bench_snapshot_memory.py [文本大小 MB，默认 100]
+import gc
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+MODES = ("dict", "snapshot")
+TRUNCATE_LENGTH = 100
+LINE = "2024-01-01 12:00:00 INFO request handled in 12 ms, 剪贴板内容 id=0123456789\n"
+
+
+def memory_mb():
+    """当前和峰值 RSS（MB）"""
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                values[line.split(":")[0]] = int(line.split()[1]) / 1024
+    return values["VmRSS"], values["VmHWM"]
+
+
+class StubClipboard:
+    """每次读取都构造一份新的文本，与 GetClipboardData 返回新对象相同"""
+
+    def __init__(self, size_mb):
+        self.repeat = int(size_mb * 1024 * 1024) // len(LINE.encode("utf-8"))
+
+    def read(self):
+        return "".join([LINE] * self.repeat)
+
+
+def old_result(data):
+    """旧版 get_clipboard_content 的结果：字典中保存完整内容"""
+    return {"type": "文本", "content": data[:TRUNCATE_LENGTH] + "...", "raw_content": data}
+
+
+def new_result(data):
+    from clipboard_snapshot import ClipboardSnapshot
+    return ClipboardSnapshot.from_payload("文本", data[:TRUNCATE_LENGTH] + "...", data)
+
+
+def run(mode, size_mb):
+    clipboard = StubClipboard(size_mb)
+    build = old_result if mode == "dict" else new_result
+    baseline, _ = memory_mb()
+    # 监视线程保存的上一次内容，以及预览控制器的缓存
+    held = []
+    for _ in range(2):
+        data = clipboard.read()
+        held.append(build(data))
+        data = None
+    gc.collect()
+    resident, peak = memory_mb()
+    print(f"{mode:>8}: 保存两份结果后 RSS 增加 {resident - baseline:7.1f} MB，峰值增加 {peak - baseline:7.1f} MB")
+
+
+def main(size_mb):
+    print(f"剪贴板文本 {size_mb} MB")
+    for mode in MODES:
+        subprocess.run([sys.executable, os.path.abspath(__file__), mode, str(size_mb)], cwd=REPO_DIR, check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        run(sys.argv[1], float(sys.argv[2]))
+    else:
+        main(float(sys.argv[1]) if len(sys.argv) > 1 else 100)
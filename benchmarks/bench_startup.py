@@ -0,0 +1,124 @@
+# 无界面启动耗时：以替身模块代替 PyQt5、pystray、PIL、pywin32 等，运行 func.main 直到托盘就绪和首个剪贴板快照，
+# 输出 startup_trace 的报告；有阶段超出 STARTUP_BUDGETS 时以状态 1 退出，可在非 Windows 系统上运行
+#
+#   python benchmarks/bench_startup.py
+import time
+
+STARTED = time.perf_counter()
+
+import os
+import shutil
+import sys
+import tempfile
+import types
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 需要替身的界面与平台模块
+STUB_MODULES = [
+    "PyQt5", "PyQt5.QtWidgets", "PyQt5.QtCore", "PyQt5.QtGui",
+    "pystray", "pystray._base", "PIL", "PIL.Image", "PIL.ImageDraw",
+    "win11toast", "pyperclip", "keyboard", "win32api", "win32clipboard", "win32con", "winreg",
+]
+# 作为基类使用的 Qt 控件
+QT_WIDGETS = ["QMainWindow", "QWidget", "QLabel", "QFrame", "QScrollArea", "QPushButton",
+              "QGraphicsDropShadowEffect", "QTextEdit"]
+# 等待托盘就绪和首个剪贴板快照的最长时间（秒）
+MILESTONE_TIMEOUT = 5.0
+
+
+class StubModule(types.ModuleType):
+    """访问任何属性都返回 MagicMock 的模块"""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = mock.MagicMock(name=f"{self.__name__}.{name}")
+        setattr(self, name, value)
+        return value
+
+
+class QtStub:
+    """可以被继承的 Qt 控件替身"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        value = mock.MagicMock()
+        object.__setattr__(self, name, value)
+        return value
+
+
+def install_stubs():
+    for name in STUB_MODULES:
+        sys.modules.setdefault(name, StubModule(name))
+    qt_core = sys.modules["PyQt5.QtCore"]
+    qt_core.QObject = type("QObject", (QtStub,), {})
+    qt_core.pyqtSignal = lambda *args: mock.MagicMock()
+    qt_widgets = sys.modules["PyQt5.QtWidgets"]
+    for name in QT_WIDGETS:
+        setattr(qt_widgets, name, type(name, (QtStub,), {}))
+
+
+def main() -> int:
+    install_stubs()
+    import log
+    from startup_trace import startup_trace
+
+    log.set_debug_mode(False)
+    # 与 main.py 一样从进程开始计时
+    startup_trace.origin = STARTED
+    with startup_trace.phase("导入模块"):
+        import func
+
+    directory = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        func.CONFIG_FILE = os.path.join(directory, "config.json")
+        func.config.path = func.CONFIG_FILE
+        func.get_sequence_number = lambda: 1
+        snapshot = {"format": "text", "data": "hello", "formats": [], "sequence": 1}
+        func.clipboard_worker.read_snapshot = lambda: mock.Mock(result=lambda timeout=None: snapshot)
+
+        icon = mock.MagicMock()
+        icon.run.side_effect = lambda setup=None: setup(icon)
+        func.setup_tray_icon = lambda: icon
+        func.QApplication.instance.return_value = None
+        app = mock.MagicMock()
+        func.QApplication.return_value = app
+
+        def exec_():
+            # 代替 Qt 事件循环，等到启动报告的里程碑全部到达
+            deadline = time.monotonic() + MILESTONE_TIMEOUT
+            while (not all(name in startup_trace.marks for name in startup_trace.milestones)
+                   and time.monotonic() < deadline):
+                time.sleep(0.005)
+            return 0
+
+        app.exec_.side_effect = exec_
+        try:
+            func.main()
+        except SystemExit:
+            pass
+        func.scheduler.shutdown(timeout=1.0)
+        if func.history_store is not None:
+            func.history_store.close(timeout=1.0)
+        if func.instance_server is not None:
+            func.instance_server.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for line in startup_trace.lines():
+        print(line)
+    missing = [name for name in startup_trace.milestones if name not in startup_trace.marks]
+    exceeded = startup_trace.exceeded()
+    if missing:
+        print(f"未到达的里程碑: {'，'.join(missing)}")
+    for name, value, budget in exceeded:
+        print(f"超出预算: {name} {value * 1000:.1f} ms > {budget * 1000:.0f} ms")
+    return 1 if missing or exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
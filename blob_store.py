@@ -0,0 +1,359 @@
+import codecs
+import mmap
+import os
+import queue
+import shutil
+import threading
+import time
+
+import log
+from compression import CODEC_RAW, CODEC_ZLIB, STREAM_CHUNK_SIZE, stream_compress, stream_decompress
+
+# 大内容存储目录名，与 config.json 位于同一目录
+BLOB_DIR_NAME = "blobs"
+# 超过该大小（字符数或字节数）的内容写入大内容存储
+BLOB_SIZE_THRESHOLD = 64 * 1024
+# 写入文件时每次编码的字符数，避免为大文本一次性生成完整的字节副本
+BLOB_WRITE_CHUNK_SIZE = STREAM_CHUNK_SIZE
+# 垃圾回收时跳过最近写入的文件（秒），避免删除历史记录尚未登记的新内容
+BLOB_GC_GRACE_PERIOD = 60.0
+
+# 文件首字节标记内容是文本还是字节串（与 compute_digest 的前缀一致），大写表示经过 zlib 压缩
+_TEXT_MARK = b"s"
+_BYTES_MARK = b"b"
+_MARK_CODECS = {b"s": CODEC_RAW, b"b": CODEC_RAW, b"S": CODEC_ZLIB, b"B": CODEC_ZLIB}
+_TEMP_SUFFIX = ".tmp"
+
+
+def get_blob_dir(config_file: str) -> str:
+    """获取大内容存储目录
+
+    Args:
+        config_file: 配置文件路径
+
+    Returns:
+        str: 与配置文件同目录的存储目录
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(config_file)), BLOB_DIR_NAME)
+
+
+class BlobView:
+    """通过 mmap 只读访问的大内容
+
+    只有实际访问到的页面才会被读入内存，读取 500 MB 文本的开头
+    不需要加载整个文件；压缩过的内容也只解压到所需的长度为止。
+    使用完毕后应调用 close 或使用 with 语句。
+    """
+
+    def __init__(self, mapped, is_text, codec=CODEC_RAW):
+        self._mmap = mapped
+        self.is_text = is_text
+        self.codec = codec
+
+    def __len__(self):
+        """文件中保存的字节数（压缩后的大小）"""
+        return 0 if self._mmap is None else len(self._mmap) - 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _stored_chunks(self):
+        """按块读取文件中保存的数据"""
+        size = len(self)
+        for start in range(0, size, BLOB_WRITE_CHUNK_SIZE):
+            yield self._mmap[1 + start:1 + min(start + BLOB_WRITE_CHUNK_SIZE, size)]
+
+    def iter_chunks(self, max_length: int = 0):
+        """按块产出解压后的内容
+
+        Args:
+            max_length: 大于 0 时产出该字节数后停止
+        """
+        if self._mmap is None:
+            return
+        yield from stream_decompress(self._stored_chunks(), self.codec, max_length)
+
+    def read_bytes(self, start: int = 0, end: int = None) -> bytes:
+        """读取解压后指定范围的字节"""
+        if self._mmap is None:
+            return b""
+        if self.codec == CODEC_RAW:
+            size = len(self)
+            end = size if end is None else min(end, size)
+            return self._mmap[1 + start:1 + end]
+        data = b"".join(self.iter_chunks(end or 0))
+        return data[start:end]
+
+    def head(self, limit: int):
+        """读取开头的片段
+
+        Args:
+            limit: 文本为字符数，字节串为字节数
+
+        Returns:
+            str 或 bytes: 开头片段
+        """
+        if not self.is_text:
+            return self.read_bytes(0, limit)
+        # UTF-8 每个字符最多 4 个字节，截断处不完整的字符直接丢弃
+        text = self.read_bytes(0, limit * 4).decode("utf-8", "ignore")
+        return text[:limit]
+
+    def read(self):
+        """读取完整内容"""
+        if not self.is_text:
+            return self.read_bytes()
+        decoder = codecs.getincrementaldecoder("utf-8")("surrogatepass")
+        parts = [decoder.decode(chunk) for chunk in self.iter_chunks()]
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts)
+
+
+class BlobStore:
+    """按摘要寻址的大内容存储
+
+    超过阈值的剪贴板内容以摘要为文件名保存在应用数据目录中，
+    相同内容只保存一份，可压缩的内容以 zlib 流式压缩后保存。
+    写入与删除由后台线程串行执行，读取通过 mmap 按需访问，不需要把完整内容加载到内存。
+    """
+
+    def __init__(self, root: str, threshold: int = BLOB_SIZE_THRESHOLD):
+        """
+        Args:
+            root: 存储目录
+            threshold: 写入存储的最小内容大小
+        """
+        self.root = root
+        self.threshold = threshold
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, digest: str) -> str:
+        """摘要对应的文件路径，按前两位分目录避免单个目录文件过多"""
+        return os.path.join(self.root, digest[:2], digest)
+
+    def contains(self, digest: str) -> bool:
+        return bool(digest) and os.path.exists(self.path_for(digest))
+
+    def should_store(self, snapshot) -> bool:
+        """快照是否需要写入大内容存储"""
+        return (bool(snapshot.digest)
+                and snapshot.size >= self.threshold
+                and isinstance(snapshot.head, (str, bytes)))
+
+    def put(self, digest: str, payload, content_type=None):
+        """写入内容（非阻塞），已存在时跳过
+
+        Args:
+            digest: 内容摘要
+            payload: 文本或字节串
+            content_type: 内容类型，用于选择压缩级别
+        """
+        self._submit(("put", digest, lambda: payload, content_type))
+
+    def put_snapshot(self, snapshot):
+        """写入快照的完整内容（非阻塞）
+
+        快照不持有完整内容，由后台线程通过 load_payload 重新读取；
+        剪贴板已变化导致摘要不一致时放弃写入。
+        """
+        if self.should_store(snapshot):
+            self._submit(("put", snapshot.digest, snapshot.load_payload, snapshot.type))
+
+    def delete(self, digest: str):
+        """删除内容（非阻塞）"""
+        if digest:
+            self._submit(("delete", digest))
+
+    def collect_garbage(self, get_referenced):
+        """删除没有被任何历史条目引用的内容（非阻塞）
+
+        Args:
+            get_referenced: 无参函数，返回仍被引用的摘要集合，在后台线程中调用，
+                保证与此前提交的写入顺序一致
+        """
+        self._submit(("gc", get_referenced))
+
+    def open(self, digest: str):
+        """以 mmap 方式打开内容
+
+        Returns:
+            BlobView: 不存在或无法读取时返回 None
+        """
+        if not digest:
+            return None
+        try:
+            with open(self.path_for(digest), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        mark = mapped[:1]
+        return BlobView(mapped, mark.lower() == _TEXT_MARK, _MARK_CODECS.get(mark, CODEC_RAW))
+
+    def read_head(self, digest: str, limit: int):
+        """读取内容开头的片段，不存在时返回 None"""
+        view = self.open(digest)
+        if view is None:
+            return None
+        with view:
+            return view.head(limit)
+
+    def read(self, digest: str):
+        """读取完整内容，不存在时返回 None"""
+        view = self.open(digest)
+        if view is None:
+            return None
+        with view:
+            return view.read()
+
+    def export_file(self, digest: str, target: str) -> bool:
+        """把内容文件原样复制到 target，保持存储格式（含压缩）
+
+        Returns:
+            bool: 内容存在并已复制
+        """
+        source = self.path_for(digest)
+        if not digest or not os.path.exists(source):
+            return False
+        shutil.copyfile(source, target)
+        return True
+
+    def import_file(self, digest: str, source: str) -> bool:
+        """从 export_file 导出的文件导入内容，已存在时跳过
+
+        Returns:
+            bool: 是否新写入了内容
+        """
+        path = self.path_for(digest)
+        if not digest or os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + _TEMP_SUFFIX
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, path)
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待此前提交的操作全部完成
+
+        Returns:
+            bool: 是否在超时前完成
+        """
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """完成剩余操作并停止后台线程"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _submit(self, op):
+        """把操作放入队列，按需启动后台线程"""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="blob-writer", daemon=True)
+                    self._thread.start()
+        self._queue.put(op)
+
+    def _run(self):
+        """后台线程主循环"""
+        while True:
+            op = self._queue.get()
+            if op is None:
+                break
+            try:
+                kind = op[0]
+                if kind == "put":
+                    self._write(op[1], op[2], op[3])
+                elif kind == "delete":
+                    self._remove(op[1])
+                elif kind == "gc":
+                    self._collect(op[1]())
+                elif kind == "flush":
+                    op[1].set()
+            except Exception as e:
+                log.error(f"大内容存储操作失败: {e}")
+            # 及时释放对内容的引用
+            del op
+
+    def _write(self, digest, load, content_type=None):
+        """压缩写入临时文件后原子替换，进程中断不会留下不完整的内容"""
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return
+        payload = load()
+        if payload is None:
+            log.debug("剪贴板内容已变化，跳过写入大内容存储")
+            return
+
+        is_text = isinstance(payload, str)
+        if is_text:
+            chunks = (payload[start:start + BLOB_WRITE_CHUNK_SIZE].encode("utf-8", "surrogatepass")
+                      for start in range(0, len(payload), BLOB_WRITE_CHUNK_SIZE))
+        else:
+            view = memoryview(payload)
+            chunks = (view[start:start + BLOB_WRITE_CHUNK_SIZE]
+                      for start in range(0, len(view), BLOB_WRITE_CHUNK_SIZE))
+        stream = stream_compress(chunks, len(payload), content_type)
+        mark = _TEXT_MARK if is_text else _BYTES_MARK
+        if next(stream) != CODEC_RAW:
+            mark = mark.upper()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + _TEMP_SUFFIX
+        with open(temp_path, "wb") as f:
+            f.write(mark)
+            for chunk in stream:
+                f.write(chunk)
+        os.replace(temp_path, path)
+        log.debug(f"已写入大内容 {digest[:8]}（{os.path.getsize(path) - 1} 字节）")
+
+    def _remove(self, digest) -> bool:
+        """删除内容文件，正在被 mmap 映射时删除会失败，留给下次垃圾回收"""
+        try:
+            os.remove(self.path_for(digest))
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            log.debug(f"删除大内容 {digest[:8]} 失败: {e}")
+            return False
+
+    def _collect(self, referenced):
+        """删除未被引用的内容和残留的临时文件"""
+        cutoff = time.time() - BLOB_GC_GRACE_PERIOD
+        removed = 0
+        with os.scandir(self.root) as buckets:
+            for bucket in buckets:
+                if not bucket.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(bucket.path) as entries:
+                    for entry in entries:
+                        # 临时文件的名称不会出现在引用集合中，超过宽限期后一并清理
+                        if entry.name in referenced:
+                            continue
+                        try:
+                            if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                                continue
+                            os.remove(entry.path)
+                            removed += 1
+                        except OSError as e:
+                            log.debug(f"清理大内容 {entry.name} 失败: {e}")
+        if removed:
+            log.debug(f"已清理 {removed} 个未被引用的大内容")
@@ -0,0 +1,270 @@
+import queue
+import threading
+import time
+
+import log
+from clipboard_snapshot import compute_digest
+
+# 历史记录中保留的预览长度（字符数）
+HISTORY_PREVIEW_LENGTH = 200
+# 不记录到历史中的内容类型
+HISTORY_IGNORED_TYPES = frozenset({"错误"})
+
+# 槽位链表的空指针
+_NIL = -1
+
+
+class HistoryEntry:
+    """剪贴板历史条目，只保存摘要、类型、时间、大小和预览片段
+
+    text 是相似检测使用的较长文本（快照的头尾片段），只在记录线程通知订阅者期间保留，
+    不保存到数据库，也不会导出。
+    """
+
+    __slots__ = ("digest", "type", "timestamp", "size", "preview", "text")
+
+    def __init__(self, digest, content_type, timestamp, size, preview, text=None):
+        self.digest = digest
+        self.type = content_type
+        self.timestamp = timestamp
+        self.size = size
+        self.preview = preview
+        self.text = text
+
+    @classmethod
+    def from_snapshot(cls, snapshot, timestamp=None):
+        """根据剪贴板快照创建历史条目
+
+        Args:
+            snapshot: ClipboardSnapshot
+            timestamp: 记录时间，默认为当前时间
+
+        Returns:
+            HistoryEntry
+        """
+        text = None
+        if isinstance(snapshot.head, str) and snapshot.type in ("文本", "网址", "邮箱", "网盘链接"):
+            preview = snapshot.head[:HISTORY_PREVIEW_LENGTH]
+            if len(snapshot.head) > HISTORY_PREVIEW_LENGTH:
+                # 只比较预览会把开头相同的长文本（同一格式的日志、相同的文件头）误判为相似
+                separator = "\n" if snapshot.is_truncated else ""
+                text = snapshot.head + separator + snapshot.tail
+        else:
+            preview = snapshot.content[:HISTORY_PREVIEW_LENGTH]
+        # 图片等没有内容摘要的类型以类型和描述作为去重依据
+        digest = snapshot.digest or compute_digest(f"{snapshot.type}\0{snapshot.content}")
+        return cls(digest, snapshot.type, time.time() if timestamp is None else timestamp, snapshot.size, preview, text)
+
+    def __repr__(self):
+        return f"HistoryEntry(type={self.type!r}, size={self.size}, digest={self.digest[:8]!r})"
+
+
+class ClipboardHistory:
+    """固定容量的内存剪贴板历史
+
+    条目存放在固定数量的槽位中，槽位之间用前驱/后继下标组成双向链表，
+    配合摘要到槽位的索引，去重、重复复制时移到最前和淘汰最旧条目都是 O(1)。
+    写入通过队列交给后台线程，调用 record 的线程不会被阻塞。
+    """
+
+    def __init__(self, capacity: int):
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._reset(max(1, int(capacity)))
+
+    def _reset(self, capacity: int):
+        """按容量重新分配槽位（需持有锁或在初始化时调用）"""
+        self.capacity = capacity
+        self._entries = [None] * capacity
+        self._prev = [_NIL] * capacity
+        self._next = [_NIL] * capacity
+        self._index = {}
+        self._free = list(range(capacity - 1, -1, -1))
+        self._head = _NIL
+        self._tail = _NIL
+
+    def __len__(self):
+        return len(self._index)
+
+    def subscribe(self, callback):
+        """订阅历史变化
+
+        Args:
+            callback: callback(event, entry)，event 为 "add"、"touch" 或 "evict"，
+                在后台记录线程中调用
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def record(self, snapshot):
+        """记录一次剪贴板内容（非阻塞）
+
+        Args:
+            snapshot: ClipboardSnapshot
+        """
+        if snapshot is None or snapshot.type in HISTORY_IGNORED_TYPES:
+            return
+        self._ensure_thread()
+        self._queue.put(HistoryEntry.from_snapshot(snapshot))
+
+    def _ensure_thread(self):
+        """按需启动后台记录线程"""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="clipboard-history", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """后台记录线程主循环"""
+        while True:
+            entry = self._queue.get()
+            try:
+                self.add(entry)
+            except Exception as e:
+                log.error(f"记录剪贴板历史出错: {e}")
+            # 订阅者已处理完毕，释放相似检测用的文本
+            entry.text = None
+
+    def add(self, entry: HistoryEntry):
+        """同步添加条目，已存在的摘要会更新时间并移到最前
+
+        Args:
+            entry: HistoryEntry
+
+        Returns:
+            HistoryEntry: 历史中实际保存的条目
+        """
+        events = []
+        with self._lock:
+            slot = self._index.get(entry.digest)
+            if slot is not None:
+                existing = self._entries[slot]
+                existing.timestamp = entry.timestamp
+                self._unlink(slot)
+                self._link_front(slot)
+                events.append(("touch", existing))
+                entry = existing
+            else:
+                if self._free:
+                    slot = self._free.pop()
+                else:
+                    slot = self._tail
+                    evicted = self._entries[slot]
+                    self._unlink(slot)
+                    del self._index[evicted.digest]
+                    events.append(("evict", evicted))
+                self._entries[slot] = entry
+                self._index[entry.digest] = slot
+                self._link_front(slot)
+                events.append(("add", entry))
+            listeners = list(self._listeners)
+
+        self._notify(listeners, events)
+        return entry
+
+    def remove(self, digest) -> bool:
+        """删除指定摘要的条目
+
+        Returns:
+            bool: 是否存在并已删除
+        """
+        with self._lock:
+            slot = self._index.pop(digest, None)
+            if slot is None:
+                return False
+            entry = self._entries[slot]
+            self._unlink(slot)
+            self._entries[slot] = None
+            self._free.append(slot)
+            listeners = list(self._listeners)
+
+        self._notify(listeners, [("evict", entry)])
+        return True
+
+    def get(self, digest):
+        """按摘要查找条目，不存在时返回 None"""
+        with self._lock:
+            slot = self._index.get(digest)
+            return None if slot is None else self._entries[slot]
+
+    def __contains__(self, digest):
+        return digest in self._index
+
+    def entries(self, limit=None):
+        """按从新到旧的顺序返回条目列表
+
+        Args:
+            limit: 最多返回的条目数量
+        """
+        result = []
+        with self._lock:
+            slot = self._head
+            while slot != _NIL and (limit is None or len(result) < limit):
+                result.append(self._entries[slot])
+                slot = self._next[slot]
+        return result
+
+    def resize(self, capacity: int):
+        """调整容量，缩小时淘汰最旧的条目"""
+        capacity = max(1, int(capacity))
+        with self._lock:
+            if capacity == self.capacity:
+                return
+            kept = self.entries(capacity)
+            evicted = self.entries()[capacity:]
+            self._reset(capacity)
+            for entry in reversed(kept):
+                slot = self._free.pop()
+                self._entries[slot] = entry
+                self._index[entry.digest] = slot
+                self._link_front(slot)
+            listeners = list(self._listeners)
+
+        self._notify(listeners, [("evict", entry) for entry in evicted])
+
+    def clear(self):
+        """清空历史"""
+        with self._lock:
+            evicted = self.entries()
+            self._reset(self.capacity)
+            listeners = list(self._listeners)
+        self._notify(listeners, [("evict", entry) for entry in evicted])
+
+    def _notify(self, listeners, events):
+        """在锁外通知订阅者"""
+        for event, entry in events:
+            for callback in listeners:
+                try:
+                    callback(event, entry)
+                except Exception as e:
+                    log.error(f"剪贴板历史订阅者处理出错: {e}")
+
+    def _link_front(self, slot):
+        """把槽位插入链表头部"""
+        self._prev[slot] = _NIL
+        self._next[slot] = self._head
+        if self._head != _NIL:
+            self._prev[self._head] = slot
+        self._head = slot
+        if self._tail == _NIL:
+            self._tail = slot
+
+    def _unlink(self, slot):
+        """把槽位从链表中摘下"""
+        prev_slot = self._prev[slot]
+        next_slot = self._next[slot]
+        if prev_slot != _NIL:
+            self._next[prev_slot] = next_slot
+        else:
+            self._head = next_slot
+        if next_slot != _NIL:
+            self._prev[next_slot] = prev_slot
+        else:
+            self._tail = prev_slot
+        self._prev[slot] = _NIL
+        self._next[slot] = _NIL
@@ -0,0 +1,320 @@
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import win32clipboard
+import win32con
+
+import log
+from metrics import metrics
+
+# 打开剪贴板的最大尝试次数
+MAX_CLIPBOARD_RETRY = 5
+# 指数退避的初始延迟与上限（秒）
+CLIPBOARD_BACKOFF_BASE = 0.02
+CLIPBOARD_BACKOFF_MAX = 0.4
+
+# 每次操作打开剪贴板前的重试次数分布与总延迟（含排队）
+open_retries_histogram = metrics.histogram("clipboard.open_retries", buckets=range(MAX_CLIPBOARD_RETRY), unit="次")
+io_latency_histogram = metrics.histogram("clipboard.io_latency")
+
+# 注册的剪贴板格式
+CF_HTML = win32clipboard.RegisterClipboardFormat("HTML Format")
+CF_RTF = win32clipboard.RegisterClipboardFormat("Rich Text Format")
+CF_URL = win32clipboard.RegisterClipboardFormat("UniformResourceLocator")
+CF_OFFICE_DRAWING = win32clipboard.RegisterClipboardFormat("Object Descriptor")
+
+
+class ClipboardError(Exception):
+    """剪贴板操作错误"""
+    pass
+
+
+def backoff_delay(attempt: int,
+                  base: float = CLIPBOARD_BACKOFF_BASE,
+                  cap: float = CLIPBOARD_BACKOFF_MAX) -> float:
+    """计算带抖动的指数退避延迟
+
+    采用 "equal jitter" 策略：一半为确定的指数延迟，另一半随机，
+    既保证退避增长，又避免多个进程同时重试造成的同步争用。
+
+    Args:
+        attempt: 已失败的次数（从0开始）
+        base: 初始延迟（秒）
+        cap: 延迟上限（秒）
+
+    Returns:
+        float: 本次应等待的秒数
+    """
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def get_clipboard_format_name(format_id):
+    """安全获取剪贴板格式名称
+
+    Args:
+        format_id: 格式ID
+
+    Returns:
+        str: 格式名称，如果出错则返回"未知格式"
+    """
+    try:
+        return win32clipboard.GetClipboardFormatName(format_id)
+    except:
+        return f"未知格式({format_id})"
+
+
+def enum_clipboard_formats():
+    """枚举当前剪贴板中的所有格式（需在剪贴板已打开时调用）
+
+    Returns:
+        list: (格式ID, 格式名称) 列表
+    """
+    formats = []
+    format_id = 0
+    while True:
+        try:
+            format_id = win32clipboard.EnumClipboardFormats(format_id)
+        except:
+            break
+        if format_id == 0:
+            break
+        formats.append((format_id, get_clipboard_format_name(format_id)))
+    return formats
+
+
+def get_sequence_number() -> int:
+    """获取剪贴板序列号
+
+    剪贴板内容每次变化序列号都会递增，查询时无需打开剪贴板，
+    可以在任意线程中调用。
+
+    Returns:
+        int: 序列号，获取失败时返回0
+    """
+    try:
+        return win32clipboard.GetClipboardSequenceNumber()
+    except Exception:
+        return 0
+
+
+def read_raw_snapshot():
+    """读取剪贴板原始数据（需在剪贴板已打开时调用）
+
+    只负责把数据从剪贴板中取出，不做任何分类或文件系统访问，
+    以便尽快关闭剪贴板。
+
+    Returns:
+        dict: {"format": 格式类别, "data": 原始数据, "formats": 格式名称列表, "sequence": 序列号}
+    """
+    available = win32clipboard.IsClipboardFormatAvailable
+    result = {"sequence": get_sequence_number(), "formats": [name for _, name in enum_clipboard_formats()]}
+
+    if available(win32con.CF_UNICODETEXT):
+        data = win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
+        return dict(result, format="text", data=data)
+    if available(win32con.CF_TEXT):
+        data = win32clipboard.GetClipboardData(win32con.CF_TEXT).decode('utf-8')
+        return dict(result, format="text", data=data)
+    if available(CF_HTML):
+        return dict(result, format="html", data=win32clipboard.GetClipboardData(CF_HTML))
+    if available(CF_RTF):
+        return dict(result, format="rtf", data=win32clipboard.GetClipboardData(CF_RTF))
+    if available(CF_URL):
+        return dict(result, format="url", data=win32clipboard.GetClipboardData(CF_URL))
+    if available(win32con.CF_DIB) or available(win32con.CF_BITMAP):
+        return dict(result, format="image", data=None)
+    if available(win32con.CF_HDROP):
+        return dict(result, format="files", data=list(win32clipboard.GetClipboardData(win32con.CF_HDROP)))
+    if available(CF_OFFICE_DRAWING):
+        return dict(result, format="office", data=None)
+    return dict(result, format="other", data=None)
+
+
+def write_text(text):
+    """写入文本到剪贴板（需在剪贴板已打开时调用）"""
+    win32clipboard.EmptyClipboard()
+    if text:
+        win32clipboard.SetClipboardText(text, win32con.CF_UNICODETEXT)
+    return True
+
+
+def empty_clipboard():
+    """清空剪贴板（需在剪贴板已打开时调用）"""
+    win32clipboard.EmptyClipboard()
+    return True
+
+
+class ClipboardIOWorker:
+    """串行化的剪贴板 I/O 工作线程
+
+    所有对 win32clipboard 的访问都通过请求队列交给同一个线程执行，
+    调用方只拿到 Future。由于只有这一个线程会打开剪贴板，
+    不再需要按线程记录打开状态。
+    """
+
+    def __init__(self,
+                 max_retries: int = MAX_CLIPBOARD_RETRY,
+                 backoff_base: float = CLIPBOARD_BACKOFF_BASE,
+                 backoff_max: float = CLIPBOARD_BACKOFF_MAX):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "completed": 0,
+            "failed": 0,
+            "open_attempts": 0,
+            "open_retries": 0,
+            "open_failures": 0,
+            "queue_wait_total": 0.0,
+            "latency_total": 0.0,
+            "latency_max": 0.0,
+            "latency_last": 0.0,
+        }
+
+    def start(self):
+        """启动工作线程（重复调用无副作用）"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="clipboard-io", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """停止工作线程，已排队的请求会先被处理完"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+
+    def submit(self, operation, *args, **kwargs) -> Future:
+        """提交一个需要在打开的剪贴板上执行的操作
+
+        Args:
+            operation: 在剪贴板打开期间执行的函数
+            *args, **kwargs: 传递给 operation 的参数
+
+        Returns:
+            Future: 操作结果；打开剪贴板失败时以 ClipboardError 结束
+        """
+        future = Future()
+        with self._stats_lock:
+            self._stats["requests"] += 1
+
+        # 在工作线程内部再次提交时直接执行，避免自我等待造成死锁
+        if threading.current_thread() is self._thread:
+            self._execute(future, operation, args, kwargs, time.perf_counter())
+            return future
+
+        self.start()
+        self._queue.put((future, operation, args, kwargs, time.perf_counter()))
+        return future
+
+    def read_snapshot(self) -> Future:
+        """异步读取剪贴板原始数据"""
+        return self.submit(read_raw_snapshot)
+
+    def set_text(self, text) -> Future:
+        """异步设置剪贴板文本"""
+        return self.submit(write_text, text)
+
+    def clear(self) -> Future:
+        """异步清空剪贴板"""
+        return self.submit(empty_clipboard)
+
+    def stats(self) -> dict:
+        """获取延迟与重试计数的快照
+
+        Returns:
+            dict: 计数器和延迟统计（秒）
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        finished = stats["completed"] + stats["failed"]
+        stats["latency_avg"] = stats["latency_total"] / finished if finished else 0.0
+        stats["queue_wait_avg"] = stats["queue_wait_total"] / finished if finished else 0.0
+        stats["queue_depth"] = self._queue.qsize()
+        return stats
+
+    def _run(self):
+        """工作线程主循环"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, operation, args, kwargs, enqueued_at = item
+            self._execute(future, operation, args, kwargs, enqueued_at)
+            # 等待下一个请求前释放引用，避免上一次读取的大块内容常驻内存
+            del item, future, operation, args, kwargs
+
+    def _execute(self, future, operation, args, kwargs, enqueued_at):
+        """打开剪贴板、执行操作并关闭，结果写入 Future"""
+        if not future.set_running_or_notify_cancel():
+            return
+
+        started_at = time.perf_counter()
+        try:
+            self._open_with_backoff()
+            try:
+                result = operation(*args, **kwargs)
+            finally:
+                try:
+                    win32clipboard.CloseClipboard()
+                except Exception as e:
+                    # 这里使用debug级别，因为这通常不是致命错误
+                    log.debug("关闭剪贴板失败: %s", e)
+        except Exception as e:
+            self._record(enqueued_at, started_at, failed=True)
+            future.set_exception(e)
+        else:
+            self._record(enqueued_at, started_at, failed=False)
+            future.set_result(result)
+
+    def _open_with_backoff(self):
+        """使用带抖动的指数退避打开剪贴板
+
+        Raises:
+            ClipboardError: 所有尝试均失败
+        """
+        for attempt in range(self.max_retries):
+            with self._stats_lock:
+                self._stats["open_attempts"] += 1
+            try:
+                win32clipboard.OpenClipboard()
+                open_retries_histogram.observe(attempt)
+                return
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    with self._stats_lock:
+                        self._stats["open_failures"] += 1
+                    log.debug("打开剪贴板失败: %s", e)
+                    raise ClipboardError("无法访问剪贴板，可能被其他程序占用") from e
+                with self._stats_lock:
+                    self._stats["open_retries"] += 1
+                time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+
+    def _record(self, enqueued_at, started_at, failed):
+        """记录一次请求的排队时间与执行延迟"""
+        finished_at = time.perf_counter()
+        latency = finished_at - enqueued_at
+        io_latency_histogram.observe(latency)
+        with self._stats_lock:
+            self._stats["failed" if failed else "completed"] += 1
+            self._stats["queue_wait_total"] += started_at - enqueued_at
+            self._stats["latency_total"] += latency
+            self._stats["latency_last"] = latency
+            if latency > self._stats["latency_max"]:
+                self._stats["latency_max"] = latency
+
+
+# 全局剪贴板 I/O 工作线程
+clipboard_worker = ClipboardIOWorker()
+metrics.register_collector("clipboard.io", clipboard_worker.stats)
@@ -10,19 +10,24 @@ import threading
 import time
 import log
 import re
+from clipboard_snapshot import ClipboardSnapshot
+from ctrl_hold import CtrlHoldDetector, CTRL_KEY_NAMES
+from metrics import metrics
+from startup_trace import startup_trace
+from text_analysis import detect_language, highlight_code
+from analysis_pool import analysis_pool
+from scheduler import scheduler
 
-# 尝试导入语法高亮库
-try:
-    from pygments import highlight
-    from pygments.lexers import get_lexer_by_name, guess_lexer
-    from pygments.formatters import HtmlFormatter
-    PYGMENTS_AVAILABLE = True
-except ImportError:
-    PYGMENTS_AVAILABLE = False
+# 托盘显示后预热预览窗口的延迟与预览窗口闲置多久后释放（秒），为 0 时不预热或不释放
+PREVIEW_WARM_UP_DELAY = 5.0
+PREVIEW_IDLE_RELEASE = 600.0
+
+# 从按下 Ctrl 到预览窗口显示的耗时（秒）
+preview_latency_histogram = metrics.histogram("preview.ctrl_to_visible")
 
 class ClipboardSignals(QObject):
     """用于线程间通信的信号"""
-    update_preview = pyqtSignal(dict)
+    update_preview = pyqtSignal(object)
     show_preview = pyqtSignal()
     hide_preview = pyqtSignal()
 
@@ -64,14 +69,7 @@ class CodeDetector:
     @staticmethod
     def detect_language(text):
         """尝试检测代码的语言"""
-        if not PYGMENTS_AVAILABLE:
-            return "text"
-            
-        try:
-            lexer = guess_lexer(text)
-            return lexer.name.lower()
-        except:
-            return "text"
+        return detect_language(text)
 
 class StyleSheet:
     """应用程序的样式定义"""
@@ -87,7 +85,12 @@ class StyleSheet:
         """加载自定义字体"""
         if cls.FONT_LOADED:
             return True
-            
+        
+        with startup_trace.phase("字体加载"):
+            return cls._load_custom_font()
+    
+    @classmethod
+    def _load_custom_font(cls):
         try:
             log.debug(f"尝试加载字体文件: {cls.FONT_PATH}")
             
@@ -407,8 +410,17 @@ class ScrollAreaWithWheelEvents(QScrollArea):
 class ContentWidget(QFrame):
     """内容显示窗口部件，根据内容类型显示不同的格式"""
     
+    # 分析进程完成代码高亮：(请求序号, Future)
+    highlight_ready = pyqtSignal(int, object)
+    # 后台线程加载完长文本的完整内容：(请求序号, Future)
+    payload_ready = pyqtSignal(int, object)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.highlight_token = 0
+        self.payload_token = 0
+        self.highlight_ready.connect(self.on_highlight_ready)
+        self.payload_ready.connect(self.on_payload_ready)
         self.initUI()
         
     def initUI(self):
@@ -473,13 +485,22 @@ class ContentWidget(QFrame):
         self.is_expanded = False
         self.full_content = ""
         self.truncated_content = ""
+        self.snapshot = None
         
         # 设置样式
         self.setStyleSheet("background-color: transparent;")
     
-    def set_content(self, content_type, content_value):
-        """设置内容，根据类型进行适当处理"""
+    def set_content(self, content_type, snapshot):
+        """设置内容，根据类型进行适当处理
+        
+        Args:
+            content_type: 内容类型
+            snapshot: 剪贴板快照，长文本只使用其头部片段，展开时再按需加载完整内容
+        """
         self.content_type = content_type
+        self.snapshot = snapshot
+        self.highlight_token += 1
+        self.payload_token += 1
         
         # 清除之前的内容
         self.content_label.setText("")
@@ -489,30 +510,22 @@ class ContentWidget(QFrame):
         color = StyleSheet.TYPE_COLORS.get(content_type, "#e0e0e0")
         self.content_label.setStyleSheet(f"{StyleSheet.get_content_label_style()}; color: {color};")
         
-        # 优先使用原始内容（如果有的话）
-        if isinstance(content_value, dict) and "raw_content" in content_value:
-            actual_content = content_value["raw_content"]
-        else:
-            actual_content = content_value
-        
         # 根据内容类型处理
         if content_type == "图片":
-            self.handle_image(content_value)
+            self.handle_image(snapshot.content)
         elif content_type in ["网址", "邮箱", "网盘链接"]:
-            self.handle_link(actual_content)
+            self.handle_link(snapshot.content)
         elif content_type == "HTML":
-            if isinstance(content_value, dict) and "raw_content" in content_value:
-                self.handle_html(content_value["raw_content"])
-            else:
-                self.handle_html(actual_content)
-        elif content_type == "文本" and len(actual_content) > 30:
-            # 检测是否为代码
+            self.handle_html(snapshot.content)
+        elif content_type == "文本" and snapshot.size > 30:
+            # 快照只保留头部片段，足够用于截断显示和代码检测
+            actual_content = snapshot.head
             if CodeDetector.is_code(actual_content):
                 self.handle_code(actual_content)
             else:
                 self.handle_long_text(actual_content)
         else:
-            self.handle_text(actual_content)
+            self.handle_text(snapshot.content)
     
     def handle_image(self, content):
         """处理图片内容"""
@@ -589,38 +602,111 @@ class ContentWidget(QFrame):
     
     def format_code(self, code):
         """格式化代码，添加语法高亮"""
-        if not PYGMENTS_AVAILABLE:
-            # 使用自定义字体的pre标签，添加智能连字支持
-            if StyleSheet.FONT_LOADED:
-                return f'<pre style="font-family: \'{StyleSheet.FONT_FAMILY}\', Consolas, monospace; font-feature-settings: \'calt\' 1, \'liga\' 1, \'cv01\' 1, \'zero\' 1, \'cv99\' 1, \'ss01\' 1, \'ss02\' 1, \'ss07\' 1;">{code}</pre>'
-            else:
-                return f"<pre>{code}</pre>"
-            
+        highlighted = highlight_code(code)
+        if highlighted is None:
+            return self.format_plain_code(code)
+        return self.format_highlighted(*highlighted)
+    
+    @staticmethod
+    def format_plain_code(code):
+        """不高亮的代码，使用自定义字体的pre标签，添加智能连字支持"""
+        if StyleSheet.FONT_LOADED:
+            return f'<pre style="font-family: \'{StyleSheet.FONT_FAMILY}\', Consolas, monospace; font-feature-settings: \'calt\' 1, \'liga\' 1, \'cv01\' 1, \'zero\' 1, \'cv99\' 1, \'ss01\' 1, \'ss02\' 1, \'ss07\' 1;">{code}</pre>'
+        else:
+            return f"<pre>{code}</pre>"
+    
+    @staticmethod
+    def format_highlighted(highlighted_code, css):
+        """组合 pygments 生成的 HTML 与样式"""
+        # 添加自定义字体到CSS，包含智能连字支持
+        if StyleSheet.FONT_LOADED:
+            css += f"""
+            .highlight pre {{
+                font-family: '{StyleSheet.FONT_FAMILY}', Consolas, monospace;
+                font-feature-settings: "calt" 1, "liga" 1, "cv01" 1, "zero" 1, "cv99" 1, "ss01" 1, "ss02" 1, "ss07" 1;
+                -webkit-font-feature-settings: "calt" 1, "liga" 1, "cv01" 1, "zero" 1, "cv99" 1, "ss01" 1, "ss02" 1, "ss07" 1;
+                -moz-font-feature-settings: "calt" 1, "liga" 1, "cv01" 1, "zero" 1, "cv99" 1, "ss01" 1, "ss02" 1, "ss07" 1;
+            }}
+            """
+        
+        return f"<style>{css}</style>{highlighted_code}"
+    
+    def format_code_async(self, code):
+        """大段代码先以不高亮的形式显示，高亮在分析进程中完成后再替换"""
+        self.highlight_token += 1
+        token = self.highlight_token
+        self.content_label.setText(self.format_plain_code(code))
+        future = analysis_pool.submit("highlight_code", code)
+        future.add_done_callback(lambda done: self.highlight_ready.emit(token, done))
+    
+    def on_highlight_ready(self, token, future):
+        """分析进程返回高亮结果（在主线程中执行），内容已切换或已折叠时丢弃"""
+        if token != self.highlight_token or not self.is_expanded:
+            return
         try:
-            language = CodeDetector.detect_language(code)
-            lexer = get_lexer_by_name(language, stripall=True)
-            formatter = HtmlFormatter(style='monokai')
-            highlighted_code = highlight(code, lexer, formatter)
-            css = formatter.get_style_defs('.highlight')
-            
-            # 添加自定义字体到CSS，包含智能连字支持
-            if StyleSheet.FONT_LOADED:
-                css += f"""
-                .highlight pre {{
-                    font-family: '{StyleSheet.FONT_FAMILY}', Consolas, monospace;
-                    font-feature-settings: "calt" 1, "liga" 1, "cv01" 1, "zero" 1, "cv99" 1, "ss01" 1, "ss02" 1, "ss07" 1;
-                    -webkit-font-feature-settings: "calt" 1, "liga" 1, "cv01" 1, "zero" 1, "cv99" 1, "ss01" 1, "ss02" 1, "ss07" 1;
-                    -moz-font-feature-settings: "calt" 1, "liga" 1, "cv01" 1, "zero" 1, "cv99" 1, "ss01" 1, "ss02" 1, "ss07" 1;
-                }}
-                """
-            
-            return f"<style>{css}</style>{highlighted_code}"
-        except:
-            # 使用自定义字体的pre标签，添加智能连字支持
-            if StyleSheet.FONT_LOADED:
-                return f'<pre style="font-family: \'{StyleSheet.FONT_FAMILY}\', Consolas, monospace; font-feature-settings: \'calt\' 1, \'liga\' 1, \'cv01\' 1, \'zero\' 1, \'cv99\' 1, \'ss01\' 1, \'ss02\' 1, \'ss07\' 1;">{code}</pre>'
+            highlighted = future.result()
+        except Exception as e:
+            log.debug("代码高亮失败: %s", e)
+            return
+        if highlighted is not None:
+            self.content_label.setText(self.format_highlighted(*highlighted))
+    
+    def load_full_content_async(self):
+        """快照只保留了头尾片段时，在阻塞线程池中重新读取完整内容
+
+        完整内容来自大内容存储或当前剪贴板，读取和校验摘要对大文本都较慢，
+        完成后通过 payload_ready 回到主线程显示。
+        """
+        self.payload_token += 1
+        token = self.payload_token
+        self.expand_button.setText("加载中...")
+        future = scheduler.run_blocking(self.load_and_classify, self.snapshot)
+        future.add_done_callback(lambda done: self.payload_ready.emit(token, done))
+    
+    @staticmethod
+    def load_and_classify(snapshot):
+        """读取完整内容并判断是否为代码（在阻塞线程池中执行）
+
+        Returns:
+            tuple: (完整内容, 是否为代码)，无法读取时为 (None, False)
+        """
+        payload = snapshot.load_payload()
+        if not isinstance(payload, str):
+            return None, False
+        return payload, CodeDetector.is_code(payload)
+    
+    def on_payload_ready(self, token, future):
+        """完整内容加载完成（在主线程中执行），内容已切换或已折叠时丢弃"""
+        if token != self.payload_token or not self.is_expanded:
+            return
+        payload, is_code = None, None
+        if not future.cancelled():
+            try:
+                payload, is_code = future.result()
+            except Exception as e:
+                log.debug("加载完整内容失败: %s", e)
+        if payload is None:
+            log.debug("剪贴板内容已变化，无法加载完整内容")
+            payload, is_code = self.full_content, None
+        self.show_full_content(payload, is_code)
+    
+    def show_full_content(self, full_content, is_code=None):
+        """显示展开后的完整内容
+
+        Args:
+            full_content: 完整内容
+            is_code: 完整内容是否为代码，为 None 时在此检测
+        """
+        if is_code is None:
+            is_code = CodeDetector.is_code(full_content)
+        if self.content_type == "文本" and is_code:
+            if len(full_content) >= analysis_pool.threshold:
+                self.format_code_async(full_content)
             else:
-                return f"<pre>{code}</pre>"
+                self.content_label.setText(self.format_code(full_content))
+        else:
+            self.content_label.setText(full_content)
+        self.expand_button.setText("折叠")
     
     def toggle_expand(self):
         """切换展开/折叠状态"""
@@ -634,12 +720,13 @@ class ContentWidget(QFrame):
             self.is_expanded = False
         else:
             # 展开
-            if self.content_type == "文本" and CodeDetector.is_code(self.full_content):
-                self.content_label.setText(self.format_code(self.full_content))
-            else:
-                self.content_label.setText(self.full_content)
-            self.expand_button.setText("折叠")
             self.is_expanded = True
+            if self.snapshot is not None and self.snapshot.is_truncated:
+                self.load_full_content_async()
+            else:
+                # 头尾片段已覆盖全部内容，直接拼接
+                payload = self.snapshot.load_payload() if self.snapshot is not None else None
+                self.show_full_content(payload if isinstance(payload, str) else self.full_content)
 
 class TitleBar(QWidget):
     """自定义标题栏"""
@@ -769,14 +856,13 @@ class PreviewWindow(QMainWindow):
         if not content:
             return
             
-        content_type = content.get("type", "未知")
-        content_value = content.get("content", "")
+        content_type = content.type or "未知"
         
         # 设置标题
         self.title_bar.set_title("剪贴板内容", content_type)
         
         # 设置内容
-        self.content_widget.set_content(content_type, content_value)
+        self.content_widget.set_content(content_type, content)
         
         # 调整窗口大小以适应内容
         self.adjustSize()
@@ -819,7 +905,7 @@ class PreviewWindow(QMainWindow):
             y = max(screen_geometry.top(), min(y, screen_geometry.bottom() - window_height))
             
             self.move(x, y)
-            log.debug(f"窗口定位到: ({x}, {y}), 屏幕: {screen_number}")
+            log.debug("窗口定位到: (%d, %d), 屏幕: %d", x, y, screen_number)
             
         except Exception as e:
             log.error(f"窗口定位失败: {e}")
@@ -911,177 +997,204 @@ class PreviewWindow(QMainWindow):
 class ClipboardPreviewController(QObject):
     """控制剪贴板预览窗口的显示和隐藏"""
     
-    def __init__(self, get_clipboard_func):
+    def __init__(self, clipboard_state):
+        """
+        Args:
+            clipboard_state: 剪贴板状态通道，预览内容来自监视线程发布的快照
+        """
         super().__init__()
-        self.get_clipboard_content = get_clipboard_func
+        self.clipboard_state = clipboard_state
         self.signals = ClipboardSignals()
         self.preview_window = None
-        self.ctrl_pressed = False
-        self.ctrl_press_time = 0  # 记录Ctrl按下的时间
-        self.preview_timer = None
         self.clipboard_content = None
-        self.cached_content = None  # 缓存剪贴板内容
-        self.last_clipboard_check = 0  # 上次检查剪贴板的时间
+        self.cached_content = None  # 缓存剪贴板内容，内容变化时由状态通道更新
         self.preview_delay = 0.3  # 可配置的预览延迟时间（秒）
         self.is_preview_visible = False  # 跟踪预览窗口状态
+        self.idle_release = PREVIEW_IDLE_RELEASE  # 预览窗口闲置多久后释放（秒）
+        self.idle_timer = None
+        
+        # Ctrl 按键状态机，按住达到预览延迟后准备预览
+        self.ctrl_detector = CtrlHoldDetector(self.preview_delay, self.on_ctrl_hold, self.on_ctrl_release)
         
-        # 键盘事件状态跟踪
-        self.left_ctrl_pressed = False
-        self.right_ctrl_pressed = False
+        # 订阅剪贴板内容变化
+        self.unsubscribe_clipboard = clipboard_state.subscribe(self.on_clipboard_changed)
         
     def setup(self, app):
         """初始化控制器"""
         self.app = app
         
-        # 创建预览窗口（在主线程中）
-        self.preview_window = PreviewWindow()
+        # 预览窗口在第一次需要时（或预热时）才创建，闲置一段时间后释放
+        self.idle_timer = QTimer()
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.release_window)
         
         # 连接信号
         self.signals.update_preview.connect(self.update_preview_window)
         self.signals.show_preview.connect(self.show_preview_window)
         self.signals.hide_preview.connect(self.hide_preview_window)
         
-        # 启动键盘监听线程
+        # 在后台线程中注册键盘钩子，首次换算扫描码需要建立按键名称表，不阻塞启动
         self.keyboard_thread = threading.Thread(target=self.keyboard_monitor, daemon=True)
         self.keyboard_thread.start()
         
         log.debug("剪贴板预览控制器初始化完成")
     
     def keyboard_monitor(self):
-        """在单独的线程中监听键盘事件"""
+        """注册键盘钩子
+
+        左右 Ctrl 的扫描码去重后各注册一个钩子，每次按键只触发一次回调，
+        按下、按住和松开由 CtrlHoldDetector 的状态机处理。
+        """
         try:
-            # 监听左右Ctrl键
-            keyboard.on_press_key("left ctrl", self.on_left_ctrl_pressed)
-            keyboard.on_release_key("left ctrl", self.on_left_ctrl_released)
-            keyboard.on_press_key("right ctrl", self.on_right_ctrl_pressed)
-            keyboard.on_release_key("right ctrl", self.on_right_ctrl_released)
-            
-            # 备用：监听通用Ctrl键（以防上面的不工作）
-            keyboard.on_press_key("ctrl", self.on_ctrl_pressed_backup)
-            keyboard.on_release_key("ctrl", self.on_ctrl_released_backup)
-            
-            log.debug("键盘监听已启动")
-            
+            scan_codes = []
+            for name in CTRL_KEY_NAMES:
+                try:
+                    scan_codes.extend(code for code in keyboard.key_to_scan_codes(name) if code not in scan_codes)
+                except ValueError:
+                    continue
+            if not scan_codes:
+                raise ValueError("找不到 Ctrl 键的扫描码")
+            for scan_code in scan_codes:
+                keyboard.hook_key(scan_code, self.ctrl_detector.handle_event)
+            log.debug("键盘监听已启动，扫描码: %s", scan_codes)
         except Exception as e:
             log.error(f"键盘监听启动失败: {e}")
-            
-            # 降级处理：使用通用Ctrl键监听
-            try:
-                keyboard.on_press_key("ctrl", self.on_ctrl_pressed_backup)
-                keyboard.on_release_key("ctrl", self.on_ctrl_released_backup)
-                log.debug("使用备用键盘监听方案")
-            except Exception as e2:
-                log.error(f"备用键盘监听也失败: {e2}")
     
-    def on_left_ctrl_pressed(self, event):
-        """左Ctrl键被按下"""
-        self.left_ctrl_pressed = True
-        self.handle_ctrl_press()
+    @property
+    def ctrl_pressed(self):
+        """Ctrl 当前是否按下"""
+        return self.ctrl_detector.pressed
     
-    def on_left_ctrl_released(self, event):
-        """左Ctrl键被释放"""
-        self.left_ctrl_pressed = False
-        if not self.right_ctrl_pressed:
-            self.handle_ctrl_release()
+    @property
+    def ctrl_press_time(self):
+        """最近一次按下 Ctrl 的时刻（time.perf_counter）"""
+        return self.ctrl_detector.pressed_at
     
-    def on_right_ctrl_pressed(self, event):
-        """右Ctrl键被按下"""
-        self.right_ctrl_pressed = True
-        self.handle_ctrl_press()
+    def on_ctrl_hold(self):
+        """Ctrl 按住达到预览延迟（在调度线程中执行）"""
+        log.debug("Ctrl键已按住%s秒，准备预览", self.preview_delay)
+        self.prepare_preview()
     
-    def on_right_ctrl_released(self, event):
-        """右Ctrl键被释放"""
-        self.right_ctrl_pressed = False
-        if not self.left_ctrl_pressed:
-            self.handle_ctrl_release()
-    
-    def on_ctrl_pressed_backup(self, event):
-        """备用Ctrl按下处理"""
-        if not self.ctrl_pressed:
-            self.handle_ctrl_press()
+    def on_ctrl_release(self, held_for):
+        """按住后松开 Ctrl（在调度线程中执行）"""
+        if self.is_preview_visible:
+            self.signals.hide_preview.emit()
+        log.debug("Ctrl键释放，持续时间: %.2f秒", held_for)
     
-    def on_ctrl_released_backup(self, event):
-        """备用Ctrl释放处理"""
-        if not (self.left_ctrl_pressed or self.right_ctrl_pressed):
-            self.handle_ctrl_release()
-    
-    def handle_ctrl_press(self):
-        """处理Ctrl键按下事件"""
-        if not self.ctrl_pressed:
-            self.ctrl_pressed = True
-            self.ctrl_press_time = time.time()
-            
-            # 取消之前的计时器
-            if self.preview_timer:
-                self.preview_timer.cancel()
-            
-            # 启动新的计时器
-            self.preview_timer = threading.Timer(self.preview_delay, self.prepare_preview)
-            self.preview_timer.start()
-            
-            log.debug(f"Ctrl键按下，启动{self.preview_delay}秒延迟计时器")
-    
-    def handle_ctrl_release(self):
-        """处理Ctrl键释放事件"""
-        if self.ctrl_pressed:
-            self.ctrl_pressed = False
-            ctrl_hold_duration = time.time() - self.ctrl_press_time
-            
-            # 取消计时器
-            if self.preview_timer:
-                self.preview_timer.cancel()
-                self.preview_timer = None
-            
-            # 隐藏预览窗口
-            if self.is_preview_visible:
-                self.signals.hide_preview.emit()
-            
-            log.debug(f"Ctrl键释放，持续时间: {ctrl_hold_duration:.2f}秒")
+    def on_clipboard_changed(self, snapshot):
+        """剪贴板内容变化时更新缓存（在发布者线程中执行）"""
+        self.cached_content = snapshot
     
     def prepare_preview(self):
-        """获取剪贴板内容并准备预览"""
+        """获取剪贴板内容并准备预览（在调度线程中执行）
+
+        缓存只在剪贴板序列号变化时失效，内容未变化时不会读取剪贴板；
+        需要读取时交给阻塞线程池，读取完成后回到调度线程再显示，不阻塞调度线程上的其他任务。
+        """
         if not self.ctrl_pressed:
             return
             
         try:
-            current_time = time.time()
-            
-            # 检查是否需要重新获取剪贴板内容（缓存机制）
-            if (self.cached_content is None or 
-                current_time - self.last_clipboard_check > 1.0):  # 1秒缓存
-                
-                log.debug("获取新的剪贴板内容")
-                content = self.get_clipboard_content()
-                
-                if isinstance(content, dict) and "content" in content:
-                    self.cached_content = content
-                    self.last_clipboard_check = current_time
-                else:
-                    log.warning(f"意外的剪贴板内容格式: {type(content)}")
-                    return
+            if self.cached_content is None or self.clipboard_state.is_stale():
+                log.debug("剪贴板内容已变化，获取新的剪贴板内容")
+                future = scheduler.run_blocking(self.clipboard_state.get_fresh)
+                scheduler.call_when_done(future, self.on_fresh_content, self.ctrl_press_time)
             else:
                 log.debug("使用缓存的剪贴板内容")
-                content = self.cached_content
-            
-            # 只有在仍然按住Ctrl键时才显示预览
-            if self.ctrl_pressed and content:
-                self.signals.update_preview.emit(content)
-                self.signals.show_preview.emit()
+                self.show_content(self.cached_content)
                 
         except Exception as e:
             log.error(f"预览准备错误: {e}")
     
+    def on_fresh_content(self, future, press_time):
+        """剪贴板读取完成（在调度线程中执行）
+
+        Args:
+            future: 读取结果
+            press_time: 发起读取时那次按下 Ctrl 的时刻，读取期间松开或重新按下时不再显示
+        """
+        try:
+            content = future.result()
+        except Exception as e:
+            log.error(f"预览准备错误: {e}")
+            return
+        
+        if isinstance(content, ClipboardSnapshot):
+            self.cached_content = content
+        else:
+            log.warning("意外的剪贴板内容格式: %s", type(content))
+            return
+        
+        if self.ctrl_press_time == press_time:
+            self.show_content(content)
+    
+    def show_content(self, content):
+        """只有在仍然按住Ctrl键时才显示预览"""
+        if self.ctrl_pressed and content:
+            self.signals.update_preview.emit(content)
+            self.signals.show_preview.emit()
+    
+    def ensure_window(self):
+        """获取预览窗口，尚未创建或已被释放时创建（在主线程中执行）"""
+        if self.preview_window is None:
+            with startup_trace.phase("构建预览窗口"):
+                self.preview_window = PreviewWindow()
+            log.debug("预览窗口已创建")
+        return self.preview_window
+    
+    def schedule_warm_up(self, delay_seconds: float = PREVIEW_WARM_UP_DELAY):
+        """在主线程空闲时提前创建预览窗口，避免第一次预览时等待窗口和字体加载
+
+        Args:
+            delay_seconds: 延迟时间（秒），为 0 时不预热，第一次按住 Ctrl 时再创建
+        """
+        if delay_seconds > 0:
+            QTimer.singleShot(int(delay_seconds * 1000), self.warm_up)
+    
+    def warm_up(self):
+        """预热预览窗口，之后若一直未使用，按 idle_release 释放"""
+        if self.preview_window is None:
+            self.ensure_window()
+            self.restart_idle_timer()
+    
+    def set_idle_release(self, seconds: float):
+        """设置预览窗口闲置多久后释放（秒），为 0 时不释放"""
+        self.idle_release = max(0.0, seconds)
+        if not self.is_preview_visible and self.preview_window is not None:
+            self.restart_idle_timer()
+    
+    def restart_idle_timer(self):
+        """重新开始闲置计时（在主线程中执行）"""
+        if self.idle_timer is None:
+            return
+        self.idle_timer.stop()
+        if self.idle_release > 0:
+            self.idle_timer.start(int(self.idle_release * 1000))
+    
+    def release_window(self):
+        """释放闲置的预览窗口，回收窗口、样式和渲染缓存占用的内存"""
+        if self.preview_window is None or self.is_preview_visible or self.ctrl_pressed:
+            return
+        self.preview_window.close()
+        self.preview_window.deleteLater()
+        self.preview_window = None
+        log.debug("预览窗口闲置，已释放")
+    
     def update_preview_window(self, content):
         """更新预览窗口内容（在主线程中执行）"""
-        if self.preview_window:
-            self.preview_window.update_content(content)
+        if self.preview_window is not None or self.ctrl_pressed:
+            self.ensure_window().update_content(content)
             log.debug("预览窗口内容已更新")
     
     def show_preview_window(self):
         """显示预览窗口（在主线程中执行）"""
-        if self.preview_window and self.ctrl_pressed:
-            self.preview_window.show_with_fade()
+        if self.ctrl_pressed:
+            if self.idle_timer is not None:
+                self.idle_timer.stop()
+            self.ensure_window().show_with_fade()
             self.is_preview_visible = True
+            # 包含 preview_delay 的等待时间，超出部分为读取剪贴板与渲染的耗时
+            preview_latency_histogram.observe(time.perf_counter() - self.ctrl_press_time)
             log.debug("预览窗口已显示")
     
     def hide_preview_window(self):
@@ -1089,6 +1202,7 @@ class ClipboardPreviewController(QObject):
         if self.preview_window and self.is_preview_visible:
             self.preview_window.hide_with_fade()
             self.is_preview_visible = False
+            self.restart_idle_timer()
             log.debug("预览窗口已隐藏")
     
     def set_preview_delay(self, delay_seconds: float):
@@ -1098,10 +1212,10 @@ class ClipboardPreviewController(QObject):
             delay_seconds: 延迟时间（秒），范围：0.1-2.0
         """
         self.preview_delay = max(0.1, min(2.0, delay_seconds))
-        log.debug(f"预览延迟时间设置为: {self.preview_delay}秒")
+        self.ctrl_detector.set_hold_delay(self.preview_delay)
+        log.debug("预览延迟时间设置为: %s秒", self.preview_delay)
     
     def clear_cache(self):
         """清除缓存的剪贴板内容"""
         self.cached_content = None
-        self.last_clipboard_check = 0
         log.debug("剪贴板内容缓存已清除")
@@ -0,0 +1,137 @@
+import hashlib
+
+# 快照中保留的头部与尾部长度（字符数或字节数）
+SNAPSHOT_HEAD_SIZE = 4096
+SNAPSHOT_TAIL_SIZE = 1024
+# 计算摘要时每次编码的字符数，避免为大文本一次性生成完整的字节副本
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_digest(payload) -> str:
+    """计算剪贴板内容的摘要
+
+    文本按块编码后送入哈希，内存占用与内容大小无关。
+
+    Args:
+        payload: 文本、字节串或可转换为字符串的对象
+
+    Returns:
+        str: 十六进制摘要，payload 为空时返回空字符串
+    """
+    if payload is None or payload == "":
+        return ""
+
+    hasher = hashlib.blake2b(digest_size=16)
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        hasher.update(b"b")
+        hasher.update(payload)
+    elif isinstance(payload, str):
+        hasher.update(b"s")
+        for start in range(0, len(payload), DIGEST_CHUNK_SIZE):
+            hasher.update(payload[start:start + DIGEST_CHUNK_SIZE].encode('utf-8', 'surrogatepass'))
+    else:
+        hasher.update(b"r")
+        hasher.update(repr(payload).encode('utf-8', 'surrogatepass'))
+    return hasher.hexdigest()
+
+
+class ClipboardSnapshot:
+    """剪贴板内容的紧凑快照
+
+    只保留摘要、大小、格式列表、有限长度的头尾片段和分类结果，
+    完整内容在需要时通过 loader 重新读取，不会常驻内存。
+    """
+
+    __slots__ = (
+        "type", "content", "digest", "size", "formats",
+        "head", "tail", "netdisk_info", "file_list", "sequence", "_loader",
+    )
+
+    def __init__(self, content_type, content, digest="", size=0, formats=(),
+                 head="", tail="", netdisk_info=None, file_list=None, sequence=0, loader=None):
+        self.type = content_type
+        self.content = content
+        self.digest = digest
+        self.size = size
+        self.formats = tuple(formats)
+        self.head = head
+        self.tail = tail
+        self.netdisk_info = netdisk_info
+        self.file_list = file_list
+        self.sequence = sequence
+        self._loader = loader
+
+    @classmethod
+    def from_payload(cls, content_type, content, payload, formats=(), netdisk_info=None,
+                     file_list=None, sequence=0, loader=None):
+        """根据完整内容构建快照，只保留有限长度的片段
+
+        Args:
+            content_type: 内容类型
+            content: 用于显示的摘要
+            payload: 完整内容，仅在构建期间使用
+            formats: 剪贴板格式列表
+            netdisk_info: 网盘链接信息
+            file_list: 文件路径列表
+            sequence: 读取时的剪贴板序列号
+            loader: 接收摘要的函数，返回完整内容（来自大内容存储或当前剪贴板）
+
+        Returns:
+            ClipboardSnapshot: 快照对象
+        """
+        if isinstance(payload, (str, bytes)):
+            size = len(payload)
+            head = payload[:SNAPSHOT_HEAD_SIZE]
+            tail = payload[-SNAPSHOT_TAIL_SIZE:] if size > SNAPSHOT_HEAD_SIZE + SNAPSHOT_TAIL_SIZE else payload[SNAPSHOT_HEAD_SIZE:]
+        else:
+            size = 0
+            head = ""
+            tail = ""
+        return cls(
+            content_type, content,
+            digest=compute_digest(payload),
+            size=size,
+            formats=formats,
+            head=head,
+            tail=tail,
+            netdisk_info=netdisk_info,
+            file_list=file_list,
+            sequence=sequence,
+            loader=loader,
+        )
+
+    @property
+    def is_truncated(self) -> bool:
+        """头尾片段是否未能覆盖完整内容"""
+        return self.size > len(self.head) + len(self.tail)
+
+    def load_payload(self):
+        """获取完整内容
+
+        片段已覆盖全部内容时直接拼接返回；否则通过 loader 按摘要重新读取，
+        并校验摘要，内容已不可用时返回 None。
+
+        Returns:
+            完整内容，无法获取时返回 None
+        """
+        if not self.is_truncated:
+            return self.head + self.tail
+        if self._loader is None:
+            return None
+        payload = self._loader(self.digest)
+        if payload is None or compute_digest(payload) != self.digest:
+            return None
+        return payload
+
+    def __eq__(self, other):
+        if not isinstance(other, ClipboardSnapshot):
+            return NotImplemented
+        return (self.type == other.type
+                and self.digest == other.digest
+                and self.content == other.content)
+
+    def __hash__(self):
+        return hash((self.type, self.digest, self.content))
+
+    def __repr__(self):
+        return f"ClipboardSnapshot(type={self.type!r}, size={self.size}, digest={self.digest[:8]!r})"
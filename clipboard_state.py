@@ -0,0 +1,117 @@
+import threading
+
+import log
+
+
+class ClipboardState:
+    """当前剪贴板状态的发布/订阅通道
+
+    剪贴板监视线程把每次读取并分类好的快照发布到这里，
+    预览等组件订阅后直接复用，不再自行读取剪贴板。
+    缓存的失效由内容变化（剪贴板序列号和摘要）驱动，而不是时间。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = 0
+        self._subscribers = []
+        self._sequence_source = None
+        self._refresher = None
+
+    def configure(self, sequence_source=None, refresher=None):
+        """设置剪贴板序列号来源和刷新函数
+
+        Args:
+            sequence_source: 无参函数，返回剪贴板当前序列号（0 表示未知）
+            refresher: 无参函数，重新读取剪贴板并返回快照
+        """
+        self._sequence_source = sequence_source
+        self._refresher = refresher
+
+    @property
+    def version(self) -> int:
+        """已发布的不同内容的次数"""
+        return self._version
+
+    def current(self):
+        """获取最近一次发布的快照，尚未发布时返回 None"""
+        return self._snapshot
+
+    def publish(self, snapshot) -> bool:
+        """发布新的剪贴板快照
+
+        内容与当前快照相同时不会通知订阅者。
+
+        Args:
+            snapshot: ClipboardSnapshot
+
+        Returns:
+            bool: 内容是否发生了变化
+        """
+        with self._lock:
+            previous = self._snapshot
+            self._snapshot = snapshot
+            if previous is not None and previous == snapshot:
+                return False
+            self._version += 1
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                log.error(f"剪贴板状态订阅者处理出错: {e}")
+        return True
+
+    def subscribe(self, callback):
+        """订阅剪贴板内容变化
+
+        Args:
+            callback: 接收 ClipboardSnapshot 的函数，在发布者线程中调用
+
+        Returns:
+            取消订阅的无参函数
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def is_stale(self) -> bool:
+        """当前快照是否已落后于系统剪贴板
+
+        仅比较剪贴板序列号，不会打开剪贴板。
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return True
+        if self._sequence_source is None or not snapshot.sequence:
+            return False
+        return self._sequence_source() != snapshot.sequence
+
+    def get_fresh(self):
+        """获取与系统剪贴板一致的快照
+
+        快照仍然有效时直接返回；已过期时通过刷新函数读取一次并发布。
+
+        Returns:
+            ClipboardSnapshot，无法获取时返回 None
+        """
+        if not self.is_stale():
+            return self._snapshot
+        if self._refresher is None:
+            return self._snapshot
+        snapshot = self._refresher()
+        if snapshot is not None:
+            self.publish(snapshot)
+        return snapshot
+
+
+# 全局剪贴板状态通道
+clipboard_state = ClipboardState()
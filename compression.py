@@ -0,0 +1,238 @@
+import zlib
+from collections import Counter
+
+# 编码方式
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_ZLIB_DICT = 2
+
+# 小于该字节数的内容压缩后通常反而变大，直接保存
+MIN_COMPRESS_SIZE = 64
+# 不超过该字节数且有共享字典时使用字典压缩
+DICT_COMPRESS_MAX_SIZE = 4096
+# 超过该字节数时使用最快的压缩级别，避免后台线程长时间占用 CPU
+FAST_COMPRESS_SIZE = 16 * 1024 * 1024
+# 流式压缩每块的字节数
+STREAM_CHUNK_SIZE = 1024 * 1024
+# 流式压缩首块的压缩率高于该值时放弃压缩
+STREAM_GIVE_UP_RATIO = 0.9
+# 默认压缩级别，以及标记和重复结构较多、在不超过一块时值得更高级别的内容类型
+DEFAULT_LEVEL = 6
+FAST_LEVEL = 1
+TYPE_LEVELS = {"HTML": 9, "富文本": 9}
+
+# 共享字典的最大字节数（zlib 窗口大小）
+DICT_MAX_SIZE = 32 * 1024
+# 训练字典时统计的片段长度
+DICT_NGRAM_SIZE = 8
+# 训练字典至少需要的样本数
+DICT_MIN_SAMPLES = 256
+# 缓存的已载入字典的压缩器数量（按压缩级别和字典区分）
+PRIMED_COMPRESSOR_CACHE_SIZE = 8
+# 字典达到该字节数时复制已载入字典的压缩器，更小的字典重新载入比复制压缩状态更快
+PRIMED_DICT_MIN_SIZE = 4096
+
+# (压缩级别, 字典) -> 已载入字典的压缩器，只用于复制
+_primed_compressors = {}
+
+
+def choose_codec(size: int, content_type=None, has_dict: bool = False):
+    """根据内容大小和类型选择编码方式与压缩级别
+
+    Args:
+        size: 内容字节数
+        content_type: 内容类型，例如 "HTML"
+        has_dict: 是否有可用的共享字典
+
+    Returns:
+        tuple: (编码方式, 压缩级别)
+    """
+    if size < MIN_COMPRESS_SIZE:
+        return CODEC_RAW, 0
+    if size <= DICT_COMPRESS_MAX_SIZE and has_dict:
+        return CODEC_ZLIB_DICT, 9
+    if size >= FAST_COMPRESS_SIZE:
+        return CODEC_ZLIB, FAST_LEVEL
+    if size > STREAM_CHUNK_SIZE:
+        # 大内容提高级别几乎不改善压缩率，耗时却成倍增加
+        return CODEC_ZLIB, DEFAULT_LEVEL
+    return CODEC_ZLIB, TYPE_LEVELS.get(content_type, DEFAULT_LEVEL)
+
+
+def train_dictionary(samples, max_size: int = DICT_MAX_SIZE) -> bytes:
+    """根据样本训练共享字典
+
+    统计样本中出现次数最多的定长片段并拼接，出现越多的片段放得越靠后，
+    离压缩数据越近，zlib 引用它们所需的距离编码越短。
+
+    Args:
+        samples: 字节串样本
+        max_size: 字典的最大字节数
+
+    Returns:
+        bytes: 字典内容，样本不足时返回空字节串
+    """
+    counter = Counter()
+    sample_count = 0
+    for sample in samples:
+        sample_count += 1
+        # 同一样本中重复的片段只计一次，统计的是跨条目共享的内容
+        counter.update({sample[i:i + DICT_NGRAM_SIZE]
+                        for i in range(0, max(1, len(sample) - DICT_NGRAM_SIZE + 1))})
+    if sample_count < DICT_MIN_SAMPLES:
+        return b""
+
+    pieces = []
+    total = 0
+    for piece, count in counter.most_common():
+        if count < 2 or total + len(piece) > max_size:
+            break
+        pieces.append(piece)
+        total += len(piece)
+    pieces.reverse()
+    return b"".join(pieces)
+
+
+def compress(data: bytes, codec: int, level: int = DEFAULT_LEVEL, zdict: bytes = b"") -> bytes:
+    """按指定方式压缩
+
+    Args:
+        data: 原始字节串
+        codec: 编码方式
+        level: 压缩级别
+        zdict: 共享字典，仅 CODEC_ZLIB_DICT 使用
+
+    Returns:
+        bytes: 压缩后的数据
+    """
+    if codec == CODEC_RAW:
+        return data
+    if codec == CODEC_ZLIB_DICT and len(zdict) >= PRIMED_DICT_MIN_SIZE:
+        compressor = _dict_compressor(level, zdict)
+    elif codec == CODEC_ZLIB_DICT:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _dict_compressor(level: int, zdict: bytes):
+    """复制一个已载入字典的压缩器
+
+    载入 32 KB 的字典要把每个位置加入匹配链，比压缩几百字节的预览本身还慢，
+    因此每种级别和字典只载入一次，之后复制压缩状态，输出与重新载入完全相同。
+    """
+    key = (level, zdict)
+    primed = _primed_compressors.get(key)
+    if primed is None:
+        if len(_primed_compressors) >= PRIMED_COMPRESSOR_CACHE_SIZE:
+            _primed_compressors.clear()
+        primed = _primed_compressors[key] = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    return primed.copy()
+
+
+def decompress(data: bytes, codec: int, zdict: bytes = b"") -> bytes:
+    """解压 compress 的结果"""
+    if codec == CODEC_RAW:
+        return bytes(data)
+    if codec == CODEC_ZLIB_DICT:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=zdict)
+    else:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def encode_payload(payload, content_type=None, zdict: bytes = b""):
+    """压缩单个条目
+
+    压缩后没有变小时保存原始数据。
+
+    Args:
+        payload: 文本或字节串
+        content_type: 内容类型
+        zdict: 共享字典，为空时不使用字典压缩
+
+    Returns:
+        tuple: (编码方式, 数据)
+    """
+    data = payload.encode("utf-8", "surrogatepass") if isinstance(payload, str) else bytes(payload)
+    codec, level = choose_codec(len(data), content_type, bool(zdict))
+    if codec == CODEC_RAW:
+        return CODEC_RAW, data
+    compressed = compress(data, codec, level, zdict)
+    if len(compressed) >= len(data):
+        return CODEC_RAW, data
+    return codec, compressed
+
+
+def stream_compress(chunks, size: int, content_type=None):
+    """流式压缩大内容
+
+    首块压缩效果不明显（例如已经压缩过的数据）时放弃压缩，
+    第一个产出值为实际使用的编码方式，之后是数据块。
+
+    Args:
+        chunks: 原始字节串块的可迭代对象
+        size: 内容总字节数，用于选择压缩级别
+        content_type: 内容类型
+
+    Yields:
+        编码方式，随后是 bytes 数据块
+    """
+    chunks = iter(chunks)
+    first = next(chunks, b"")
+    codec, level = choose_codec(max(size, DICT_COMPRESS_MAX_SIZE + 1), content_type)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    head = compressor.compress(first) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    if len(head) > len(first) * STREAM_GIVE_UP_RATIO:
+        yield CODEC_RAW
+        yield first
+        yield from chunks
+        return
+
+    yield codec
+    yield head
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def stream_decompress(chunks, codec: int, max_length: int = 0):
+    """流式解压
+
+    Args:
+        chunks: 压缩数据块的可迭代对象
+        codec: 编码方式
+        max_length: 大于 0 时解压出该字节数后停止
+
+    Yields:
+        bytes: 解压后的数据块
+    """
+    if codec == CODEC_RAW:
+        produced = 0
+        for chunk in chunks:
+            if max_length and produced + len(chunk) >= max_length:
+                yield bytes(chunk[:max_length - produced])
+                return
+            produced += len(chunk)
+            yield bytes(chunk)
+        return
+
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    produced = 0
+    for chunk in chunks:
+        data = chunk
+        while data:
+            limit = max_length - produced if max_length else STREAM_CHUNK_SIZE * 4
+            out = decompressor.decompress(data, limit)
+            produced += len(out)
+            if out:
+                yield out
+            if max_length and produced >= max_length:
+                return
+            data = decompressor.unconsumed_tail
+    tail = decompressor.flush()
+    if tail:
+        yield tail[:max_length - produced] if max_length else tail
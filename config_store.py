@@ -0,0 +1,288 @@
+import json
+import os
+import threading
+import time
+
+import log
+
+# 默认配置文件路径，位于程序目录
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+# 修改后延迟写入的时间（秒），期间的多次修改合并为一次写入
+CONFIG_SAVE_DELAY = 0.5
+
+
+class ConfigField:
+    """配置项的类型、默认值与取值范围"""
+
+    __slots__ = ("type", "default", "minimum", "maximum")
+
+    def __init__(self, field_type, default, minimum=None, maximum=None):
+        self.type = field_type
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def validate(self, value):
+        """校验并规范化取值
+
+        Returns:
+            规范化后的值
+
+        Raises:
+            ValueError: 类型不符或超出范围
+        """
+        if self.type is bool:
+            if not isinstance(value, bool):
+                raise ValueError(f"应为布尔值，实际为 {value!r}")
+        elif self.type in (int, float):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"应为数字，实际为 {value!r}")
+            if self.type is int:
+                if value != int(value):
+                    raise ValueError(f"应为整数，实际为 {value!r}")
+                value = int(value)
+            else:
+                value = float(value)
+            if self.minimum is not None and value < self.minimum:
+                raise ValueError(f"不能小于 {self.minimum}，实际为 {value}")
+            if self.maximum is not None and value > self.maximum:
+                raise ValueError(f"不能大于 {self.maximum}，实际为 {value}")
+        elif not isinstance(value, self.type):
+            raise ValueError(f"类型应为 {self.type.__name__}，实际为 {value!r}")
+        return value
+
+
+# 配置项定义，默认值即首次运行时写入 config.json 的内容
+CONFIG_SCHEMA = {
+    "check_interval": ConfigField(float, 0.5, 0.05, 10.0),
+    "max_history_size": ConfigField(int, 10, 1, 1000000),
+    "show_notifications": ConfigField(bool, True),
+    "truncate_length": ConfigField(int, 100, 10, 10000),
+    "enable_netdisk_detection": ConfigField(bool, True),
+    "copy_pwd_to_clipboard": ConfigField(bool, True),
+    "preview_delay": ConfigField(float, 0.3, 0.1, 2.0),  # 预览延迟时间（秒）
+    "preview_animation_speed": ConfigField(int, 180, 0, 2000),  # 预览动画速度（毫秒）
+    "preview_warm_up_delay": ConfigField(float, 5.0, 0, 600),  # 托盘显示后预热预览窗口的延迟（秒），0 表示首次预览时再创建
+    "preview_idle_release": ConfigField(float, 600, 0, 86400),  # 预览窗口闲置多久后释放（秒），0 表示不释放
+    "enable_preview_cache": ConfigField(bool, True),  # 启用预览内容缓存
+    "multi_monitor_support": ConfigField(bool, True),  # 多显示器支持
+    "persist_history": ConfigField(bool, True),  # 持久化剪贴板历史
+    "history_retention_days": ConfigField(float, 30, 0),  # 历史记录保留天数，0 表示不按时间清理
+    "blob_size_threshold": ConfigField(int, 65536, 1024),  # 超过该大小的内容单独保存到大内容存储
+}
+
+
+class ConfigStore:
+    """带校验、变更订阅和延迟原子写入的配置存储
+
+    读取与 dict 相同（config["key"]、config.get("key")）；修改通过 set/update 进行，
+    修改后通知订阅者，并在 CONFIG_SAVE_DELAY 秒内没有新的修改时由后台线程写入文件。
+    写入先写临时文件再替换，进程在写入过程中退出也不会留下损坏的配置文件。
+    """
+
+    def __init__(self, path: str, schema=None, save_delay: float = CONFIG_SAVE_DELAY):
+        self.path = path
+        self.schema = schema if schema is not None else CONFIG_SCHEMA
+        self.save_delay = save_delay
+        self._values = {name: field.default for name, field in self.schema.items()}
+        self._extra = {}
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._dirty = False
+        self._deadline = 0.0
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __contains__(self, name):
+        return name in self._values
+
+    def get(self, name, default=None):
+        return self._values.get(name, default)
+
+    def snapshot(self) -> dict:
+        """当前配置的副本"""
+        with self._lock:
+            return dict(self._values)
+
+    def load(self) -> bool:
+        """从文件加载配置
+
+        无效的取值会被替换为默认值。文件内容与规范化后的配置一致时不会写回。
+
+        Returns:
+            bool: 文件是否需要更新（不存在、缺少配置项或含有无效值）
+        """
+        stored = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+                if not isinstance(stored, dict):
+                    raise ValueError("配置文件内容不是对象")
+            except (OSError, ValueError) as e:
+                log.error(f"读取配置文件时出错，使用默认配置: {e}")
+                stored = {}
+
+        values = {}
+        for name, field in self.schema.items():
+            if name not in stored:
+                values[name] = field.default
+                continue
+            try:
+                values[name] = field.validate(stored[name])
+            except ValueError as e:
+                log.warning(f"配置项 {name} 无效，使用默认值 {field.default!r}: {e}")
+                values[name] = field.default
+
+        with self._lock:
+            changes = {name: value for name, value in values.items() if self._values.get(name) != value}
+            self._values = values
+            # 保留不认识的配置项，避免新版本写入的配置被旧版本删除
+            self._extra = {name: value for name, value in stored.items() if name not in self.schema}
+            needs_write = stored != self._serializable()
+            if needs_write:
+                self._schedule_locked()
+
+        self._notify(changes)
+        return needs_write
+
+    def set(self, name, value):
+        """修改单个配置项
+
+        Raises:
+            KeyError: 未知的配置项
+            ValueError: 取值无效
+        """
+        self.update({name: value})
+
+    def update(self, values: dict):
+        """批量修改配置项，全部校验通过后才会生效
+
+        Raises:
+            KeyError: 未知的配置项
+            ValueError: 取值无效
+        """
+        validated = {}
+        for name, value in values.items():
+            field = self.schema.get(name)
+            if field is None:
+                raise KeyError(f"未知的配置项: {name}")
+            try:
+                validated[name] = field.validate(value)
+            except ValueError as e:
+                raise ValueError(f"配置项 {name} {e}") from None
+
+        with self._lock:
+            changes = {name: value for name, value in validated.items() if self._values[name] != value}
+            if not changes:
+                return
+            self._values.update(changes)
+            self._schedule_locked()
+
+        self._notify(changes)
+
+    def subscribe(self, callback, keys=None):
+        """订阅配置变化
+
+        Args:
+            callback: 接收 {配置项: 新值} 的函数，在修改配置的线程中调用
+            keys: 只关注的配置项，为 None 时关注全部
+
+        Returns:
+            取消订阅的无参函数
+        """
+        subscriber = (callback, frozenset(keys) if keys is not None else None)
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+        def unsubscribe():
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+
+        return unsubscribe
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """立即写入尚未保存的修改（例如退出前）
+
+        Returns:
+            bool: 是否已没有未保存的修改
+        """
+        with self._lock:
+            if not self._dirty:
+                return True
+            self._deadline = 0.0
+            self._wakeup.notify_all()
+            end = time.monotonic() + timeout
+            while self._dirty:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._wakeup.wait(remaining)
+            return True
+
+    def _serializable(self) -> dict:
+        """写入文件的内容（需持有锁）"""
+        data = dict(self._values)
+        data.update(self._extra)
+        return data
+
+    def _schedule_locked(self):
+        """标记需要写入并推迟写入时间（需持有锁）"""
+        self._dirty = True
+        self._deadline = time.monotonic() + self.save_delay
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="config-writer", daemon=True)
+            self._thread.start()
+        self._wakeup.notify_all()
+
+    def _notify(self, changes):
+        """在锁外通知订阅者"""
+        if not changes:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, keys in subscribers:
+            relevant = changes if keys is None else {k: v for k, v in changes.items() if k in keys}
+            if not relevant:
+                continue
+            try:
+                callback(relevant)
+            except Exception as e:
+                log.error(f"配置订阅者处理出错: {e}")
+
+    def _run(self):
+        """后台写入线程：等到最后一次修改后 save_delay 秒再写入"""
+        with self._lock:
+            while True:
+                while not self._dirty:
+                    self._wakeup.wait()
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                    continue
+                data = self._serializable()
+                self._dirty = False
+                self._lock.release()
+                try:
+                    self._write(data)
+                except Exception as e:
+                    log.error(f"保存配置文件时出错: {e}")
+                finally:
+                    self._lock.acquire()
+                self._wakeup.notify_all()
+
+    def _write(self, data):
+        """原子写入配置文件"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        log.debug('配置文件已保存')
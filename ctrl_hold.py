@@ -0,0 +1,118 @@
+import threading
+import time
+
+import log
+from metrics import metrics
+from scheduler import scheduler
+
+# 与 keyboard.KEY_DOWN / keyboard.KEY_UP 相同，本模块不依赖 keyboard，便于用构造的事件驱动
+KEY_DOWN = "down"
+KEY_UP = "up"
+
+# 需要监听的 Ctrl 键名称，注册钩子时换算成扫描码并去重
+CTRL_KEY_NAMES = ("left ctrl", "right ctrl", "ctrl")
+# 键盘钩子回调的耗时预算（秒），全局低级钩子响应慢会拖慢整个系统的输入
+HOOK_CALLBACK_BUDGET = 0.001
+
+# 状态：未按下 / 已按下（等待达到按住时长）/ 已按住（已触发 on_hold）
+IDLE = 0
+PRESSED = 1
+HOLDING = 2
+
+hook_latency_histogram = metrics.histogram("keyboard.hook_callback")
+hook_over_budget_counter = metrics.counter("keyboard.hook_over_budget")
+hook_repeat_counter = metrics.counter("keyboard.auto_repeat_ignored")
+
+
+class CtrlHoldDetector:
+    """检测 Ctrl 键被按住一段时间的状态机
+
+    键盘钩子回调 handle_event 只在锁内更新状态：不创建线程、不记日志，
+    只有真正按下和全部松开时向全局调度器提交或取消一个任务，
+    自动重复的按下事件直接返回，耗时记录到 keyboard.hook_callback 直方图。
+    按住时长的计时和 on_hold / on_release 回调都在调度线程中执行。
+
+    左右 Ctrl 分别记录，任一按下即视为按下，全部松开才视为松开。
+    """
+
+    def __init__(self, hold_delay: float, on_hold, on_release, scheduler=scheduler):
+        """
+        Args:
+            hold_delay: 按住多久后触发 on_hold（秒）
+            on_hold: on_hold()，按住达到 hold_delay 时在调度线程中调用
+            on_release: on_release(held_for)，触发过 on_hold 后松开时在调度线程中调用
+            scheduler: 执行计时与回调的调度器
+        """
+        self.hold_delay = hold_delay
+        self.on_hold = on_hold
+        self.on_release = on_release
+        self.scheduler = scheduler
+        self._state = IDLE
+        self._down = 0  # 按下的键：1 为左 Ctrl，2 为右 Ctrl
+        self._generation = 0  # 每次从未按下变为按下时加一
+        self._pressed_at = 0.0
+        self._hold_job = None
+        self._lock = threading.Lock()
+
+    @property
+    def pressed(self) -> bool:
+        """Ctrl 当前是否按下"""
+        return self._state != IDLE
+
+    @property
+    def pressed_at(self) -> float:
+        """最近一次按下的时刻（time.perf_counter）"""
+        return self._pressed_at
+
+    def set_hold_delay(self, seconds: float):
+        """设置按住时长，从下一次按下开始生效"""
+        self.hold_delay = seconds
+
+    def handle_event(self, event):
+        """键盘钩子回调
+
+        Args:
+            event: keyboard.KeyboardEvent，或任何带 event_type 和 name 属性的对象
+        """
+        started = time.perf_counter()
+        key = 2 if event.name and "right" in event.name else 1
+        with self._lock:
+            if event.event_type == KEY_DOWN:
+                if self._down & key:
+                    hook_repeat_counter.inc()
+                else:
+                    if not self._down:
+                        self._state = PRESSED
+                        self._generation += 1
+                        self._pressed_at = started
+                        self._hold_job = self.scheduler.schedule(self.hold_delay, self._hold_due, self._generation)
+                    self._down |= key
+            elif event.event_type == KEY_UP and self._down & key:
+                self._down &= ~key
+                if not self._down:
+                    if self._state == HOLDING:
+                        self.scheduler.call_soon(self._dispatch, self.on_release, started - self._pressed_at)
+                    elif self._hold_job is not None:
+                        self._hold_job.cancel()
+                    self._hold_job = None
+                    self._state = IDLE
+        elapsed = time.perf_counter() - started
+        hook_latency_histogram.observe(elapsed)
+        if elapsed > HOOK_CALLBACK_BUDGET:
+            hook_over_budget_counter.inc()
+
+    def _hold_due(self, generation):
+        """按住达到 hold_delay（在调度线程中执行）"""
+        with self._lock:
+            if self._state != PRESSED or self._generation != generation:
+                return
+            self._state = HOLDING
+            self._hold_job = None
+        self._dispatch(self.on_hold)
+
+    @staticmethod
+    def _dispatch(callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            log.error(f"Ctrl 按键回调出错: {e}")
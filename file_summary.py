@@ -0,0 +1,323 @@
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import log
+
+# 统计线程数量
+FILE_SUMMARY_WORKERS = 4
+# 单个路径的统计超时时间（秒），网络路径无响应时不会无限等待
+PATH_STAT_TIMEOUT = 2.0
+# 遍历单个文件夹的时间预算（秒），超出后返回已统计的部分结果
+DIRECTORY_SCAN_TIMEOUT = 5.0
+# 按路径缓存的统计结果数量
+FILE_SUMMARY_CACHE_SIZE = 1024
+# 文件夹统计结果的缓存有效期（秒），文件夹的修改时间不反映子文件夹中的文件变化
+DIRECTORY_CACHE_TTL = 30.0
+# 文件夹类型在分类统计中的名称
+DIRECTORY_TYPE = "文件夹"
+NO_EXTENSION_TYPE = "无扩展名"
+
+
+def format_size(size: int) -> str:
+    """格式化文件大小
+
+    Args:
+        size: 字节数
+
+    Returns:
+        str: 便于阅读的大小描述
+    """
+    if size < 1024:
+        return f"{size} 字节"
+    elif size < 1024 * 1024:
+        return f"{size/1024:.1f} KB"
+    elif size < 1024 * 1024 * 1024:
+        return f"{size/(1024*1024):.1f} MB"
+    else:
+        return f"{size/(1024*1024*1024):.2f} GB"
+
+
+class PathStats:
+    """单个路径的统计结果"""
+
+    __slots__ = ("path", "mtime_ns", "is_dir", "size", "file_count", "complete", "error", "scanned_at")
+
+    def __init__(self, path, mtime_ns=0, is_dir=False, size=0, file_count=0, complete=True, error=None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.is_dir = is_dir
+        self.size = size
+        self.file_count = file_count
+        self.complete = complete
+        self.error = error
+        self.scanned_at = time.monotonic()
+
+    @property
+    def type_name(self) -> str:
+        """用于分类统计的类型名称"""
+        if self.is_dir:
+            return DIRECTORY_TYPE
+        ext = os.path.splitext(self.path)[1].lower()
+        return ext or NO_EXTENSION_TYPE
+
+
+class FileListSummary:
+    """文件列表的汇总统计"""
+
+    __slots__ = ("count", "total_size", "file_count", "dir_count", "by_type", "timed_out", "failed", "complete")
+
+    def __init__(self, count):
+        self.count = count
+        self.total_size = 0
+        self.file_count = 0
+        self.dir_count = 0
+        self.by_type = {}
+        self.timed_out = []
+        self.failed = []
+        self.complete = True
+
+    def add(self, path_stats: PathStats):
+        """合并单个路径的统计结果"""
+        if path_stats.error is not None:
+            self.failed.append(path_stats.path)
+            return
+        self.total_size += path_stats.size
+        self.file_count += path_stats.file_count
+        if path_stats.is_dir:
+            self.dir_count += 1
+        entry = self.by_type.setdefault(path_stats.type_name, [0, 0])
+        entry[0] += 1
+        entry[1] += path_stats.size
+        if not path_stats.complete:
+            self.complete = False
+
+    def describe(self, max_types: int = 3) -> str:
+        """生成用于通知显示的描述
+
+        Args:
+            max_types: 最多列出的类型数量
+
+        Returns:
+            str: 例如 "合计 12.3 MB，共 40 个文件（.py 30 个，文件夹 2 个）"
+        """
+        size_text = format_size(self.total_size)
+        if not self.complete or self.timed_out:
+            size_text = "至少 " + size_text
+        text = f"合计 {size_text}，共 {self.file_count} 个文件"
+
+        if self.by_type:
+            types = sorted(self.by_type.items(), key=lambda item: item[1][1], reverse=True)
+            parts = [f"{name} {count} 个" for name, (count, _) in types[:max_types]]
+            if len(types) > max_types:
+                parts.append("...")
+            text += f"（{'，'.join(parts)}）"
+        if self.timed_out:
+            text += f"\n{len(self.timed_out)} 个路径响应超时"
+        if self.failed:
+            text += f"\n{len(self.failed)} 个路径无法访问"
+        return text
+
+
+class FileSummarizer:
+    """在线程池中统计复制的文件列表
+
+    使用 os.scandir 的目录项元数据统计文件夹大小，每个路径从开始统计起有各自的超时限制，
+    剪贴板监视线程不会被慢速或断开的网络路径阻塞。
+    结果按路径和修改时间缓存，文件夹的结果另有 DIRECTORY_CACHE_TTL 有效期。
+    """
+
+    def __init__(self,
+                 max_workers: int = FILE_SUMMARY_WORKERS,
+                 path_timeout: float = PATH_STAT_TIMEOUT,
+                 scan_timeout: float = DIRECTORY_SCAN_TIMEOUT,
+                 cache_size: int = FILE_SUMMARY_CACHE_SIZE):
+        self.path_timeout = path_timeout
+        self.scan_timeout = scan_timeout
+        self.cache_size = cache_size
+        self.directory_cache_ttl = DIRECTORY_CACHE_TTL
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._max_workers = max_workers
+        self._pool = None
+        self._coordinator = None
+        self._pool_lock = threading.Lock()
+
+    def _ensure_pools(self):
+        """按需创建线程池"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="file-summary")
+                # 汇总线程单独使用一个线程，避免与统计任务争用线程池造成死锁
+                self._coordinator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="file-summary-coordinator")
+
+    def summarize_async(self, paths, callback=None) -> Future:
+        """异步统计文件列表
+
+        Args:
+            paths: 文件或文件夹路径列表
+            callback: 统计完成后在汇总线程中调用，参数为 FileListSummary
+
+        Returns:
+            Future: 结果为 FileListSummary
+        """
+        self._ensure_pools()
+        future = self._coordinator.submit(self.summarize, list(paths))
+        if callback is not None:
+            def on_done(done_future):
+                try:
+                    callback(done_future.result())
+                except Exception as e:
+                    log.error(f"处理文件统计结果时出错: {e}")
+            future.add_done_callback(on_done)
+        return future
+
+    def summarize(self, paths) -> FileListSummary:
+        """统计文件列表（阻塞，供汇总线程调用）
+
+        Args:
+            paths: 文件或文件夹路径列表
+
+        Returns:
+            FileListSummary: 汇总结果，超时的路径记录在 timed_out 中
+        """
+        self._ensure_pools()
+        summary = FileListSummary(len(paths))
+        budget = self.path_timeout + self.scan_timeout
+        started = {}  # 路径序号 -> 开始统计的时刻
+        abandoned = threading.Event()
+
+        def run(index, path):
+            # 超时从开始统计时计算，在线程池中排队的时间不计入
+            if abandoned.is_set():
+                return PathStats(path, complete=False, error="超时")
+            started[index] = time.monotonic()
+            return self.stat_path(path, started[index] + budget)
+
+        futures = {self._pool.submit(run, index, path): (index, path) for index, path in enumerate(paths)}
+        pending = set(futures)
+        hung = []
+        while pending:
+            deadlines = [started[futures[future][0]] + budget for future in pending if futures[future][0] in started]
+            # 留出少量余量，让到期的统计先返回部分结果
+            timeout = max(0.0, min(deadlines) - time.monotonic()) + 0.1 if deadlines else 0.1
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                summary.add(future.result())
+
+            now = time.monotonic()
+            expired = {future for future in pending
+                       if futures[future][0] in started and now > started[futures[future][0]] + budget + 0.1}
+            for future in expired:
+                # 文件夹遍历会在到期时自行停止，仍未返回说明卡在无响应路径的系统调用中
+                summary.timed_out.append(futures[future][1])
+                hung.append(future)
+            pending -= expired
+            hung = [future for future in hung if not future.done()]
+            if pending and len(hung) >= self._max_workers:
+                # 统计线程全部被无响应的路径占用，排队的路径无法开始
+                for future in pending:
+                    future.cancel()
+                    summary.timed_out.append(futures[future][1])
+                pending = set()
+        abandoned.set()
+
+        if summary.timed_out:
+            log.debug(f"{len(summary.timed_out)} 个路径统计超时")
+        return summary
+
+    def stat_path(self, path, deadline=None) -> PathStats:
+        """统计单个路径，文件夹会递归统计大小
+
+        Args:
+            path: 文件或文件夹路径
+            deadline: time.monotonic() 时间点，超过后不再继续统计，默认从调用时起计算
+
+        Returns:
+            PathStats: 统计结果，出错时 error 不为 None
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.path_timeout + self.scan_timeout
+        if time.monotonic() > deadline:
+            return PathStats(path, complete=False, error="超时")
+
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            return PathStats(path, error=str(e))
+
+        cached = self._get_cached(path, st.st_mtime_ns)
+        if cached is not None:
+            return cached
+
+        if stat.S_ISDIR(st.st_mode):
+            result = self._scan_directory(path, st.st_mtime_ns, deadline)
+        else:
+            result = PathStats(path, mtime_ns=st.st_mtime_ns, size=st.st_size, file_count=1)
+
+        # 不完整的结果不缓存，下次复制时重新统计
+        if result.complete:
+            self._put_cached(result)
+        return result
+
+    def _scan_directory(self, path, mtime_ns, deadline) -> PathStats:
+        """使用 os.scandir 增量统计文件夹大小
+
+        以显式栈代替递归，每处理一个目录项都累加到结果中，
+        到达时间预算时直接返回已统计的部分并标记为不完整。
+        """
+        result = PathStats(path, mtime_ns=mtime_ns, is_dir=True)
+        stack = [path]
+        while stack:
+            if time.monotonic() > deadline:
+                result.complete = False
+                break
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                # Windows 上 scandir 已携带大小信息，不需要额外的系统调用
+                                result.size += entry.stat(follow_symlinks=False).st_size
+                                result.file_count += 1
+                        except OSError:
+                            continue
+            except OSError as e:
+                log.debug(f"无法遍历文件夹 {current}: {e}")
+                continue
+        return result
+
+    def _get_cached(self, path, mtime_ns):
+        """按路径和修改时间查找缓存，文件夹的结果超过有效期后失效"""
+        with self._cache_lock:
+            cached = self._cache.get(path)
+            if cached is None or cached.mtime_ns != mtime_ns:
+                return None
+            if cached.is_dir and time.monotonic() - cached.scanned_at > self.directory_cache_ttl:
+                del self._cache[path]
+                return None
+            self._cache.move_to_end(path)
+            return cached
+
+    def _put_cached(self, path_stats: PathStats):
+        """写入缓存，超过容量时淘汰最久未使用的条目"""
+        with self._cache_lock:
+            self._cache[path_stats.path] = path_stats
+            self._cache.move_to_end(path_stats.path)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        """清除统计缓存"""
+        with self._cache_lock:
+            self._cache.clear()
+
+
+# 全局文件统计器
+file_summarizer = FileSummarizer()
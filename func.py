@@ -1,20 +1,34 @@
 import sys, ctypes
 import time
 import pyperclip
-import win32clipboard
-import win32con
 from win11toast import toast, notify
 import pystray
 from PIL import Image, ImageDraw
-import json
 import os
-import re
 import webbrowser
 from PyQt5.QtWidgets import QMessageBox
-from urllib.parse import urlparse, urlunparse, parse_qs
-import winreg
 import subprocess
 from netdisk_rules import NETDISK_RULES
+import text_analysis
+from analysis_pool import analysis_pool
+from clipboard_io import clipboard_worker, ClipboardError, get_sequence_number
+from clipboard_state import clipboard_state
+from file_summary import file_summarizer
+from html_extract import extract_html_text
+from clipboard_history import ClipboardHistory
+from history_search import HistoryIndex
+from near_duplicate import NearDuplicateIndex
+from history_store import HistoryStore, get_history_db_path
+from config_store import ConfigStore, DEFAULT_CONFIG_FILE
+from netdisk_protocol import register_with_admin_check, terminate_process, handle_instance_message
+from single_instance import InstanceServer, get_instance_file
+from metrics import metrics, get_metrics_file
+from scheduler import scheduler
+from startup_trace import startup_trace
+from sampling_profiler import profiler, get_profile_base, DEFAULT_PROFILE_DURATION
+from blob_store import BlobStore, get_blob_dir
+import history_transfer
+from clipboard_snapshot import ClipboardSnapshot, SNAPSHOT_HEAD_SIZE
 import log
 from pystray._base import Icon
 from PyQt5.QtWidgets import QApplication
@@ -22,265 +36,213 @@ import threading
 import ctypes
 import win32api
 
-# 添加线程锁，确保剪贴板操作的线程安全
-clipboard_lock = threading.RLock()
-# 添加最大重试次数
-MAX_CLIPBOARD_RETRY = 3
-# 添加重试延迟时间（秒）
-CLIPBOARD_RETRY_DELAY = 0.1
-
-# 全局变量：跟踪每个线程的剪贴板打开状态
-clipboard_open_by_thread = {}
-
-# 自定义错误类，用于控制流程
-class ClipboardError(Exception):
-    """剪贴板操作错误"""
-    pass
-
-def clean_text_for_netdisk_detection(text):
-    """
-    清理文本，去除可能的干扰字符，为网盘链接检测做准备
-    """
-    # 1. 移除所有emoji字符
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # transport & map symbols
-        "\U0001F700-\U0001F77F"  # alchemical symbols
-        "\U0001F780-\U0001F7FF"  # Geometric Shapes
-        "\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
-        "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-        "\U0001FA00-\U0001FA6F"  # Chess Symbols
-        "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-        "\U00002702-\U000027B0"  # Dingbats
-        "\U000024C2-\U0001F251"
-        "]+", flags=re.UNICODE)
-    text = emoji_pattern.sub(r'', text)
-    
-    # 2. 尝试移除中文字符（因为链接中通常不含中文）
-    text = re.sub(r'[\u4e00-\u9fff]', '', text)
-    
-    # 3. 尝试移除一些常见的干扰符号（保留URL中可能出现的基本符号）
-    text = re.sub(r'[@#$%^&*()_+=<>{}\[\]|\\\'",]', '', text)
-    
-    return text
+# 等待剪贴板 I/O 工作线程返回结果的超时时间（秒）
+CLIPBOARD_IO_TIMEOUT = 5.0
+# 通知分组与标签，相同 tag/group 的通知会替换之前的通知
+NOTIFICATION_GROUP = "clipboard_enhance"
+FILE_NOTIFICATION_TAG = "file_copy"
+# 发送文本通知前等待相似检测结果的最长时间（秒）
+NEAR_DUPLICATE_WAIT = 0.05
 
 # 全局变量
 is_clearing_clipboard = False
 is_setting_clipboard = False  # 新增：标记是否正在设置剪贴板内容
+previous_content = None  # 监视到的上一次剪贴板内容
 MAX_HISTORY_SIZE = 10   # 历史记录最大条目数
-CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
-
-# 默认配置
-config = {
-    "check_interval": 0.5,
-    "max_history_size": 10,
-    "show_notifications": True,
-    "truncate_length": 100,
-    "enable_netdisk_detection": True,
-    "copy_pwd_to_clipboard": True,
-    "preview_delay": 0.3,  # 新增：预览延迟时间（秒）
-    "preview_animation_speed": 180,  # 新增：预览动画速度（毫秒）
-    "enable_preview_cache": True,  # 新增：启用预览内容缓存
-    "multi_monitor_support": True  # 新增：多显示器支持
-}
+CONFIG_FILE = DEFAULT_CONFIG_FILE
+
+# 配置存储，读取方式与 dict 相同，修改通过 config.set 进行并延迟写入文件
+config = ConfigStore(CONFIG_FILE)
+
+# 内存中的剪贴板历史，容量由 max_history_size 决定
+clipboard_history = ClipboardHistory(MAX_HISTORY_SIZE)
+# 历史记录的全文索引，随历史的增删同步更新（包括从数据库载入的条目）
+history_index = HistoryIndex()
+clipboard_history.subscribe(history_index.on_history_event)
+# 相似内容检测，在历史记录线程中计算签名
+near_duplicates = NearDuplicateIndex()
+clipboard_history.subscribe(near_duplicates.on_history_event)
+# 持久化历史存储，在 init_history_store 中创建
+history_store = None
+# 大内容存储，与历史存储一同创建
+blob_store = None
+# 接收协议处理进程转交的请求，在 main 中启动
+instance_server = None
+
+# 剪贴板处理各阶段的耗时（秒）
+clipboard_content_time = metrics.histogram("clipboard.get_content")
+detect_netdisk_time = metrics.histogram("detect.netdisk_link")
+detect_url_time = metrics.histogram("detect.url")
+detect_email_time = metrics.histogram("detect.email")
+notification_time = metrics.histogram("notification.dispatch")
 
 def load_config():
-    """加载配置文件"""
+    """加载配置文件，内容有缺失或无效值时才写回"""
     log.debug('加载配置文件...')
-    global config, MAX_HISTORY_SIZE
+    if config.load():
+        log.debug('配置文件需要更新，将在后台写入')
+    log.debug('加载完成')
+
+def apply_config_changes(changes):
+    """把配置变化应用到历史记录和存储"""
+    global MAX_HISTORY_SIZE
+    if "max_history_size" in changes:
+        MAX_HISTORY_SIZE = changes["max_history_size"]
+        clipboard_history.resize(MAX_HISTORY_SIZE)
+    if history_store is not None:
+        history_store.configure(
+            max_entries=changes.get("max_history_size"),
+            retention_days=changes.get("history_retention_days")
+        )
+    if blob_store is not None and "blob_size_threshold" in changes:
+        blob_store.threshold = changes["blob_size_threshold"]
+
+config.subscribe(apply_config_changes, keys=("max_history_size", "history_retention_days", "blob_size_threshold"))
+
+def init_history_store():
+    """创建持久化历史存储，载入最近的历史并同步之后的变化"""
+    global history_store, blob_store
+    if not config["persist_history"] or history_store is not None:
+        return
+    
     try:
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                loaded_config = json.load(f)
-                config.update(loaded_config)
-        MAX_HISTORY_SIZE = config["max_history_size"]
+        history_store = HistoryStore(
+            get_history_db_path(CONFIG_FILE),
+            max_entries=MAX_HISTORY_SIZE,
+            retention_days=config["history_retention_days"]
+        )
+        recent = history_store.load_recent(MAX_HISTORY_SIZE)
+        for entry in reversed(recent):
+            clipboard_history.add(entry)
+        log.debug(f'已载入 {len(recent)} 条历史记录')
     except Exception as e:
-        log.error(f"加载配置文件时出错: {e}")
-    else:
-        log.debug('加载完成')
-    
-    # 确保配置目录存在
-    os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
+        log.error(f"初始化历史数据库失败: {e}")
+        history_store = None
+        return
     
-    # 保存当前配置作为默认配置
-    save_config()
-
-def save_config():
-    """保存配置到文件"""
-    log.debug('准备保存配置文件...')
     try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
+        blob_store = BlobStore(get_blob_dir(CONFIG_FILE), threshold=config["blob_size_threshold"])
     except Exception as e:
-        log.error(f"保存配置文件时出错: {e}")
-
-def is_clipboard_open():
-    """检查当前线程是否已打开剪贴板
+        log.error(f"初始化大内容存储失败: {e}")
+        blob_store = None
     
-    Returns:
-        bool: 是否已打开剪贴板
-    """
-    thread_id = threading.get_ident()
-    return clipboard_open_by_thread.get(thread_id, False)
-
-def safe_open_clipboard(max_retries=MAX_CLIPBOARD_RETRY):
-    """安全地打开剪贴板，添加重试机制
+    def on_history_changed(event, entry):
+        if event in ("add", "touch"):
+            history_store.put(entry)
+        elif event == "evict":
+            history_store.delete(entry.digest)
+            if blob_store is not None:
+                blob_store.delete(entry.digest)
+    
+    # 载入完成后再订阅，避免把刚读出的条目重复写回
+    clipboard_history.subscribe(on_history_changed)
     
+    if blob_store is not None:
+        # 清理上次运行遗留的、已不被任何历史条目引用的大内容
+        blob_store.collect_garbage(get_referenced_digests)
+
+def get_referenced_digests():
+    """获取仍被历史记录引用的内容摘要"""
+    referenced = {entry.digest for entry in clipboard_history.entries()}
+    if history_store is not None:
+        history_store.flush()
+        referenced |= history_store.digests()
+    return referenced
+
+def search_history(query: str, content_type=None, limit: int = 20, collapse_variants: bool = True):
+    """搜索剪贴板历史
+
     Args:
-        max_retries: 最大重试次数
-        
+        query: 查询字符串，支持前缀匹配和 "type:网址" 形式的类型过滤
+        content_type: 类型过滤，例如 "网盘链接"
+        limit: 最多返回的条目数
+        collapse_variants: 相似内容只保留最新的一条
+
     Returns:
-        bool: 是否成功打开剪贴板
+        list: HistoryEntry 列表
     """
-    thread_id = threading.get_ident()
-    
-    # 检查当前线程是否已经打开剪贴板
-    if is_clipboard_open():
-        return True  # 剪贴板已经被当前线程打开
-    
-    for i in range(max_retries):
-        try:
-            win32clipboard.OpenClipboard()
-            clipboard_open_by_thread[thread_id] = True
-            return True
-        except Exception as e:
-            if i == max_retries - 1:  # 如果是最后一次尝试
-                log.debug(f"打开剪贴板失败: {e}")
-                return False
-            time.sleep(CLIPBOARD_RETRY_DELAY)  # 等待一段时间再重试
-    return False
+    if not collapse_variants:
+        return history_index.search(query, content_type=content_type, limit=limit)
+    # 折叠后不足 limit 条时扩大取回的数量，直到取满或已没有更多结果
+    fetch = limit * 2
+    while True:
+        results = history_index.search(query, content_type=content_type, limit=fetch)
+        collapsed = near_duplicates.collapse(results)
+        if len(collapsed) >= limit or len(results) < fetch:
+            return collapsed[:limit]
+        fetch *= 2
 
-def safe_close_clipboard():
-    """安全地关闭剪贴板，只在当前线程已打开剪贴板时进行关闭
-    
-    Returns:
-        bool: 是否成功关闭剪贴板
+def transfer_history(export_path: str = None, import_path: str = None):
+    """导出或导入历史记录（命令行处理入口点）
+
+    Args:
+        export_path: 导出文件路径
+        import_path: 导入文件路径
     """
-    thread_id = threading.get_ident()
-    
-    # 如果当前线程没有打开剪贴板，跳过关闭操作
-    if not clipboard_open_by_thread.get(thread_id, False):
-        return True
+    load_config()
+    store = HistoryStore(
+        get_history_db_path(CONFIG_FILE),
+        max_entries=MAX_HISTORY_SIZE,
+        retention_days=config["history_retention_days"]
+    )
+    blobs = BlobStore(get_blob_dir(CONFIG_FILE), threshold=config["blob_size_threshold"])
     
+    code = 0
     try:
-        win32clipboard.CloseClipboard()
-        clipboard_open_by_thread[thread_id] = False
-        return True
+        if export_path:
+            count = history_transfer.export_history(store, export_path, blob_store=blobs)
+            log.info(f"已导出 {count} 条历史记录到 {export_path}")
+        if import_path:
+            read, added = history_transfer.import_history(store, import_path, blob_store=blobs)
+            log.info(f"已读取 {read} 条记录，新增 {added} 条，其余为重复条目")
+            log.info(f"按 max_history_size={MAX_HISTORY_SIZE} 保留后现有 {store.count()} 条历史记录")
     except Exception as e:
-        # 这里使用debug级别，因为这通常不是致命错误
-        log.debug(f"关闭剪贴板失败: {e}")
-        # 即使关闭失败，也标记为已关闭，避免后续再次尝试关闭
-        clipboard_open_by_thread[thread_id] = False
-        return False
-
-def clipboard_operation(operation_func):
-    """剪贴板操作装饰器，确保安全打开和关闭剪贴板
-    
-    Args:
-        operation_func: 要执行的剪贴板操作函数
-        
-    Returns:
-        包装后的函数
-    """
-    def wrapper(*args, **kwargs):
-        try:
-            if not safe_open_clipboard():
-                raise ClipboardError("无法打开剪贴板")
-            
-            # 执行剪贴板操作
-            result = operation_func(*args, **kwargs)
-            
-            # 操作完成后关闭剪贴板
-            safe_close_clipboard()
-            
-            return result
-        except Exception as e:
-            # 确保出错时也关闭剪贴板
-            safe_close_clipboard()
-            raise e
+        log.error(f"历史记录导入导出失败: {e}")
+        code = 1
+    finally:
+        store.close()
     
-    return wrapper
+    exit_application(code=code)
+
+def save_config():
+    """立即写入尚未保存的配置修改"""
+    if not config.flush():
+        log.error("保存配置文件超时")
 
 def clear_clipboard(args=None):
     """清空剪贴板内容"""
     log.debug('准备清空剪贴板...')
     global is_clearing_clipboard, previous_content
     
-    with clipboard_lock:  # 使用锁确保线程安全
-        try:
-            is_clearing_clipboard = True
-            
-            # 使用pyperclip尝试清空剪贴板，它有内置的错误处理
-            try:
-                pyperclip.copy('')
-                # 更新之前的内容为空剪贴板状态
-                previous_content = get_clipboard_content()
-                return True
-            except:
-                # 如果pyperclip方法失败，尝试使用win32clipboard
-                try:
-                    if not safe_open_clipboard():
-                        log.error("无法打开剪贴板进行清空操作")
-                        return False
-                    
-                    win32clipboard.EmptyClipboard()
-                    safe_close_clipboard()
-                    
-                    # 更新之前的内容为空剪贴板状态
-                    previous_content = get_clipboard_content()
-                    return True
-                except Exception as e:
-                    log.error(f'使用win32clipboard清空剪贴板出错: {e}')
-                    safe_close_clipboard()
-                    return False
-                
-        except Exception as e:
-            log.error(f'清空剪贴板时出错: {e}')
-            return False
-        finally:
-            is_clearing_clipboard = False
+    try:
+        is_clearing_clipboard = True
+        clipboard_worker.clear().result(timeout=CLIPBOARD_IO_TIMEOUT)
+        # 更新之前的内容为空剪贴板状态
+        previous_content = refresh_clipboard_state()
+        return True
+    except Exception as e:
+        log.error(f'清空剪贴板时出错: {e}')
+        return False
+    finally:
+        is_clearing_clipboard = False
 
 def set_clipboard(text):
     """设置剪贴板内容"""
     log.debug('准备设置剪贴板内容...')
     global is_setting_clipboard
     
-    with clipboard_lock:  # 使用锁确保线程安全
-        try:
-            is_setting_clipboard = True
-            
-            # 使用pyperclip的方式，它已经包含异常处理
-            pyperclip.copy(text)
-            return True
-        except Exception as e:
-            log.error(f"设置剪贴板内容出错: {e}")
-            return False
-        finally:
-            is_setting_clipboard = False
+    try:
+        is_setting_clipboard = True
+        clipboard_worker.set_text(text).result(timeout=CLIPBOARD_IO_TIMEOUT)
+        return True
+    except Exception as e:
+        log.error(f"设置剪贴板内容出错: {e}")
+        return False
+    finally:
+        is_setting_clipboard = False
 
-# 添加更多剪贴板格式的常量定义
-CF_HTML = win32clipboard.RegisterClipboardFormat("HTML Format")
-CF_RTF = win32clipboard.RegisterClipboardFormat("Rich Text Format")
-CF_URL = win32clipboard.RegisterClipboardFormat("UniformResourceLocator")
-CF_OFFICE_DRAWING = win32clipboard.RegisterClipboardFormat("Object Descriptor")
 
 # 添加内容类型识别和操作函数
-def is_url(text):
-    """检查文本是否为URL"""
-    url_pattern = re.compile(
-        r'^(https?|ftp)://[^\s/$.?#].[^\s]*$|'
-        r'^www\.[^\s/$.?#].[^\s]*$|'
-        r'^[^\s/$.?#]+\.(com|net|org|edu|gov|mil|io|co|ai|app|dev|top|xyz)[^\s]*$'
-    )
-    return url_pattern.match(text) is not None
-
-def is_email(text):
-    """检查文本是否为邮箱地址"""
-    email_pattern = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
-    return email_pattern.match(text) is not None
-
 def open_url(url):
     """打开URL"""
     log.debug(f'准备打开URL: {url}')
@@ -314,90 +276,12 @@ def send_email(email):
 # 修改网盘链接识别相关函数
 def detect_netdisk_link(text):
     """
-    检测文本中的网盘链接及提取码
+    检测文本中的网盘链接及提取码（检测规则见 text_analysis.detect_netdisk_link）
     返回格式: {'type': '网盘类型', 'name': '网盘名称', 'url': '链接', 'pwd': '提取码'}
     """
     if not text or not config.get("enable_netdisk_detection", True):
         return None
-        
-    # 清理文本
-    text = text.replace('\u200b', '').strip()
-    original_text = text  # 保存原始文本用于提取码检测
-    
-    # 尝试在原始文本中检测
-    result = detect_netdisk_link_raw(text)
-    if result:
-        return result
-    
-    # 如果原始文本没有检测到，尝试清理干扰字符后再检测
-    cleaned_text = clean_text_for_netdisk_detection(text)
-    if cleaned_text != text:  # 确保清理后文本有变化
-        result = detect_netdisk_link_raw(cleaned_text)
-        if result:
-            # 从原始文本中提取提取码
-            for disk_type, rule in NETDISK_RULES.items():
-                if disk_type == result['type'] and rule['pwd_reg']:
-                    pwd_match = re.search(rule['pwd_reg'], original_text)
-                    if pwd_match:
-                        result['pwd'] = pwd_match.group(1)
-                        break
-            
-            # 如果没找到具体平台的提取码，尝试通用提取码正则
-            if not result.get('pwd'):
-                general_pwd_match = re.search(r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{3,6})', original_text)
-                if general_pwd_match:
-                    result['pwd'] = general_pwd_match.group(1)
-            return result
-    
-    return None
-
-def detect_netdisk_link_raw(text):
-    """原始网盘链接检测逻辑，从原detect_netdisk_link分离"""
-    # 检查每个网盘规则
-    for disk_type, rule in NETDISK_RULES.items():
-        # 首先匹配基本URL，不包括查询参数
-        url_match = re.search(rule['reg'], text)
-        if url_match:
-            # 获取基本URL
-            url_base = url_match.group(0)
-            if not url_base.startswith('http'):
-                url_base = 'https://' + url_base
-            
-            # 先检查URL中是否已包含提取码参数
-            pwd_from_url = None
-            url_pwd_match = re.search(r'[?&]pwd=([a-zA-Z0-9]{4,8})', text)
-            if url_pwd_match:
-                pwd_from_url = url_pwd_match.group(1)
-                
-            # 检查文本中是否有单独的提取码
-            pwd_from_text = None
-            pwd_match = re.search(rule['pwd_reg'], text)
-            if pwd_match:
-                pwd_from_text = pwd_match.group(1)
-            
-            # 如果没有找到提取码，尝试使用通用正则
-            if not pwd_from_text and not pwd_from_url:
-                general_pwd_match = re.search(r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{3,6})', text)
-                if general_pwd_match:
-                    pwd_from_text = general_pwd_match.group(1)
-            
-            # 优先使用URL中的提取码
-            pwd = pwd_from_url or pwd_from_text
-            
-            # 获取完整URL，保留原始查询参数
-            url = url_base
-            url_query_match = re.search(r'^(https?://[^?#]+)(\?.+)$', text)
-            if url_query_match and url_pwd_match:
-                url = url_query_match.group(0)
-            
-            return {
-                'type': disk_type,
-                'name': rule['name'],
-                'url': url,
-                'pwd': pwd,
-                'pwd_in_url': pwd_from_url is not None
-            }
-    return None
+    return text_analysis.detect_netdisk_link(text)
 
 def open_netdisk_with_pwd(url, disk_type, pwd):
     """构建带有提取码的网盘URL并打开"""
@@ -439,280 +323,217 @@ def open_netdisk_with_pwd_and_copy(netdisk_info):
         toast('打开网盘链接出错', str(e))
         print(f"打开网盘链接出错: {e}")
 
-def get_clipboard_format_name(format_id):
-    """安全获取剪贴板格式名称
-    
+def load_clipboard_payload(digest=None):
+    """获取快照的完整内容，供快照按需加载
+
+    内容已保存到大内容存储时直接读取，否则重新读取剪贴板。
+
     Args:
-        format_id: 格式ID
-        
+        digest: 内容摘要
+
     Returns:
-        str: 格式名称，如果出错则返回"未知格式"
+        完整内容，读取失败时返回 None
     """
+    if digest and blob_store is not None:
+        payload = blob_store.read(digest)
+        if payload is not None:
+            return payload
     try:
-        return win32clipboard.GetClipboardFormatName(format_id)
-    except:
-        return f"未知格式({format_id})"
+        snapshot = clipboard_worker.read_snapshot().result(timeout=CLIPBOARD_IO_TIMEOUT)
+    except Exception as e:
+        log.debug(f"按需读取剪贴板内容失败: {e}")
+        return None
+    return snapshot["data"]
+
+def classify_clipboard_snapshot(snapshot, truncate=True):
+    """根据剪贴板原始数据识别内容类型
+
+    Args:
+        snapshot: clipboard_io.read_raw_snapshot 返回的原始数据
+        truncate: 是否按 truncate_length 截断摘要，为False时摘要长度以快照片段长度为上限
 
-def get_clipboard_text():
-    """获取剪贴板中的文本内容
-    
     Returns:
-        str: 文本内容，如果不是文本则返回None
+        ClipboardSnapshot: 不持有完整内容的紧凑快照
     """
-    if not is_clipboard_open():
-        if not safe_open_clipboard():
-            return None
+    kind = snapshot["format"]
+    data = snapshot["data"]
+    formats = snapshot.get("formats", ())
+    limit = config["truncate_length"] if truncate else SNAPSHOT_HEAD_SIZE
+
+    def build(content_type, content, payload=None, **kwargs):
+        return ClipboardSnapshot.from_payload(
+            content_type, content, payload,
+            formats=formats, sequence=snapshot.get("sequence", 0),
+            loader=load_clipboard_payload, **kwargs
+        )
+
+    if kind == "text":
+        # 依次检查网盘链接、网址和邮箱；大文本交给分析进程，不占用本进程的 GIL
+        result = analysis_pool.run("classify_text", data, bool(data) and config.get("enable_netdisk_detection", True))
+        timings = result["timings"]
+        for name, histogram in (("netdisk_link", detect_netdisk_time), ("url", detect_url_time),
+                                ("email", detect_email_time)):
+            if name in timings:
+                histogram.observe(timings[name])
+        
+        content_type = result["type"]
+        if content_type == "网盘链接":
+            netdisk_info = result["netdisk_info"]
+            pwd_info = f" [提取码: {netdisk_info['pwd']}]" if netdisk_info['pwd'] else ""
+            return build(
+                "网盘链接",
+                f"{netdisk_info['name']}: {netdisk_info['url']}{pwd_info}",
+                data,
+                netdisk_info=netdisk_info
+            )
+        if content_type == "邮箱":
+            return build("邮箱", data, data)
+        return build(content_type, data if len(data) <= limit else data[:limit] + "...", data)
     
-    try:
-        if win32clipboard.IsClipboardFormatAvailable(win32con.CF_UNICODETEXT):
-            return win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
-        elif win32clipboard.IsClipboardFormatAvailable(win32con.CF_TEXT):
-            return win32clipboard.GetClipboardData(win32con.CF_TEXT).decode('utf-8')
-        else:
-            return None
-    except Exception as e:
-        log.debug(f"获取剪贴板文本出错: {e}")
-        return None
-    finally:
-        # 不关闭剪贴板，由调用者处理
-        pass
+    if kind == "html":
+        # 只解析复制的片段，摘要达到长度上限后立即停止
+        text, truncated = extract_html_text(data, limit)
+        return build("HTML", text + "..." if truncated else text, data)
+    
+    if kind == "rtf":
+        preview = "富文本内容"
+        if len(data) > 50:
+            preview += f" (大小: {len(data)} 字节)"
+        return build("富文本", preview, data)
+    
+    if kind == "url":
+        return build("网址", data, data)
+    
+    if kind == "image":
+        # 使用通用描述而不是尝试获取DIB数据
+        return build("图片", "已复制一张图片")
+    
+    if kind == "files":
+        # 这里不访问文件系统，大小等统计信息由 file_summarizer 在后台线程中计算
+        file_count = len(data)
+        if file_count == 1:
+            return build("文件", f"已复制文件: {os.path.basename(data[0])}", data, file_list=data)
+        return build("文件", f"已复制 {file_count} 个文件", data, file_list=data)
+    
+    if kind == "office":
+        return build("Office对象", "已复制Office绘图或对象")
+    
+    # 其他格式
+    if formats:
+        return build("特殊格式", f"已复制内容 (格式: {', '.join(formats[:3])}...)", list(formats))
+    return build("未知格式", "已复制内容 (未知格式)")
 
 def get_clipboard_content(truncate=True):
     """获取剪贴板内容及其类型
-    
+
+    读取通过剪贴板 I/O 工作线程完成，分类在调用方线程中进行，
+    剪贴板打开期间不做任何耗时处理。
+
     Args:
         truncate: 是否截断长文本，默认为True
+
+    Returns:
+        ClipboardSnapshot: 剪贴板内容快照
     """
-    with clipboard_lock:  # 使用锁确保线程安全
-        # 重置此线程的剪贴板状态
-        thread_id = threading.get_ident()
-        clipboard_open_by_thread[thread_id] = False
+    with clipboard_content_time.time():
+        try:
+            snapshot = clipboard_worker.read_snapshot().result(timeout=CLIPBOARD_IO_TIMEOUT)
+        except ClipboardError as e:
+            return ClipboardSnapshot("错误", str(e))
+        except Exception as e:
+            log.error(f"获取剪贴板内容异常: {e}")
+            return ClipboardSnapshot("错误", f"获取剪贴板内容异常: {e}")
         
-        for retry in range(MAX_CLIPBOARD_RETRY):
-            try:
-                # 尝试打开剪贴板
-                if not safe_open_clipboard():
-                    if retry < MAX_CLIPBOARD_RETRY - 1:
-                        time.sleep(CLIPBOARD_RETRY_DELAY)
-                        continue
-                    else:
-                        return {"type": "错误", "content": "无法访问剪贴板，可能被其他程序占用", "raw_content": ""}
-
-                # 检查是否有文本
-                if win32clipboard.IsClipboardFormatAvailable(win32con.CF_TEXT) \
-                or win32clipboard.IsClipboardFormatAvailable(win32con.CF_UNICODETEXT):
-                    try:
-                        data = get_clipboard_text()
-                        if data is None:
-                            raise Exception("无法获取文本数据")
-                            
-                        safe_close_clipboard()
-                        
-                        # 检查是否是网盘链接
-                        netdisk_info = detect_netdisk_link(data)
-                        if (netdisk_info):
-                            pwd_info = f" [提取码: {netdisk_info['pwd']}]" if netdisk_info['pwd'] else ""
-                            return {
-                                "type": "网盘链接", 
-                                "content": f"{netdisk_info['name']}: {netdisk_info['url']}{pwd_info}",
-                                "netdisk_info": netdisk_info,
-                                "raw_content": data  # 保存原始内容
-                            }
-                        
-                        # 检查文本是否是URL
-                        if is_url(data):
-                            return {
-                                "type": "网址", 
-                                "content": data if (not truncate or len(data) <= config["truncate_length"]) else data[:config["truncate_length"]]+ "...",
-                                "raw_content": data  # 保存原始内容
-                            }
-                        
-                        # 检查文本是否是邮箱
-                        if is_email(data):
-                            return {"type": "邮箱", "content": data, "raw_content": data}
-                            
-                        return {
-                            "type": "文本", 
-                            "content": data if (not truncate or len(data) <= config["truncate_length"]) else data[:config["truncate_length"]] + "...",
-                            "raw_content": data  # 保存原始内容
-                        }
-                    except Exception as e:
-                        safe_close_clipboard()
-                        if retry < MAX_CLIPBOARD_RETRY - 1:
-                            time.sleep(CLIPBOARD_RETRY_DELAY)
-                            continue
-                        log.error(f"获取文本内容出错: {e}")
-                        return {"type": "错误", "content": f"获取文本内容出错: {e}", "raw_content": str(e)}
-                
-                # 检查是否有HTML内容
-                elif win32clipboard.IsClipboardFormatAvailable(CF_HTML):
-                    try:
-                        data = win32clipboard.GetClipboardData(CF_HTML)
-                        safe_close_clipboard()
-                        # 提取HTML中的纯文本内容摘要
-                        import re
-                        text = re.sub('<[^<]+?>', '', data)
-                        text = ' '.join(text.split())
-                        summary = text[:config["truncate_length"]] + "..." if truncate and len(text) > config["truncate_length"] else text
-                        return {
-                            "type": "HTML", 
-                            "content": summary, 
-                            "raw_content": data  # 保存原始HTML
-                        }
-                    except Exception as e:
-                        safe_close_clipboard()
-                        if retry < MAX_CLIPBOARD_RETRY - 1:
-                            time.sleep(CLIPBOARD_RETRY_DELAY)
-                            continue
-                        return {"type": "HTML", "content": f"HTML内容 (无法显示: {e})", "raw_content": ""}
-                
-                # 检查是否有RTF格式
-                elif win32clipboard.IsClipboardFormatAvailable(CF_RTF):
-                    try:
-                        data = win32clipboard.GetClipboardData(CF_RTF)
-                        safe_close_clipboard()
-                        preview = "富文本内容"
-                        if len(data) > 50:
-                            preview += f" (大小: {len(data)} 字节)"
-                        return {"type": "富文本", "content": preview, "raw_content": data}
-                    except Exception as e:
-                        safe_close_clipboard()
-                        if retry < MAX_CLIPBOARD_RETRY - 1:
-                            time.sleep(CLIPBOARD_RETRY_DELAY)
-                            continue
-                        return {"type": "富文本", "content": f"富文本内容 (无法显示: {e})", "raw_content": ""}
-                
-                # 检查是否有URL
-                elif win32clipboard.IsClipboardFormatAvailable(CF_URL):
-                    try:
-                        url = win32clipboard.GetClipboardData(CF_URL)
-                        safe_close_clipboard()
-                        return {"type": "网址", "content": url, "raw_content": url}
-                    except Exception as e:
-                        safe_close_clipboard()
-                        if retry < MAX_CLIPBOARD_RETRY - 1:
-                            time.sleep(CLIPBOARD_RETRY_DELAY)
-                            continue
-                        return {"type": "网址", "content": f"网址内容 (无法显示: {e})", "raw_content": ""}
-                        
-                # 检查是否有图片
-                elif win32clipboard.IsClipboardFormatAvailable(win32con.CF_DIB) or win32clipboard.IsClipboardFormatAvailable(win32con.CF_BITMAP):
-                    # 尝试以非直接方式获取图片信息，避免剪贴板访问问题
-                    try:
-                        if win32clipboard.IsClipboardFormatAvailable(win32con.CF_DIB):
-                            try:
-                                clipboard_formats = []
-                                format_id = 0
-                                while True:
-                                    format_id = win32clipboard.EnumClipboardFormats(format_id)
-                                    if format_id == 0:
-                                        break
-                                    try:
-                                        name = get_clipboard_format_name(format_id)
-                                        clipboard_formats.append(f"{name}")
-                                    except:
-                                        pass
-                                
-                                safe_close_clipboard()
-                                # 使用通用描述而不是尝试获取DIB数据
-                                return {"type": "图片", "content": f"已复制一张图片", "raw_content": "image"}
-                            except Exception as e:
-                                log.debug(f"获取DIB格式图片信息失败: {e}")
-                                safe_close_clipboard()
-                                return {"type": "图片", "content": "已复制一张图片", "raw_content": ""}
-                        else:
-                            safe_close_clipboard()
-                            return {"type": "图片", "content": "已复制一张图片", "raw_content": ""}
-                    except Exception as e:
-                        safe_close_clipboard()
-                        log.debug(f"处理图片剪贴板内容时出错: {e}")
-                        return {"type": "图片", "content": "已复制一张图片", "raw_content": ""}
-                    
-                # 检查是否有文件列表
-                elif win32clipboard.IsClipboardFormatAvailable(win32con.CF_HDROP):
-                    try:
-                        file_list = win32clipboard.GetClipboardData(win32con.CF_HDROP)
-                        safe_close_clipboard()
-                        
-                        file_count = len(file_list)
-                        if file_count == 1:
-                            file_path = file_list[0]
-                            file_name = os.path.basename(file_path)
-                            try:
-                                file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                            except:
-                                file_size = 0
-                            
-                            # 格式化文件大小
-                            if file_size < 1024:
-                                size_str = f"{file_size} 字节"
-                            elif file_size < 1024 * 1024:
-                                size_str = f"{file_size/1024:.1f} KB"
-                            else:
-                                size_str = f"{file_size/(1024*1024):.1f} MB"
-                                
-                            return {"type": "文件", "content": f"已复制文件: {file_name} ({size_str})", "raw_content": file_path}
-                        else:
-                            return {"type": "文件", "content": f"已复制 {file_count} 个文件", "raw_content": file_list}
-                    except Exception as e:
-                        safe_close_clipboard()
-                        if retry < MAX_CLIPBOARD_RETRY - 1:
-                            time.sleep(CLIPBOARD_RETRY_DELAY)
-                            continue
-                        return {"type": "文件", "content": f"文件内容 (无法显示: {e})", "raw_content": ""}
-                
-                # 检查是否是Office绘图对象
-                elif win32clipboard.IsClipboardFormatAvailable(CF_OFFICE_DRAWING):
-                    safe_close_clipboard()
-                    return {"type": "Office对象", "content": "已复制Office绘图或对象", "raw_content": ""}
-                    
-                # 其他格式
-                else:
-                    try:
-                        clipboard_formats = []
-                        format_id = 0
-                        
-                        while True:
-                            try:
-                                format_id = win32clipboard.EnumClipboardFormats(format_id)
-                                if format_id == 0:
-                                    break
-                                    
-                                # 尝试获取格式名称
-                                name = get_clipboard_format_name(format_id)
-                                clipboard_formats.append(f"{name} ({format_id})")
-                            except:
-                                break
-                        
-                        safe_close_clipboard()
-                        
-                        if clipboard_formats:
-                            return {"type": "特殊格式", "content": f"已复制内容 (格式: {', '.join(clipboard_formats[:3])}...)", "raw_content": clipboard_formats}
-                        else:
-                            return {"type": "未知格式", "content": "已复制内容 (未知格式)", "raw_content": ""}
-                    except Exception as e:
-                        safe_close_clipboard()
-                        if retry < MAX_CLIPBOARD_RETRY - 1:
-                            time.sleep(CLIPBOARD_RETRY_DELAY)
-                            continue
-                        return {"type": "未知格式", "content": f"未知格式 (出错: {e})", "raw_content": ""}
-
-            except Exception as e:
-                # 确保剪贴板被关闭
-                try:
-                    safe_close_clipboard()
-                except:
-                    pass
-                
-                if retry < MAX_CLIPBOARD_RETRY - 1:
-                    time.sleep(CLIPBOARD_RETRY_DELAY)
-                    continue
-                else:
-                    log.error(f"获取剪贴板内容异常: {e}")
-                    return {"type": "错误", "content": f"获取剪贴板内容异常: {e}", "raw_content": str(e)}
-                    
-        # 所有重试都失败
-        return {"type": "错误", "content": "多次尝试获取剪贴板内容失败", "raw_content": ""}
+        try:
+            return classify_clipboard_snapshot(snapshot, truncate)
+        except Exception as e:
+            log.error(f"解析剪贴板内容出错: {e}")
+            return ClipboardSnapshot("错误", f"解析剪贴板内容出错: {e}")
+
+
+def refresh_clipboard_state():
+    """读取剪贴板并发布到全局剪贴板状态通道
+
+    Returns:
+        ClipboardSnapshot: 最新的剪贴板快照
+    """
+    snapshot = get_clipboard_content(truncate=False)
+    clipboard_state.publish(snapshot)
+    return snapshot
+
+def get_display_content(snapshot):
+    """获取用于通知显示的内容，文本类内容按 truncate_length 截断
+
+    Args:
+        snapshot: 剪贴板快照
+
+    Returns:
+        str: 显示内容
+    """
+    limit = config["truncate_length"]
+    content = snapshot.content
+    if snapshot.type in ("网址", "文本", "HTML") and len(content) > limit:
+        return content[:limit] + "..."
+    return content
+
+def notify_file_copy(snapshot):
+    """发送文件复制通知
+
+    先立即显示文件数量，文件统计在后台完成后，
+    使用相同的 tag/group 发送通知以替换原通知，补充大小与类型明细。
+
+    Args:
+        snapshot: 类型为"文件"的剪贴板快照
+    """
+    title = '复制成功 (文件)'
+    notify(
+        title,
+        snapshot.content + "\n正在统计文件信息...",
+        on_click=lambda args: clear_clipboard(),
+        tag=FILE_NOTIFICATION_TAG,
+        group=NOTIFICATION_GROUP
+    )
+    
+    def on_summary(summary):
+        # 统计期间剪贴板已变化时不再更新通知
+        current = clipboard_state.current()
+        if current is not None and current.digest != snapshot.digest:
+            return
+        notify(
+            title,
+            f"{snapshot.content}\n{summary.describe()}\n\n点击通知可清空剪贴板",
+            on_click=lambda args: clear_clipboard(),
+            tag=FILE_NOTIFICATION_TAG,
+            group=NOTIFICATION_GROUP
+        )
+    
+    file_summarizer.summarize_async(snapshot.file_list or [], on_summary)
+
+def notify_text_copy(snapshot, content_value):
+    """发送文本复制通知
+
+    相似检测在历史记录线程中完成，这里最多等待 NEAR_DUPLICATE_WAIT 秒取得结果。
+    同一组相似内容使用相同的 tag/group，新版本的通知替换仍在显示的旧通知。
+
+    Args:
+        snapshot: 剪贴板快照
+        content_value: 通知中显示的内容
+    """
+    body = content_value + "\n\n点击此通知可清空剪贴板"
+    kwargs = {}
+    variant = near_duplicates.wait_for(snapshot.digest, NEAR_DUPLICATE_WAIT)
+    if variant is not None:
+        group_id, count = variant
+        if count:
+            body = f"与历史中的 {count} 条内容相似\n" + body
+        kwargs = {"tag": group_id, "group": NOTIFICATION_GROUP}
+    
+    notify(
+        f'复制成功 ({snapshot.type})',
+        body,
+        on_click=lambda args: clear_clipboard(),
+        **kwargs
+    )
 
 # 创建系统托盘图标
 def create_image():
@@ -757,8 +578,7 @@ def setup_tray_icon():
 
 def toggle_netdisk_detection():
     """切换网盘链接检测功能的开关"""
-    config["enable_netdisk_detection"] = not config.get("enable_netdisk_detection", True)
-    save_config()
+    config.set("enable_netdisk_detection", not config["enable_netdisk_detection"])
     toast(
         "网盘链接检测",
         f"已{'启用' if config['enable_netdisk_detection'] else '禁用'}网盘链接检测功能"
@@ -766,8 +586,7 @@ def toggle_netdisk_detection():
 
 def toggle_copy_pwd():
     """切换打开网盘时是否复制提取码到剪贴板"""
-    config["copy_pwd_to_clipboard"] = not config.get("copy_pwd_to_clipboard", True)
-    save_config()
+    config.set("copy_pwd_to_clipboard", not config["copy_pwd_to_clipboard"])
     toast(
         "复制提取码功能",
         f"打开网盘时{'会' if config['copy_pwd_to_clipboard'] else '不会'}自动复制提取码到剪贴板"
@@ -795,287 +614,269 @@ def handle_netdisk_link(url, pwd=None):
         toast('打开网盘链接失败', str(e))
         return False
 
-def monitor_clipboard():
-    """监视剪贴板变化的主函数"""
-    global previous_content
-    
-    # 初始化剪贴板监视
-    previous_content = get_clipboard_content(truncate=True)
-    
-    # 持续监视剪贴板
-    toast(
-        "Clipboard Enhance 已启动",
-        "监听剪贴板中..."
-    )
-    try:
-        while True:
-            # 如果正在清空或设置剪贴板，跳过这次检查
-            if is_clearing_clipboard or is_setting_clipboard:
-                time.sleep(config["check_interval"])
-                continue
-                
-            current_content = get_clipboard_content(truncate=True)  # 通知显示使用截断内容
-            if current_content != previous_content:
-                previous_content = current_content
-                
-                # 如果启用了通知
-                if config["show_notifications"]:
-                    content_type = current_content["type"]
-                    content_value = current_content["content"]
-                    
-                    # 根据内容类型设置不同的通知和按钮
-                    if content_type == "网盘链接":
-                        netdisk_info = current_content.get("netdisk_info", {})
-                        pwd_text = f"提取码：{netdisk_info['pwd']}" if netdisk_info.get('pwd') else "未检测到提取码"
-                        
-                        # 构建带提取码的URL
-                        url = netdisk_info['url']
-                        pwd = netdisk_info.get('pwd')
-                        
-                        # 创建通知按钮
-                        buttons = []
-                        if pwd:
-                            # 添加访问网盘按钮 (使用netdisk://协议)
-                            buttons.append({
-                                'activationType': 'protocol', 
-                                'content': '访问网盘', 
-                                'arguments': generate_netdisk_uri(url, pwd)
-                            })
-                            
-                            # 添加仅复制提取码按钮
-                            buttons.append({
-                                'activationType': 'background', 
-                                'content': '复制提取码', 
-                                'arguments': 'copy_pwd'
-                            })
-                        else:
-                            # 没有提取码，只添加普通访问按钮
-                            buttons.append({
-                                'activationType': 'protocol', 
-                                'content': '访问网盘', 
-                                'arguments': url
-                            })
-                        
-                        # 创建通知
-                        notify(
-                            f'已复制{netdisk_info["name"]}链接',
-                            f"{netdisk_info['url']}\n{pwd_text}\n\n点击通知可清空剪贴板",
-                            on_click=lambda args: clear_clipboard(),
-                            buttons=buttons
-                        )
-                    
-                    elif content_type == "网址":
-                        notify(
-                            f'复制成功 (网址)',
-                            content_value + "\n\n点击通知可清空剪贴板",
-                            on_click=lambda args: clear_clipboard(),
-                            buttons=[
-                                {'activationType': 'protocol', 'content': '访问', 'arguments': content_value}
-                            ]
-                        )
-                    elif content_type == "邮箱":
-                        notify(
-                            f'复制成功 (邮箱)',
-                            content_value + "\n\n点击通知可清空剪贴板",
-                            on_click=lambda args: clear_clipboard(),
-                            buttons=[
-                                {'activationType': 'protocol', 'content': '发送邮件', 'arguments': f'mailto:{content_value}'}
-                            ]
-                        )
-                    else:
-                        # 对于其他类型，使用常规通知
-                        toast(
-                            f'复制成功 ({content_type})', 
-                            content_value + "\n\n点击此通知可清空剪贴板",
-                            on_click=lambda args: clear_clipboard()
-                        )
-            time.sleep(config["check_interval"])  # 使用配置的检查间隔
-    except KeyboardInterrupt:
-        print("程序已退出。")
-        
-    # 退出时清理临时文件
-    try:
-        temp_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp_netdisk.json")
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-    except:
-        pass
+def dispatch_clipboard_change(current_content):
+    """剪贴板内容变化后的处理（在调度线程中执行）
 
-def handle_notification_action(args, pwd=None):
-    """处理通知按钮点击"""
-    if args == 'copy_pwd' and pwd:
-        # 复制提取码到剪贴板
-        set_clipboard(pwd)
-        toast('提取码已复制到剪贴板', f'提取码: {pwd}')
-        return True
-    return False
+    按变化的顺序记录历史、写入大内容存储，通知交给阻塞线程池发送。
 
-# ==== 网盘协议处理功能（从netdisk.py集成） ====
-def handle_netdisk_protocol(
-    url: str = None,
-    pwd: str = None,
-    register: bool = False
-):
-    """处理netdisk://协议请求（命令行处理入口点）"""
-    
-    log.debug(f"处理协议请求: url={url}, pwd={pwd}, register={register}")
-    
-    # 处理注册协议请求
-    if register:
-        request_admin_and_register()
-        exit_application(code=1)
-        
-    # 没有URL参数，退出
-    if not url:
-        log.error("缺少必要的URL参数")
-        exit_application(code=1)
+    Args:
+        current_content: 新的剪贴板快照
+    """
+    # 记录到历史（由后台线程写入，不阻塞调度线程）
+    clipboard_history.record(current_content)
+    # 大内容由后台线程写入大内容存储，之后可脱离剪贴板预览
+    if blob_store is not None:
+        blob_store.put_snapshot(current_content)
     
-    # 去除可能存在的引号
-    url = url.strip('"')
+    # 如果启用了通知
+    if config["show_notifications"]:
+        scheduler.run_blocking(notify_clipboard_change, current_content)
+
+def notify_clipboard_change(current_content):
+    """按内容类型发送剪贴板变化通知（在阻塞线程池中执行）
+
+    Args:
+        current_content: 新的剪贴板快照
+    """
+    notify_started = time.perf_counter()
+    content_type = current_content.type
+    content_value = get_display_content(current_content)  # 通知显示使用截断内容
     
-    # 处理URL，移除netdisk://前缀并确保协议格式正确
-    if url.startswith("netdisk://"):
-        url = url[len("netdisk://"):]
+    # 根据内容类型设置不同的通知和按钮
+    if content_type == "网盘链接":
+        netdisk_info = current_content.netdisk_info or {}
+        pwd_text = f"提取码：{netdisk_info['pwd']}" if netdisk_info.get('pwd') else "未检测到提取码"
         
-    # 确保URL包含正确的协议格式
-    if not (url.startswith("http://") or url.startswith("https://")):
-        url = "https://" + url
-    
-    # 修复重复的查询参数问题
-    # 如果URL包含多个问号，只保留第一个问号
-    question_mark_pos = url.find('?')
-    if question_mark_pos > 0 and url.find('?', question_mark_pos + 1) > 0:
-        url = url[:question_mark_pos] + '?' + url[question_mark_pos + 1:].replace('?', '&')
-        log.debug(f"修复后的URL: {url}")
-    
-    # 从URL中提取提取码 (如果存在)
-    try:
-        parsed_url = urlparse(url)
-        query_params = parse_qs(parsed_url.query)
+        # 构建带提取码的URL
+        url = netdisk_info['url']
+        pwd = netdisk_info.get('pwd')
         
-        if 'pwd' in query_params and not pwd:
-            # 获取提取码，并确保不包含额外的pwd参数
-            extracted_pwd = query_params['pwd'][0]
-            
-            # 清理提取码中可能的额外pwd参数
-            if '?pwd=' in extracted_pwd or '&pwd=' in extracted_pwd:
-                extracted_pwd = extracted_pwd.split('?pwd=')[0].split('&pwd=')[0]
-                log.debug(f"清理后的提取码: {extracted_pwd}")
-            
-            pwd = extracted_pwd
-            log.debug(f"从URL中提取到提取码: {pwd}")
-            
-            # 从URL中移除pwd参数
-            clean_params = {k: v[0] for k, v in query_params.items() if k != 'pwd'}
-            clean_query = "&".join([f"{k}={v}" for k, v in clean_params.items()])
+        # 创建通知按钮
+        buttons = []
+        if pwd:
+            # 添加访问网盘按钮 (使用netdisk://协议)
+            buttons.append({
+                'activationType': 'protocol', 
+                'content': '访问网盘', 
+                'arguments': generate_netdisk_uri(url, pwd)
+            })
             
-            url_parts = list(parsed_url)
-            url_parts[4] = clean_query
-            url = urlunparse(url_parts)
+            # 添加仅复制提取码按钮
+            buttons.append({
+                'activationType': 'background', 
+                'content': '复制提取码', 
+                'arguments': 'copy_pwd'
+            })
+        else:
+            # 没有提取码，只添加普通访问按钮
+            buttons.append({
+                'activationType': 'protocol', 
+                'content': '访问网盘', 
+                'arguments': url
+            })
+        
+        # 创建通知
+        notify(
+            f'已复制{netdisk_info["name"]}链接',
+            f"{netdisk_info['url']}\n{pwd_text}\n\n点击通知可清空剪贴板",
+            on_click=lambda args: clear_clipboard(),
+            buttons=buttons
+        )
     
+    elif content_type == "网址":
+        notify(
+            f'复制成功 (网址)',
+            content_value + "\n\n点击通知可清空剪贴板",
+            on_click=lambda args: clear_clipboard(),
+            buttons=[
+                {'activationType': 'protocol', 'content': '访问', 'arguments': content_value}
+            ]
+        )
+    elif content_type == "文件":
+        notify_file_copy(current_content)
+    elif content_type == "邮箱":
+        notify(
+            f'复制成功 (邮箱)',
+            content_value + "\n\n点击通知可清空剪贴板",
+            on_click=lambda args: clear_clipboard(),
+            buttons=[
+                {'activationType': 'protocol', 'content': '发送邮件', 'arguments': f'mailto:{content_value}'}
+            ]
+        )
+    elif content_type in near_duplicates.content_types:
+        notify_text_copy(current_content, content_value)
+    else:
+        # 对于其他类型，使用常规通知
+        notify(
+            f'复制成功 ({content_type})', 
+            content_value + "\n\n点击此通知可清空剪贴板",
+            on_click=lambda args: clear_clipboard()
+        )
+    notification_time.observe(time.perf_counter() - notify_started)
+
+def start_clipboard_monitor():
+    """开始监视剪贴板
+
+    先在阻塞线程池中读取一次剪贴板作为基准，之后由调度线程按 check_interval
+    检查序列号，只有序列号变化时才读取内容，不占用单独的监视线程。
+    """
+    scheduler.call_when_done(scheduler.run_blocking(refresh_clipboard_state), on_first_clipboard_snapshot)
+
+def on_first_clipboard_snapshot(future):
+    """首次读取剪贴板完成（在调度线程中执行）"""
+    global previous_content
+    try:
+        previous_content = future.result()
     except Exception as e:
-        log.error(f"解析URL时出错: {e}")
-    
-    log.debug(f"最终URL: {url}, 提取码: {pwd}")
+        log.error(f"读取剪贴板失败: {e}")
+        previous_content = ClipboardSnapshot("错误", str(e))
+    startup_trace.mark("首个剪贴板快照")
     
-    # 打开网盘链接
-    webbrowser.open(url)
-    
-    # 如果有提取码，复制到剪贴板
-    if pwd:
-        pyperclip.copy(pwd)
-        toast('提取码已复制到剪贴板', f'如自动填充失败，可手动粘贴: {pwd}')
-    
-    # 使用exit_application确保程序能够正确退出
-    exit_application()
+    # 启动通知在阻塞线程池中发送，监视立即开始
+    scheduler.run_blocking(notify, "Clipboard Enhance 已启动", "监听剪贴板中...")
+    scheduler.schedule(config["check_interval"], poll_clipboard)
+
+def poll_clipboard():
+    """检查剪贴板是否变化（在调度线程中执行）
 
-# ==== 协议注册功能（从register_protocol.py集成） ====
-def register_netdisk_protocol():
-    """注册 netdisk:// 协议处理器"""
+    无论检查是否出错都会安排下一次检查；交给阻塞线程池读取时由读取完成的回调安排。
+    """
+    reading = False
     try:
-        # 使用当前可执行文件路径，而不是Python解释器
-        executable_path = sys.executable
-        
-        # 对于已打包的EXE文件，直接使用可执行文件作为处理程序
-        # 确保传递的参数格式正确
-        command = f'"{executable_path}" -url "%1"'
+        # 如果正在清空或设置剪贴板，跳过这次检查
+        if is_clearing_clipboard or is_setting_clipboard:
+            return
         
-        # 创建注册表项
-        with winreg.CreateKey(winreg.HKEY_CLASSES_ROOT, "netdisk") as key:
-            winreg.SetValue(key, "", winreg.REG_SZ, "URL:Netdisk Protocol")
-            winreg.SetValueEx(key, "URL Protocol", 0, winreg.REG_SZ, "")
-            
-            with winreg.CreateKey(key, "shell\\open\\command") as cmd_key:
-                winreg.SetValue(cmd_key, "", winreg.REG_SZ, command)
+        # 序列号未变化说明剪贴板内容没有变化，无需读取
+        sequence = get_sequence_number()
+        if sequence and sequence == previous_content.sequence:
+            return
         
-        toast("协议注册成功", "现在可以使用 netdisk:// 链接打开网盘")
-        return True
-    
+        # 预览等组件可能已经读取并发布了这次变化，直接复用
+        published = clipboard_state.current()
+        if sequence and published is not None and published.sequence == sequence:
+            process_clipboard_content(published)
+        else:
+            # 读取与分类在阻塞线程池中进行，完成后再回到调度线程，期间不安排下一次检查
+            future = scheduler.run_blocking(refresh_clipboard_state)
+            scheduler.call_when_done(future, on_clipboard_refreshed)
+            reading = True
     except Exception as e:
-        toast("协议注册失败", str(e))
-        log.error(f"注册协议处理器失败: {e}")
-        return False
+        log.error(f"检查剪贴板时出错: {e}")
+    finally:
+        if not reading:
+            scheduler.schedule(config["check_interval"], poll_clipboard)
 
-def request_admin_and_register():
-    """请求管理员权限并注册协议"""
-    # 检查是否已有管理员权限
+def on_clipboard_refreshed(future):
+    """读取剪贴板完成（在调度线程中执行）"""
     try:
-        is_admin = ctypes.windll.shell32.IsUserAnAdmin()
-    except:
-        is_admin = False
-        
-    if is_admin:
-        # 已经有管理员权限，直接注册
-        register_netdisk_protocol()
+        current_content = future.result()
+    except Exception as e:
+        log.error(f"读取剪贴板失败: {e}")
+        current_content = None
+    handle_clipboard_content(current_content)
+
+def handle_clipboard_content(current_content):
+    """处理读取到的内容，然后安排下一次检查（在调度线程中执行）"""
+    try:
+        process_clipboard_content(current_content)
+    except Exception as e:
+        log.error(f"处理剪贴板变化时出错: {e}")
+    finally:
+        scheduler.schedule(config["check_interval"], poll_clipboard)
+
+def process_clipboard_content(current_content):
+    """与上一次的内容比较，变化时处理"""
+    global previous_content
+    if current_content is not None and current_content != previous_content:
+        previous_content = current_content
+        dispatch_clipboard_change(current_content)
+
+def handle_notification_action(args, pwd=None):
+    """处理通知按钮点击"""
+    if args == 'copy_pwd' and pwd:
+        # 复制提取码到剪贴板
+        set_clipboard(pwd)
+        toast('提取码已复制到剪贴板', f'提取码: {pwd}')
+        return True
+    return False
+
+def request_admin_and_register():
+    """请求管理员权限并注册协议，注册后退出程序"""
+    if register_with_admin_check():
         exit_application()
-    else:
-        toast(
-        "请关闭本应用并以管理员身份启动",
-        "注册协议时遇到问题：权限不足，拒绝访问"
-    )
 
-def main():
-    """主程序入口"""
+def main(profile_duration: float = None):
+    """主程序入口
+
+    Args:
+        profile_duration: 启动时即开始性能采样的时长（秒），为 None 时不采样
+    """
     import pystray
     import threading
     import clipboard_preview
-    from PyQt5.QtCore import QTimer
-    import time
     
     try:
+        # 命令行要求时从启动开始采样，覆盖启动过程
+        if profile_duration:
+            start_profiler(profile_duration)
+        
         # 加载配置
-        load_config()
+        with startup_trace.phase("加载配置"):
+            load_config()
         log.debug('配置加载完成')
         
+        # 载入持久化的历史记录
+        with startup_trace.phase("载入历史"):
+            init_history_store()
+        
+        # 之后点击的 netdisk:// 链接由本进程处理，协议处理进程转交请求后立即退出
+        global instance_server
+        instance_server = InstanceServer(get_instance_file(CONFIG_FILE), handle_instance_message,
+                                         submit=scheduler.run_blocking)
+        if not instance_server.start():
+            instance_server = None
+        
+        # 剪贴板状态通道：通过序列号判断是否过期，过期时重新读取
+        clipboard_state.configure(
+            sequence_source=get_sequence_number,
+            refresher=refresh_clipboard_state
+        )
+        
         # 初始化QApplication
         log.debug('初始化QApplication...')
-        app = QApplication([]) if not QApplication.instance() else QApplication.instance()
+        with startup_trace.phase("Qt 初始化"):
+            app = QApplication([]) if not QApplication.instance() else QApplication.instance()
         
         # 设置应用程序属性
         app.setQuitOnLastWindowClosed(False)  # 防止关闭预览窗口时退出程序
         
-        # 启动剪贴板监视线程
-        log.debug('启动剪贴板监视线程...')
-        monitor_thread = threading.Thread(target=monitor_clipboard, daemon=True)
-        monitor_thread.start()
-        
-        # 等待一下让监视线程启动
-        time.sleep(0.1)
+        # 启动剪贴板监视（由调度线程定时检查）
+        log.debug('启动剪贴板监视...')
+        start_clipboard_monitor()
         
         # 初始化剪贴板预览控制器（在主线程中）
         log.debug('初始化剪贴板预览控制器...')
-        preview_controller = clipboard_preview.ClipboardPreviewController(
-            lambda: get_clipboard_content(truncate=False)
-        )
-        preview_controller.setup(app)
+        with startup_trace.phase("预览控制器"):
+            preview_controller = clipboard_preview.ClipboardPreviewController(clipboard_state)
+            preview_controller.setup(app)
         
-        # 应用配置到预览控制器
-        if config.get("preview_delay"):
-            preview_controller.set_preview_delay(config["preview_delay"])
+        # 应用配置到预览控制器，之后的修改（托盘菜单、命令行）通过订阅同步
+        preview_controller.set_preview_delay(config["preview_delay"])
+        preview_controller.set_idle_release(config["preview_idle_release"])
+        config.subscribe(
+            lambda changes: preview_controller.set_preview_delay(changes["preview_delay"]),
+            keys=("preview_delay",)
+        )
+        config.subscribe(
+            lambda changes: preview_controller.set_idle_release(changes["preview_idle_release"]),
+            keys=("preview_idle_release",)
+        )
         
         # 显示系统托盘图标
         log.debug('设置系统托盘...')
-        icon = setup_tray_icon()
+        with startup_trace.phase("托盘图标"):
+            icon = setup_tray_icon()
         
         # 修改托盘菜单，添加预览设置选项
         def create_menu():
@@ -1090,6 +891,12 @@ def main():
                     pystray.MenuItem('慢速预览 (0.5秒)', lambda: set_preview_delay(0.5, preview_controller)),
                     pystray.MenuItem('清除预览缓存', lambda: preview_controller.clear_cache())
                 )),
+                pystray.MenuItem('性能统计', pystray.Menu(
+                    pystray.MenuItem('查看统计', lambda: show_metrics()),
+                    pystray.MenuItem('导出到 metrics.json', lambda: dump_metrics()),
+                    pystray.MenuItem('性能采样 (30秒)', lambda: toggle_profiler(),
+                                     checked=lambda item: profiler.running)
+                )),
                 pystray.Menu.SEPARATOR,
                 pystray.MenuItem('注册网盘协议处理器', lambda: request_admin_and_register()),
                 pystray.MenuItem('退出', lambda: exit_application(icon=icon, app=app))
@@ -1097,18 +904,20 @@ def main():
         
         icon.menu = create_menu()
         
-        # 使用QTimer定期处理事件
-        qt_timer = QTimer()
-        qt_timer.timeout.connect(app.processEvents)
-        qt_timer.start(50)  # 提高响应频率
+        # 以非阻塞方式启动pystray，图标显示后记录启动完成
+        def on_tray_ready(icon):
+            icon.visible = True
+            startup_trace.mark("托盘就绪")
         
-        # 以非阻塞方式启动pystray
-        icon_thread = threading.Thread(target=icon.run, daemon=True)
+        icon_thread = threading.Thread(target=icon.run, kwargs={"setup": on_tray_ready}, daemon=True)
         icon_thread.start()
         
+        # 预览窗口不在启动时创建，托盘显示后由 Qt 事件循环在空闲时预热
+        preview_controller.schedule_warm_up(config["preview_warm_up_delay"])
+        
         log.debug('应用程序启动完成，进入主循环')
         
-        # 启动Qt事件循环（主循环）
+        # 启动Qt事件循环（主循环），其他线程发出的信号由事件循环在有事件时处理，不需要定时轮询
         sys.exit(app.exec_())
         
     except Exception as e:
@@ -1122,19 +931,50 @@ def main():
         except:
             pass
         
+        log.flush()
         sys.exit(1)
 
 def set_preview_delay(delay: float, preview_controller):
     """设置预览延迟时间并保存到配置"""
     try:
-        preview_controller.set_preview_delay(delay)
-        config["preview_delay"] = delay
-        save_config()
+        config.set("preview_delay", delay)
         toast('预览设置', f'预览延迟已设置为 {delay} 秒')
     except Exception as e:
         log.error(f'设置预览延迟失败: {e}')
         toast('设置失败', str(e))
 
+def show_metrics():
+    """以通知显示各阶段的耗时统计"""
+    lines = metrics.summary_lines()
+    toast('性能统计', "\n".join(lines) if lines else "暂无统计数据")
+
+def dump_metrics():
+    """把完整的统计数据导出到 config.json 所在目录"""
+    path = get_metrics_file(CONFIG_FILE)
+    try:
+        metrics.dump(path)
+        toast('性能统计', f'已导出到 {path}')
+    except Exception as e:
+        log.error(f'导出性能统计失败: {e}')
+        toast('导出失败', str(e))
+
+def start_profiler(duration: float):
+    """开始性能采样，结果写入 config.json 所在目录"""
+    def on_finished(paths):
+        if paths:
+            notify('性能采样完成', f'结果已写入 {os.path.dirname(paths[0])}')
+        else:
+            notify('性能采样失败', '请查看日志')
+    
+    return profiler.start(get_profile_base(CONFIG_FILE), duration, on_finished)
+
+def toggle_profiler():
+    """开始性能采样，正在采样时提前结束并写出结果"""
+    if profiler.running:
+        profiler.stop()
+    elif start_profiler(DEFAULT_PROFILE_DURATION):
+        toast('性能采样', f'开始采样 {DEFAULT_PROFILE_DURATION:g} 秒，再次点击可提前结束')
+
 def exit_application(code: int = 0, icon: Icon = None, app: QApplication = None):
     """完全退出程序，不显示终端窗口"""
     # 检查是否提供了icon和app参数
@@ -1150,16 +990,45 @@ def exit_application(code: int = 0, icon: Icon = None, app: QApplication = None)
         except:
             pass
     
-    # 使用Windows API直接终止进程，避免调用外部命令
+    if instance_server is not None:
+        try:
+            instance_server.close()
+        except:
+            pass
+    
+    # 取消尚未执行的定时任务（剪贴板检查、预览计时等），等待正在执行的任务结束
     try:
-        pid = os.getpid()
-        # 获取进程句柄
-        kernel32 = ctypes.windll.kernel32
-        handle = kernel32.OpenProcess(1, False, pid)
-        # 终止进程
-        kernel32.TerminateProcess(handle, code)
-        kernel32.CloseHandle(handle)
-    except Exception as e:
-        # 备用方案：使用os._exit
-        print(f"使用Windows API终止失败: {e}")
-        os._exit(code)
\ No newline at end of file
+        scheduler.shutdown(timeout=1.0)
+    except:
+        pass
+    try:
+        analysis_pool.shutdown(timeout=1.0)
+    except:
+        pass
+    
+    # 写入尚未保存的配置和历史记录
+    try:
+        save_config()
+    except:
+        pass
+    if history_store is not None:
+        try:
+            history_store.close(timeout=1.0)
+        except:
+            pass
+    if blob_store is not None:
+        try:
+            blob_store.close(timeout=1.0)
+        except:
+            pass
+    
+    # 清理临时文件
+    try:
+        temp_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp_netdisk.json")
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    except:
+        pass
+    
+    # 使用Windows API直接终止进程，避免调用外部命令
+    terminate_process(code)
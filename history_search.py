@@ -0,0 +1,252 @@
+import bisect
+import heapq
+import re
+import threading
+
+# 拉丁字母与数字按单词切分，中日韩文字按连续片段切分
+_TOKEN_PATTERN = re.compile(
+    r"[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+"
+)
+# 查询中的类型过滤语法，例如 "type:网址" 或 "类型:网盘链接"
+_TYPE_FILTER_PATTERN = re.compile(r"(?:type|类型)[:：](\S+)")
+# 前缀查询最多展开的词项数量
+MAX_PREFIX_EXPANSION = 256
+# 参与精确短语重排的候选倍数
+RERANK_FACTOR = 4
+# 候选条目数乘以该倍数超过总数时，改为按时间顺序扫描
+DENSE_SCAN_RATIO = 8
+
+
+def _is_cjk(token: str) -> bool:
+    return not ("a" <= token[0] <= "z" or "0" <= token[0] <= "9")
+
+
+def tokenize(text: str):
+    """把文本切分为索引词项
+
+    拉丁文字按单词切分并转为小写，中日韩文字按字符二元组切分，
+    单个汉字的片段保留为单字词项。
+
+    Args:
+        text: 待切分的文本
+
+    Returns:
+        set: 去重后的词项集合
+    """
+    terms = set()
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        if _is_cjk(token) and len(token) > 1:
+            terms.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.add(token)
+    return terms
+
+
+def parse_query(query: str):
+    """解析查询字符串
+
+    最后一个拉丁单词（查询不以空白结尾时）和单个汉字按前缀匹配，
+    其余词项精确匹配。
+
+    Args:
+        query: 查询字符串，可包含 "type:网址" 形式的类型过滤
+
+    Returns:
+        tuple: ([(词项, 是否前缀匹配)], 类型过滤或 None, 去掉过滤语法后的短语)
+    """
+    content_type = None
+    type_match = _TYPE_FILTER_PATTERN.search(query)
+    if type_match:
+        content_type = type_match.group(1)
+        query = query[:type_match.start()] + query[type_match.end():]
+
+    phrase = query.strip().lower()
+    matches = list(_TOKEN_PATTERN.finditer(phrase))
+    terms = []
+    for position, match in enumerate(matches):
+        token = match.group()
+        is_last = position == len(matches) - 1
+        if _is_cjk(token):
+            if len(token) == 1:
+                terms.append((token, True))
+            else:
+                terms.extend((token[i:i + 2], False) for i in range(len(token) - 1))
+        else:
+            terms.append((token, is_last and not query.endswith((" ", "\t"))))
+    return terms, content_type, phrase
+
+
+class HistoryIndex:
+    """剪贴板历史的增量倒排索引
+
+    条目加入、重新复制和淘汰时同步更新索引。文档编号随写入递增，
+    重新复制时分配新编号，因此编号越大越新；_docs 字典的插入顺序即为时间顺序，
+    按时间排序无需额外的排序键。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}
+        self._sorted_terms = []
+        self._type_docs = {}
+        self._docs = {}
+        self._doc_by_digest = {}
+        self._next_doc = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def on_history_event(self, event, entry):
+        """ClipboardHistory 的订阅回调"""
+        if event == "add":
+            self.add(entry)
+        elif event == "touch":
+            self.touch(entry)
+        elif event == "evict":
+            self.remove(entry.digest)
+
+    def add(self, entry):
+        """索引一个历史条目，已存在时更新"""
+        with self._lock:
+            if entry.digest in self._doc_by_digest:
+                self.remove(entry.digest)
+            doc_id = self._next_doc
+            self._next_doc += 1
+            terms = tokenize(entry.preview)
+            self._docs[doc_id] = (entry, terms)
+            self._doc_by_digest[entry.digest] = doc_id
+            self._type_docs.setdefault(entry.type, set()).add(doc_id)
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = set()
+                    bisect.insort(self._sorted_terms, term)
+                postings.add(doc_id)
+
+    def touch(self, entry):
+        """条目被重新复制，分配新的文档编号使其排到最前"""
+        with self._lock:
+            doc_id = self._doc_by_digest.get(entry.digest)
+            if doc_id is None:
+                self.add(entry)
+                return
+            _, terms = self._docs.pop(doc_id)
+            new_id = self._next_doc
+            self._next_doc += 1
+            self._docs[new_id] = (entry, terms)
+            self._doc_by_digest[entry.digest] = new_id
+            type_docs = self._type_docs[entry.type]
+            type_docs.discard(doc_id)
+            type_docs.add(new_id)
+            for term in terms:
+                postings = self._postings[term]
+                postings.discard(doc_id)
+                postings.add(new_id)
+
+    def remove(self, digest):
+        """从索引中删除条目"""
+        with self._lock:
+            doc_id = self._doc_by_digest.pop(digest, None)
+            if doc_id is None:
+                return
+            entry, terms = self._docs.pop(doc_id)
+            type_docs = self._type_docs.get(entry.type)
+            if type_docs is not None:
+                type_docs.discard(doc_id)
+                if not type_docs:
+                    del self._type_docs[entry.type]
+            for term in terms:
+                postings = self._postings[term]
+                postings.discard(doc_id)
+                if not postings:
+                    del self._postings[term]
+                    position = bisect.bisect_left(self._sorted_terms, term)
+                    del self._sorted_terms[position]
+
+    def _lookup(self, term, is_prefix):
+        """查找词项对应的倒排表列表，前缀查询返回所有匹配词项的倒排表"""
+        if not is_prefix:
+            postings = self._postings.get(term)
+            return [postings] if postings else []
+        start = bisect.bisect_left(self._sorted_terms, term)
+        groups = []
+        for candidate in self._sorted_terms[start:start + MAX_PREFIX_EXPANSION]:
+            if not candidate.startswith(term):
+                break
+            groups.append(self._postings[candidate])
+        return groups
+
+    def search(self, query: str, content_type=None, limit: int = 20):
+        """搜索历史条目
+
+        所有词项都需要命中；完整短语命中的条目排在前面，其余按时间从新到旧排序。
+
+        Args:
+            query: 查询字符串，支持 "type:网址" 形式的类型过滤
+            content_type: 类型过滤，例如 "网盘链接"、"网址"
+            limit: 最多返回的条目数
+
+        Returns:
+            list: HistoryEntry 列表
+        """
+        terms, query_type, phrase = parse_query(query)
+        content_type = content_type or query_type
+
+        with self._lock:
+            # 每个条件是一组倒排表，命中其中任意一个即满足该条件
+            conditions = []
+            for term, is_prefix in terms:
+                groups = self._lookup(term, is_prefix)
+                if not groups:
+                    return []
+                conditions.append(groups)
+            if content_type is not None:
+                type_docs = self._type_docs.get(content_type)
+                if not type_docs:
+                    return []
+                conditions.append([type_docs])
+
+            wanted = limit * RERANK_FACTOR
+            docs = self._docs
+            dense_size = len(docs) // DENSE_SCAN_RATIO
+
+            # 单个倒排表的条件直接求集合交集；前缀展开得到的多个倒排表较小时合并后参与求交，
+            # 较大时留作逐条检查的条件，避免合并大量大集合
+            candidates = None
+            pending = []
+            for groups in sorted(conditions, key=lambda groups: sum(map(len, groups))):
+                if len(groups) > 1:
+                    if sum(map(len, groups)) > dense_size:
+                        pending.append(groups)
+                        continue
+                    postings = set().union(*groups)
+                else:
+                    postings = groups[0]
+                candidates = postings if candidates is None else candidates & postings
+                if not candidates:
+                    return []
+
+            def matches_pending(doc_id):
+                return all(any(doc_id in postings for postings in groups) for groups in pending)
+
+            if candidates is None or len(candidates) > dense_size:
+                # 命中的条目很多时，按时间从新到旧扫描，取够数量即停止，避免对大集合排序
+                recent = []
+                for doc_id in reversed(docs):
+                    if (candidates is None or doc_id in candidates) and matches_pending(doc_id):
+                        recent.append(doc_id)
+                        if len(recent) >= wanted:
+                            break
+            else:
+                if pending:
+                    candidates = [doc_id for doc_id in candidates if matches_pending(doc_id)]
+                recent = heapq.nlargest(wanted, candidates)
+
+            # 在按时间取出的候选中，把完整短语命中的条目排到前面
+            ranked = sorted(
+                recent,
+                key=lambda doc_id: (bool(phrase) and phrase in docs[doc_id][0].preview.lower(), doc_id),
+                reverse=True
+            )
+            return [docs[doc_id][0] for doc_id in ranked[:limit]]
@@ -0,0 +1,396 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import log
+from clipboard_history import HistoryEntry
+from compression import CODEC_RAW, CODEC_ZLIB_DICT, DICT_MIN_SAMPLES, decompress, encode_payload, train_dictionary
+
+# 历史数据库文件名，与 config.json 位于同一目录
+HISTORY_DB_NAME = "history.db"
+# 单个事务最多写入的操作数
+HISTORY_BATCH_SIZE = 256
+# 收集一批写入操作的最长等待时间（秒）
+HISTORY_BATCH_WINDOW = 0.2
+# 训练预览共享字典时使用的最近条目数
+DICT_TRAINING_SAMPLES = 2000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    digest    TEXT PRIMARY KEY,
+    type      TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    size      INTEGER NOT NULL,
+    preview   TEXT NOT NULL,
+    codec     INTEGER NOT NULL DEFAULT 0,
+    dict_id   INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp);
+CREATE INDEX IF NOT EXISTS idx_history_type_timestamp ON history (type, timestamp);
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id   INTEGER PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+# 旧版本数据库缺少的列
+_MIGRATIONS = {
+    "codec": "ALTER TABLE history ADD COLUMN codec INTEGER NOT NULL DEFAULT 0",
+    "dict_id": "ALTER TABLE history ADD COLUMN dict_id INTEGER NOT NULL DEFAULT 0",
+}
+
+_UPSERT = """
+INSERT INTO history (digest, type, timestamp, size, preview, codec, dict_id) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(digest) DO UPDATE SET timestamp = excluded.timestamp
+"""
+
+# 导入时已存在的条目只保留较新的时间
+_IMPORT_UPSERT = """
+INSERT INTO history (digest, type, timestamp, size, preview, codec, dict_id) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(digest) DO UPDATE SET timestamp = max(timestamp, excluded.timestamp)
+"""
+
+_COLUMNS = "digest, type, timestamp, size, preview, codec, dict_id"
+
+
+def get_history_db_path(config_file: str) -> str:
+    """获取历史数据库路径
+
+    Args:
+        config_file: 配置文件路径
+
+    Returns:
+        str: 与配置文件同目录的数据库路径
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(config_file)), HISTORY_DB_NAME)
+
+
+class HistoryStore:
+    """SQLite 持久化剪贴板历史
+
+    数据库使用 WAL 模式，所有写入由后台线程按批次在单个事务中提交，
+    调用方只把操作放入队列，不会在剪贴板监视线程中产生磁盘 I/O。
+    每批写入后按数量和时间执行保留策略。预览片段在写入线程中压缩，
+    条目足够多后用最近的预览训练共享字典，小片段使用字典压缩。
+    """
+
+    def __init__(self, path: str, max_entries: int, retention_days: float = 0,
+                 batch_size: int = HISTORY_BATCH_SIZE, batch_window: float = HISTORY_BATCH_WINDOW):
+        """
+        Args:
+            path: 数据库文件路径
+            max_entries: 最多保留的条目数
+            retention_days: 最多保留的天数，0 表示不按时间清理
+            batch_size: 单个事务最多写入的操作数
+            batch_window: 收集一批写入的最长等待时间（秒）
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._local = threading.local()
+        self._dictionaries = {}
+        self._dict_id = 0
+        self._put_count = 0
+        self._next_training = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(history)")}
+            for column, statement in _MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(statement)
+            for dict_id, data in conn.execute("SELECT id, data FROM dictionaries"):
+                self._dictionaries[dict_id] = bytes(data)
+        if self._dictionaries:
+            self._dict_id = max(self._dictionaries)
+
+    def _connect(self) -> sqlite3.Connection:
+        """创建数据库连接并设置 WAL 模式"""
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """获取当前线程的只读连接，WAL 模式下读取不会阻塞后台写入"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def configure(self, max_entries=None, retention_days=None):
+        """更新保留策略，下一批写入时生效"""
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if retention_days is not None:
+            self.retention_days = retention_days
+
+    def put(self, entry: HistoryEntry):
+        """写入或更新条目（非阻塞）"""
+        self._submit(("put", (entry.digest, entry.type, entry.timestamp, entry.size, entry.preview)))
+
+    def put_many(self, entries):
+        """批量写入条目（非阻塞）"""
+        for entry in entries:
+            self.put(entry)
+
+    def delete(self, digest: str):
+        """删除条目（非阻塞）"""
+        self._submit(("delete", digest))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待此前提交的写入全部落盘
+
+        Returns:
+            bool: 是否在超时前完成
+        """
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """提交剩余写入并停止后台线程"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def load_recent(self, limit: int):
+        """按时间从新到旧加载条目
+
+        Args:
+            limit: 最多加载的条目数
+
+        Returns:
+            list: HistoryEntry 列表
+        """
+        rows = self._reader().execute(
+            f"SELECT {_COLUMNS} FROM history ORDER BY timestamp DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        return [self._entry_from_row(row) for row in rows]
+
+    def query(self, content_type=None, since=None, until=None, limit: int = 100):
+        """按类型与时间范围查询条目（使用索引）
+
+        Args:
+            content_type: 内容类型，例如 "网址"
+            since: 起始时间戳（含）
+            until: 结束时间戳（不含）
+            limit: 最多返回的条目数
+
+        Returns:
+            list: HistoryEntry 列表，从新到旧排序
+        """
+        conditions = []
+        params = []
+        if content_type is not None:
+            conditions.append("type = ?")
+            params.append(content_type)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
+        rows = self._reader().execute(
+            f"SELECT {_COLUMNS} FROM history {where} ORDER BY timestamp DESC LIMIT ?",
+            params
+        ).fetchall()
+        return [self._entry_from_row(row) for row in rows]
+
+    def iter_entries(self, batch_size: int = 1000):
+        """按时间从旧到新逐条产出全部条目，每次只从数据库取出一批
+
+        Args:
+            batch_size: 每次读取的行数
+
+        Yields:
+            HistoryEntry
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute(f"SELECT {_COLUMNS} FROM history ORDER BY timestamp")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._entry_from_row(row)
+        finally:
+            conn.close()
+
+    def import_entries(self, entries, batch_size: int = 1000) -> int:
+        """同步批量导入条目，按摘要去重
+
+        直接使用独立连接分批提交，不经过后台写入队列，
+        导入任意数量的条目时内存占用都只与批次大小有关。
+
+        Args:
+            entries: HistoryEntry 的可迭代对象
+            batch_size: 每个事务写入的条目数
+
+        Returns:
+            int: 新增的条目数
+        """
+        conn = self._connect()
+        try:
+            before = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+            batch = []
+            for entry in entries:
+                batch.append(self._encode((entry.digest, entry.type, entry.timestamp, entry.size, entry.preview)))
+                if len(batch) >= batch_size:
+                    with conn:
+                        conn.executemany(_IMPORT_UPSERT, batch)
+                    batch.clear()
+            with conn:
+                if batch:
+                    conn.executemany(_IMPORT_UPSERT, batch)
+                added = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0] - before
+                self._apply_retention(conn)
+            if not self._dict_id:
+                self._train_dictionary(conn)
+            return added
+        finally:
+            conn.close()
+
+    def _entry_from_row(self, row) -> HistoryEntry:
+        """把数据库行还原为条目，按需解压预览"""
+        digest, content_type, timestamp, size, preview, codec, dict_id = row
+        if codec != CODEC_RAW:
+            zdict = self._dictionaries.get(dict_id, b"")
+            preview = decompress(preview, codec, zdict).decode("utf-8", "surrogatepass")
+        return HistoryEntry(digest, content_type, timestamp, size, preview)
+
+    def _encode(self, params):
+        """压缩 put 操作中的预览，压缩无效时保留原始文本"""
+        digest, content_type, timestamp, size, preview = params
+        zdict = self._dictionaries.get(self._dict_id, b"")
+        codec, data = encode_payload(preview, content_type, zdict)
+        if codec == CODEC_RAW:
+            return digest, content_type, timestamp, size, preview, CODEC_RAW, 0
+        dict_id = self._dict_id if codec == CODEC_ZLIB_DICT else 0
+        return digest, content_type, timestamp, size, data, codec, dict_id
+
+    def digests(self) -> set:
+        """所有条目的摘要集合"""
+        return {row[0] for row in self._reader().execute("SELECT digest FROM history")}
+
+    def count(self) -> int:
+        """条目总数"""
+        return self._reader().execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def _submit(self, op):
+        """把写入操作放入队列，按需启动后台线程"""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                    self._thread.start()
+        self._queue.put(op)
+
+    def _run(self):
+        """后台写入线程：收集一批操作后在单个事务中提交"""
+        conn = self._connect()
+        try:
+            while True:
+                op = self._queue.get()
+                if op is None:
+                    break
+                batch = [op]
+                deadline = time.monotonic() + self.batch_window
+                stop = False
+                while op[0] != "flush" and len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        op = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if op is None:
+                        stop = True
+                        break
+                    batch.append(op)
+                self._write_batch(conn, batch)
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn, batch):
+        """在单个事务中执行一批操作并应用保留策略"""
+        # 按提交顺序把连续的同类操作合并执行，保证先删除后重新写入等情况的结果正确
+        runs = []
+        for op in batch:
+            kind = op[0]
+            if kind == "flush":
+                continue
+            params = self._encode(op[1]) if kind == "put" else (op[1],)
+            if runs and runs[-1][0] == kind:
+                runs[-1][1].append(params)
+            else:
+                runs.append((kind, [params]))
+        try:
+            with conn:
+                for kind, params in runs:
+                    if kind == "put":
+                        conn.executemany(_UPSERT, params)
+                        self._put_count += len(params)
+                    else:
+                        conn.executemany("DELETE FROM history WHERE digest = ?", params)
+                if any(kind == "put" for kind, _ in runs):
+                    self._apply_retention(conn)
+            if not self._dict_id and self._put_count >= self._next_training:
+                self._train_dictionary(conn)
+        except sqlite3.Error as e:
+            log.error(f"写入剪贴板历史数据库失败: {e}")
+        finally:
+            for op in batch:
+                if op[0] == "flush":
+                    op[1].set()
+
+    def _train_dictionary(self, conn):
+        """用最近的预览训练共享字典，样本不足时等写入更多条目后再试"""
+        self._next_training = self._put_count + DICT_MIN_SAMPLES
+        rows = conn.execute(
+            f"SELECT {_COLUMNS} FROM history ORDER BY timestamp DESC LIMIT ?", (DICT_TRAINING_SAMPLES,)
+        ).fetchall()
+        samples = (self._entry_from_row(row).preview.encode("utf-8", "surrogatepass") for row in rows)
+        zdict = train_dictionary(samples)
+        if not zdict:
+            return
+        with conn:
+            dict_id = conn.execute("INSERT INTO dictionaries (data) VALUES (?)", (zdict,)).lastrowid
+        self._dictionaries[dict_id] = zdict
+        self._dict_id = dict_id
+        log.debug(f"已训练预览压缩字典（{len(zdict)} 字节，{len(rows)} 个样本）")
+
+    def _apply_retention(self, conn):
+        """按时间与数量清理旧条目，两条语句都只需沿时间索引扫描"""
+        if self.retention_days and self.retention_days > 0:
+            conn.execute("DELETE FROM history WHERE timestamp < ?",
+                         (time.time() - self.retention_days * 86400,))
+        if self.max_entries and self.max_entries > 0:
+            conn.execute(
+                "DELETE FROM history WHERE timestamp < "
+                "(SELECT timestamp FROM history ORDER BY timestamp DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries - 1,)
+            )
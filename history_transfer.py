@@ -0,0 +1,215 @@
+import bz2
+import gzip
+import json
+import lzma
+import os
+import time
+
+import log
+from clipboard_history import HistoryEntry
+
+# 导出文件的格式版本
+EXPORT_FORMAT_VERSION = 1
+# 每处理多少条报告一次进度
+PROGRESS_INTERVAL = 10000
+# 导入时每个事务写入的条目数
+IMPORT_BATCH_SIZE = 1000
+
+# 按扩展名选择压缩方式
+_OPENERS = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+# 大内容目录的后缀，与导出文件位于同一目录
+BLOB_DIR_SUFFIX = ".blobs"
+# 复用同一个编码器，避免每条记录都重新构造
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def open_jsonl(path: str, mode: str):
+    """按扩展名打开 JSONL 文件，.gz/.xz/.bz2 自动压缩或解压
+
+    Args:
+        path: 文件路径
+        mode: "r" 或 "w"
+
+    Returns:
+        文本文件对象
+    """
+    opener = _OPENERS.get(os.path.splitext(path)[1].lower(), open)
+    return opener(path, mode + "t", encoding="utf-8", newline="\n")
+
+
+def get_blob_export_dir(path: str) -> str:
+    """导出文件对应的大内容目录，例如 history.jsonl.gz -> history.blobs"""
+    base = path
+    if os.path.splitext(base)[1].lower() in _OPENERS:
+        base = os.path.splitext(base)[0]
+    if os.path.splitext(base)[1].lower() == ".jsonl":
+        base = os.path.splitext(base)[0]
+    return base + BLOB_DIR_SUFFIX
+
+
+def with_progress(items, label: str, progress=None, interval: int = PROGRESS_INTERVAL):
+    """在管道中透传条目，每 interval 条报告一次进度
+
+    Args:
+        items: 可迭代对象
+        label: 进度描述，例如 "导出"
+        progress: progress(label, count, elapsed)，为 None 时写入日志
+
+    Yields:
+        原样产出 items 中的条目
+    """
+    start = time.perf_counter()
+    count = 0
+    for item in items:
+        yield item
+        count += 1
+        if count % interval == 0:
+            _report(progress, label, count, time.perf_counter() - start)
+    _report(progress, label, count, time.perf_counter() - start)
+
+
+def _report(progress, label, count, elapsed):
+    if progress is not None:
+        progress(label, count, elapsed)
+    else:
+        rate = count / elapsed if elapsed > 0 else 0
+        log.info(f"{label}: {count} 条（{rate:.0f} 条/秒）")
+
+
+def entry_to_record(entry: HistoryEntry, blob: bool = False) -> dict:
+    """把历史条目转换为导出记录"""
+    record = {
+        "v": EXPORT_FORMAT_VERSION,
+        "digest": entry.digest,
+        "type": entry.type,
+        "timestamp": entry.timestamp,
+        "size": entry.size,
+        "preview": entry.preview,
+    }
+    if blob:
+        record["blob"] = True
+    return record
+
+
+def record_to_entry(record: dict) -> HistoryEntry:
+    """把导入记录转换为历史条目，缺少必要字段时抛出 ValueError"""
+    try:
+        return HistoryEntry(
+            str(record["digest"]),
+            str(record["type"]),
+            float(record["timestamp"]),
+            int(record.get("size", 0)),
+            str(record.get("preview", "")),
+        )
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"记录缺少必要字段: {e}") from None
+
+
+def iter_export_records(entries, blob_store=None, blob_dir=None):
+    """把条目转换为导出记录，有大内容时复制到 blob_dir
+
+    大内容只在对应的记录被写出时才复制，文件按块复制，不会载入内存。
+    """
+    for entry in entries:
+        has_blob = False
+        if blob_store is not None and blob_dir is not None and blob_store.contains(entry.digest):
+            os.makedirs(blob_dir, exist_ok=True)
+            has_blob = blob_store.export_file(entry.digest, os.path.join(blob_dir, entry.digest))
+        yield entry_to_record(entry, has_blob)
+
+
+def read_records(lines):
+    """逐行解析 JSONL，跳过空行和无法解析的行"""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            log.warning(f"第 {number} 行无法解析，已跳过: {e}")
+            continue
+        if isinstance(record, dict):
+            yield number, record
+
+
+def iter_import_entries(records, blob_store=None, blob_dir=None):
+    """把导入记录转换为条目，按需导入引用的大内容
+
+    去重由数据库按摘要完成，这里不保存已见过的摘要，内存占用与记录数量无关。
+    """
+    for number, record in records:
+        try:
+            entry = record_to_entry(record)
+        except ValueError as e:
+            log.warning(f"第 {number} 行{e}，已跳过")
+            continue
+        if record.get("blob") and blob_store is not None and blob_dir is not None:
+            source = os.path.join(blob_dir, entry.digest)
+            if os.path.exists(source):
+                blob_store.import_file(entry.digest, source)
+        yield entry
+
+
+def export_history(store, path: str, blob_store=None, progress=None) -> int:
+    """把历史记录导出为 JSONL
+
+    读取、转换、写入组成生成器管道，内存占用与条目数量无关。
+
+    Args:
+        store: HistoryStore
+        path: 导出文件路径，扩展名为 .gz/.xz/.bz2 时压缩
+        blob_store: 大内容存储，提供时把大内容复制到导出文件旁的 .blobs 目录
+        progress: 进度回调 progress(label, count, elapsed)
+
+    Returns:
+        int: 导出的条目数
+    """
+    blob_dir = get_blob_export_dir(path) if blob_store is not None else None
+    records = iter_export_records(store.iter_entries(), blob_store, blob_dir)
+    count = 0
+    # 临时文件保留压缩扩展名，以便使用相同的压缩方式写入
+    base, ext = os.path.splitext(path)
+    temp_path = f"{base}.tmp{ext}"
+    with open_jsonl(temp_path, "w") as f:
+        for record in with_progress(records, "导出历史记录", progress):
+            f.write(_ENCODER.encode(record))
+            f.write("\n")
+            count += 1
+    os.replace(temp_path, path)
+    return count
+
+
+def import_history(store, path: str, blob_store=None, progress=None):
+    """从 JSONL 导入历史记录
+
+    按行流式读取，分批提交并按摘要去重，已存在的条目只更新为较新的时间。
+
+    Args:
+        store: HistoryStore
+        path: 导入文件路径，扩展名为 .gz/.xz/.bz2 时自动解压
+        blob_store: 大内容存储，提供时从文件旁的 .blobs 目录导入引用的大内容
+        progress: 进度回调 progress(label, count, elapsed)
+
+    Returns:
+        tuple: (读取的有效条目数, 新增的条目数)
+    """
+    blob_dir = get_blob_export_dir(path)
+    if not os.path.isdir(blob_dir):
+        blob_dir = None
+
+    read = 0
+
+    def counted(entries):
+        nonlocal read
+        for entry in entries:
+            read += 1
+            yield entry
+
+    with open_jsonl(path, "r") as f:
+        entries = iter_import_entries(read_records(f), blob_store, blob_dir)
+        added = store.import_entries(
+            counted(with_progress(entries, "导入历史记录", progress)),
+            batch_size=IMPORT_BATCH_SIZE
+        )
+    return read, added
@@ -0,0 +1,195 @@
+import codecs
+import re
+from html.parser import HTMLParser
+
+# 每次送入解析器的字节数
+HTML_FEED_CHUNK_SIZE = 8192
+# CF_HTML 头部的最大长度，头部字段总是位于数据开头
+CF_HTML_HEADER_LIMIT = 1024
+# 内容不会被显示的标签
+SKIPPED_TAGS = frozenset({"script", "style", "head", "title", "noscript", "template"})
+# 块级标签，前后补充空白避免相邻单元格或段落的文字粘连
+BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table",
+    "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+})
+
+_HEADER_FIELD_PATTERN = re.compile(rb"(StartHTML|EndHTML|StartFragment|EndFragment):(-?\d+)")
+_FRAGMENT_START_MARKER = "<!--StartFragment-->"
+_FRAGMENT_END_MARKER = "<!--EndFragment-->"
+_CF_HTML_VERSION_FIELD = "Version:"
+
+
+def parse_cf_html_header(data) -> dict:
+    """解析 CF_HTML 头部中的偏移量
+
+    Args:
+        data: CF_HTML 原始数据（bytes 或 str）
+
+    Returns:
+        dict: 例如 {"StartFragment": 140, "EndFragment": 300}，解析失败时为空
+    """
+    header = data[:CF_HTML_HEADER_LIMIT]
+    if isinstance(header, str):
+        header = header.encode("ascii", "ignore")
+    return {name.decode(): int(value) for name, value in _HEADER_FIELD_PATTERN.findall(bytes(header))}
+
+
+def get_fragment(data):
+    """获取 CF_HTML 中实际复制的片段
+
+    bytes 数据按头部给出的字节偏移量返回 memoryview 切片，不复制数据；
+    偏移量缺失或越界时，以及 str 数据（偏移量以字节计，无法直接使用），
+    退回到查找片段注释标记，也没有标记时只去掉头部。
+
+    Args:
+        data: CF_HTML 原始数据
+
+    Returns:
+        memoryview 或 str: 片段内容
+    """
+    offsets = parse_cf_html_header(data)
+
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        view = memoryview(data)
+        for start_key, end_key in (("StartFragment", "EndFragment"), ("StartHTML", "EndHTML")):
+            start = offsets.get(start_key, -1)
+            end = offsets.get(end_key, -1)
+            if 0 <= start < end <= len(view):
+                return view[start:end]
+        # 只有 memoryview 需要复制一份才能查找标记，偏移量正常时不会走到这里
+        raw = data if isinstance(data, (bytes, bytearray)) else view.tobytes()
+        start, end = _find_fragment(raw, offsets)
+        return view[start:end]
+
+    start, end = _find_fragment(data, offsets)
+    return data[start:end]
+
+
+def _find_fragment(data, offsets):
+    """按片段注释标记查找片段范围，没有标记时返回头部之后的全部内容
+
+    Args:
+        data: CF_HTML 原始数据（bytes、bytearray 或 str）
+        offsets: parse_cf_html_header 的结果
+
+    Returns:
+        tuple: (开始位置, 结束位置)
+    """
+    start_marker, end_marker, version = _FRAGMENT_START_MARKER, _FRAGMENT_END_MARKER, _CF_HTML_VERSION_FIELD
+    if not isinstance(data, str):
+        start_marker, end_marker, version = start_marker.encode(), end_marker.encode(), version.encode()
+
+    start = data.find(start_marker)
+    if start >= 0:
+        start += len(start_marker)
+        end = data.find(end_marker, start)
+        return start, end if end >= 0 else len(data)
+
+    # 头部只包含 ASCII 字段，StartHTML 的字节偏移量与字符偏移量一致
+    start = offsets.get("StartHTML", -1)
+    if 0 <= start < len(data):
+        return start, len(data)
+    if not data.startswith(version):
+        return 0, len(data)
+    # 头部由 "字段:值" 行组成，HTML 从第一个 "<" 开始
+    start = data.find("<" if isinstance(data, str) else b"<", 0, CF_HTML_HEADER_LIMIT)
+    return (start if start >= 0 else len(data)), len(data)
+
+
+class _SummaryParser(HTMLParser):
+    """增量提取 HTML 纯文本的解析器
+
+    跳过脚本与样式内容，由 HTMLParser 负责实体解码，
+    收集的文字达到上限后不再保存。
+    """
+
+    def __init__(self, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.parts = []
+        self.length = 0
+        self.skip_depth = 0
+        self.pending_space = False
+
+    @property
+    def full(self) -> bool:
+        return self.length > self.limit
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.pending_space = True
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.pending_space = True
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            if self.skip_depth:
+                self.skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self.pending_space = True
+
+    def handle_data(self, data):
+        if self.skip_depth or self.full:
+            return
+        words = data.split()
+        if not words:
+            if data:
+                self.pending_space = True
+            return
+        # 保留文字与标签交界处的空白，与 ' '.join(text.split()) 的效果一致
+        if data[0].isspace():
+            self.pending_space = True
+        text = " ".join(words)
+        if self.pending_space and self.length:
+            text = " " + text
+        self.pending_space = data[-1].isspace()
+        self.parts.append(text)
+        self.length += len(text)
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+def extract_html_text(data, limit: int):
+    """从 CF_HTML 数据中提取纯文本摘要
+
+    只解析复制的片段，并以固定大小的块增量送入解析器，
+    摘要长度达到 limit 后立即停止，处理时间与网页总大小无关。
+
+    Args:
+        data: CF_HTML 原始数据（bytes 或 str）
+        limit: 摘要的最大长度
+
+    Returns:
+        tuple: (摘要文本, 是否被截断)
+    """
+    fragment = get_fragment(data)
+    parser = _SummaryParser(limit)
+
+    if isinstance(fragment, memoryview):
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        for start in range(0, len(fragment), HTML_FEED_CHUNK_SIZE):
+            parser.feed(decoder.decode(fragment[start:start + HTML_FEED_CHUNK_SIZE]))
+            if parser.full:
+                break
+        else:
+            parser.feed(decoder.decode(b"", final=True))
+    else:
+        for start in range(0, len(fragment), HTML_FEED_CHUNK_SIZE):
+            parser.feed(fragment[start:start + HTML_FEED_CHUNK_SIZE])
+            if parser.full:
+                break
+
+    if not parser.full:
+        parser.close()
+    text = parser.text()
+    if len(text) > limit:
+        return text[:limit], True
+    return text, False
@@ -1,6 +1,237 @@
-from rich import print; import time, inspect
-def log(level, message): print(f"{level} {time.strftime('%H:%M:%S', time.localtime())} [bold]From {inspect.currentframe().f_back.f_back.f_code.co_filename}, line {inspect.currentframe().f_back.f_back.f_lineno}[/bold] {message}")
-error = lambda message: log('[bold red][ERROR][/bold red]', message)
-info = lambda message: log('[bold blue][INFO][/bold blue]', message)
-warning = lambda message: log('[bold yellow][WARN][/bold yellow]', message)
-debug = lambda message: log('[bold cyan][DEBUG][/bold cyan]', message)
\ No newline at end of file
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+
+# 日志级别
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+# 日志文件名，由程序入口放在 config.json 所在目录
+LOG_FILE_NAME = "clipboard_enhance.log"
+# 日志文件超过该字节数时轮换，保留 LOG_BACKUP_COUNT 个旧文件
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+# 待写出日志的队列长度，写出跟不上时丢弃新记录，不阻塞调用方
+LOG_QUEUE_SIZE = 10000
+
+_LEVEL_TAGS = {
+    DEBUG: ('[bold cyan][DEBUG][/bold cyan]', 'DEBUG'),
+    INFO: ('[bold blue][INFO][/bold blue]', 'INFO'),
+    WARNING: ('[bold yellow][WARN][/bold yellow]', 'WARN'),
+    ERROR: ('[bold red][ERROR][/bold red]', 'ERROR'),
+}
+
+_level = INFO
+_queue = queue.Queue(LOG_QUEUE_SIZE)
+_thread = None
+_start_lock = threading.Lock()
+_dropped = 0
+_console = sys.stdout is not None
+_file_sink = None
+
+
+def set_level(level: int):
+    """设置输出的最低级别"""
+    global _level
+    _level = level
+
+
+def set_debug_mode(enabled: bool):
+    """启用或关闭调试日志（--debug）"""
+    set_level(DEBUG if enabled else INFO)
+
+
+def is_enabled_for(level: int) -> bool:
+    """该级别的日志是否会输出，用于跳过只为日志准备的计算"""
+    return level >= _level
+
+
+def set_console(enabled: bool):
+    """是否输出到控制台，无控制台的打包程序中默认关闭"""
+    global _console
+    _console = enabled and sys.stdout is not None
+
+
+def set_log_file(path, max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT):
+    """设置日志文件，为 None 时只输出到控制台"""
+    global _file_sink
+    sink = _RotatingFile(path, max_bytes, backup_count) if path else None
+    old, _file_sink = _file_sink, sink
+    if old is not None:
+        _queue_put(("close", old))
+
+
+def debug(message, *args):
+    if _level <= DEBUG:
+        _emit(DEBUG, message, args)
+
+
+def info(message, *args):
+    if _level <= INFO:
+        _emit(INFO, message, args)
+
+
+def warning(message, *args):
+    if _level <= WARNING:
+        _emit(WARNING, message, args)
+
+
+def error(message, *args):
+    if _level <= ERROR:
+        _emit(ERROR, message, args)
+
+
+def flush(timeout: float = 1.0) -> bool:
+    """等待已提交的日志全部写出，用于直接结束进程之前
+
+    Returns:
+        bool: 是否在超时前写完
+    """
+    if _thread is None:
+        return True
+    done = threading.Event()
+    try:
+        _queue.put(("flush", done), timeout=timeout)
+    except queue.Full:
+        return False
+    return done.wait(timeout)
+
+
+def _emit(level, message, args):
+    """记录调用位置后放入队列，格式化与输出都在后台线程中进行"""
+    frame = sys._getframe(2)
+    _queue_put((level, time.time(), frame.f_code.co_filename, frame.f_lineno, message, args))
+
+
+def _queue_put(record):
+    global _thread, _dropped
+    if _thread is None:
+        with _start_lock:
+            if _thread is None:
+                _thread = threading.Thread(target=_run, name="log-writer", daemon=True)
+                _thread.start()
+                # 写出线程是守护线程，sys.exit 等正常退出时先写完队列中的日志
+                atexit.register(flush)
+    try:
+        _queue.put_nowait(record)
+    except queue.Full:
+        _dropped += 1
+
+
+def _format_message(message, args):
+    if args:
+        try:
+            return str(message) % args
+        except (TypeError, ValueError):
+            return " ".join([str(message)] + [str(arg) for arg in args])
+    return str(message)
+
+
+def _run():
+    """后台线程：格式化并写出日志"""
+    global _dropped
+    while True:
+        record = _queue.get()
+        kind = record[0]
+        if kind == "close":
+            record[1].close()
+        elif kind != "flush":
+            _write(record)
+
+        # 队列清空后再报告丢弃的数量，避免报告本身继续占满队列
+        if _queue.empty():
+            if _dropped:
+                dropped, _dropped = _dropped, 0
+                _write((WARNING, time.time(), __file__, 0, "日志队列已满，丢弃了 %d 条日志", (dropped,)))
+            if _file_sink is not None:
+                _file_sink.flush()
+        if kind == "flush":
+            if _file_sink is not None:
+                _file_sink.flush()
+            record[1].set()
+
+
+_rich_print = _rich_escape = None
+
+
+def _write(record):
+    """输出一条日志，输出失败不能影响程序运行"""
+    global _rich_print, _rich_escape
+    level, created, filename, lineno, message, args = record
+    text = _format_message(message, args)
+    console_tag, file_tag = _LEVEL_TAGS.get(level, _LEVEL_TAGS[INFO])
+    try:
+        if _console:
+            if _rich_print is None:
+                # rich 只在第一次输出到控制台时导入，不拖慢启动
+                from rich import print as _rich_print
+                from rich.markup import escape as _rich_escape
+            clock = time.strftime('%H:%M:%S', time.localtime(created))
+            _rich_print(f"{console_tag} {clock} [bold]From {_rich_escape(filename)}, line {lineno}[/bold] "
+                        f"{_rich_escape(text)}")
+        sink = _file_sink
+        if sink is not None:
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))
+            sink.write(f"{stamp} {file_tag} {os.path.basename(filename)}:{lineno} {text}\n")
+    except Exception:
+        pass
+
+
+class _RotatingFile:
+    """按大小轮换的日志文件，只在后台线程中使用"""
+
+    def __init__(self, path, max_bytes, backup_count):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = None
+        self._size = 0
+        self._limit = max_bytes  # 达到该大小时轮换，轮换失败后推迟到再写入 max_bytes 之后
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+
+    def write(self, text):
+        if self._file is None:
+            self._open()
+        data_size = len(text.encode('utf-8'))
+        if self._size and self._size + data_size > self._limit:
+            self._rotate()
+        self._file.write(text)
+        self._size += data_size
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        try:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            if self.backup_count > 0:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+            self._limit = self.max_bytes
+        except OSError:
+            # 其他进程打开着日志文件时（Windows）无法重命名，继续写入当前文件，稍后再尝试
+            self._open()
+            self._limit = self._size + self.max_bytes
+            return
+        self._open()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
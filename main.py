@@ -1,6 +1,13 @@
+# 最先导入，启动耗时从这里开始计算
+from startup_trace import startup_trace
 import log, sys
+import os
 import platform
-import time
+
+# 打包后的程序启动分析进程时会再次运行本文件，由 freeze_support 接管，不执行后面的逻辑
+if getattr(sys, "frozen", False):
+    import multiprocessing
+    multiprocessing.freeze_support()
 
 log.debug('应用程序启动...')
 log.debug('检测系统类型...')
@@ -23,13 +30,19 @@ try:
     parser.add_argument('--register', action='store_true', help='[ 需要管理员权限 ] 注册 netdisk:// 协议')
     parser.add_argument('--debug', action='store_true', help='启用调试模式')
     parser.add_argument('--preview-delay', type=float, help='设置预览延迟时间（秒）')
+    parser.add_argument('--export-history', type=str, metavar='PATH',
+                        help='导出历史记录为 JSON Lines，扩展名为 .gz/.xz/.bz2 时压缩')
+    parser.add_argument('--import-history', type=str, metavar='PATH',
+                        help='从 JSON Lines 导入历史记录，按摘要去重')
+    parser.add_argument('--profile', type=float, metavar='SECONDS',
+                        help='启动后对所有线程进行性能采样，结果写入程序目录')
 
     # 尝试过滤掉PyInstaller可能添加的额外参数
     filtered_args = []
     i = 0
     while i < len(sys.argv):
         arg = sys.argv[i]
-        if arg in ['-url', '-pwd', '--preview-delay'] and i+1 < len(sys.argv):
+        if arg in ['-url', '-pwd', '--preview-delay', '--export-history', '--import-history', '--profile'] and i+1 < len(sys.argv):
             filtered_args.append(arg)
             filtered_args.append(sys.argv[i+1])
             i += 2
@@ -50,61 +63,66 @@ try:
     if args.debug:
         log.set_debug_mode(True)
         log.debug('调试模式已启用')
+    
+    # 日志同时写入 config.json 所在目录，无控制台的打包程序也能查看
+    from config_store import DEFAULT_CONFIG_FILE
+    log.set_log_file(os.path.join(os.path.dirname(DEFAULT_CONFIG_FILE), log.LOG_FILE_NAME))
 
 except Exception as e:
     log.error(f'参数解析失败: {e}')
     sys.exit(1)
 
-log.debug('导入主要模块...')
-try:
-    from func import (
-        exit_application, 
-        handle_netdisk_protocol, 
-        main,
-        config,
-        save_config
-    )
-except Exception as e:
-    log.error(f'导入模块失败: {e}')
-    sys.exit(1)
-
 if __name__ == "__main__":
-    start_time = time.time()
-    
     try:
-        # 应用命令行预览延迟设置
-        if args.preview_delay:
-            if 0.1 <= args.preview_delay <= 2.0:
-                config["preview_delay"] = args.preview_delay
-                save_config()
-                log.debug(f'预览延迟设置为: {args.preview_delay}秒')
-            else:
-                log.warning(f'无效的预览延迟时间: {args.preview_delay}，使用默认值')
-        
         # 检查命令行参数
         if args.pwd and not args.url:
             log.error("提取码需要与网盘链接一起提供。")
             sys.exit(1)
-            
+        
         if args.url or args.register:
-            # 作为协议处理器运行
+            # 作为协议处理器运行，只导入轻量的协议处理模块，不加载托盘程序依赖的 PyQt5、pystray、PIL
             log.debug(f'作为协议处理器运行')
             log.debug(f'参数详情：\n- URL：{args.url}\n- 提取码：{args.pwd}\n- 注册：{args.register}')
             log.debug(f"完整命令行: {sys.argv}")
             
+            from netdisk_protocol import handle_netdisk_protocol
             handle_netdisk_protocol(
                 url=args.url,
                 pwd=args.pwd,
                 register=args.register
             )
-            exit_application()
+            sys.exit(0)
+        
+        log.debug('导入主要模块...')
+        try:
+            with startup_trace.phase("导入模块"):
+                from func import transfer_history, main, config, load_config, save_config
+        except Exception as e:
+            log.error(f'导入模块失败: {e}')
+            sys.exit(1)
+        
+        # 应用命令行预览延迟设置
+        if args.preview_delay:
+            load_config()
+            try:
+                config.set("preview_delay", args.preview_delay)
+                save_config()
+                log.debug(f'预览延迟设置为: {args.preview_delay}秒')
+            except ValueError as e:
+                log.warning(f'无效的预览延迟时间: {e}，使用默认值')
+        
+        if args.export_history or args.import_history:
+            # 导出或导入历史记录后退出
+            log.debug(f'导出历史记录：{args.export_history}，导入历史记录：{args.import_history}')
+            transfer_history(
+                export_path=args.export_history,
+                import_path=args.import_history
+            )
         else:
             # 作为主程序运行
+            # 各阶段耗时在托盘显示并读取到剪贴板后以调试日志输出
             log.debug('作为主程序运行')
-            startup_time = time.time() - start_time
-            log.debug(f'启动准备耗时: {startup_time:.3f}秒')
-            
-            main()
+            main(profile_duration=args.profile)
             
     except KeyboardInterrupt:
         log.debug('用户中断程序')
@@ -119,7 +137,7 @@ if __name__ == "__main__":
         
         # 尝试显示错误通知
         try:
-            from func import toast
+            from win11toast import toast
             toast('程序错误', f'发生未预期的错误: {str(e)}')
         except:
             pass
@@ -0,0 +1,225 @@
+from bisect import bisect_left
+import json
+import os
+import threading
+import time
+
+import log
+
+# 延迟直方图的默认桶上界（秒），覆盖从微秒级的检测函数到秒级的通知
+LATENCY_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+# 导出文件名，与 config.json 位于同一目录
+METRICS_FILE_NAME = "metrics.json"
+
+
+class Counter:
+    """单调递增的计数器"""
+
+    __slots__ = ("name", "value", "_registry")
+
+    def __init__(self, name, registry):
+        self.name = name
+        self.value = 0
+        self._registry = registry
+
+    def inc(self, amount=1):
+        if self._registry.enabled:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge:
+    """记录当前值的指标，例如队列长度"""
+
+    __slots__ = ("name", "value", "_registry")
+
+    def __init__(self, name, registry):
+        self.name = name
+        self.value = 0
+        self._registry = registry
+
+    def set(self, value):
+        if self._registry.enabled:
+            self.value = value
+
+    def snapshot(self):
+        return self.value
+
+
+class Histogram:
+    """固定分桶的延迟直方图
+
+    每次记录只做一次二分查找和几次加法，不保存原始样本，内存占用固定。
+    """
+
+    __slots__ = ("name", "buckets", "unit", "counts", "total", "maximum", "_registry")
+
+    def __init__(self, name, registry, buckets=LATENCY_BUCKETS, unit="s"):
+        self.name = name
+        self.buckets = tuple(buckets)
+        self.unit = unit
+        # 最后一个桶记录超过所有上界的样本
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.maximum = 0.0
+        self._registry = registry
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        """记录一个样本（默认单位为秒）"""
+        if self._registry.enabled:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.total += value
+            if value > self.maximum:
+                self.maximum = value
+
+    def time(self):
+        """计时上下文管理器，退出时记录耗时"""
+        return _Timer(self)
+
+    def quantile(self, q: float) -> float:
+        """根据分桶估计分位数，返回样本所在桶的上界（超出所有桶时返回最大值）"""
+        counts = list(self.counts)
+        count = sum(counts)
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return self.buckets[index] if index < len(self.buckets) else self.maximum
+        return self.maximum
+
+    def snapshot(self):
+        counts = list(self.counts)
+        count = sum(counts)
+        buckets = {str(bound): counts[i] for i, bound in enumerate(self.buckets)}
+        buckets["+Inf"] = counts[-1]
+        return {
+            "unit": self.unit,
+            "count": count,
+            "avg": self.total / count if count else 0.0,
+            "max": self.maximum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class MetricsRegistry:
+    """进程内的指标注册表
+
+    指标按名称创建一次后由调用方持有，记录样本时不再查找名称。
+    记录样本不加锁：每个指标通常只由一个线程写入，多个线程同时写入时
+    在 GIL 下可能极少丢失计数，对统计用途可以接受，换来每个样本不到一微秒的开销。
+    也可以注册收集函数，在生成快照时读取已有模块自己维护的统计（例如剪贴板工作线程）。
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+
+    def _get_or_create(self, name, factory, kind):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            elif not isinstance(metric, kind):
+                raise ValueError(f"指标 {name} 已注册为 {type(metric).__name__}")
+            return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, self), Counter)
+
+    def gauge(self, name: str) -> Gauge:
+        return self._get_or_create(name, lambda: Gauge(name, self), Gauge)
+
+    def histogram(self, name: str, buckets=LATENCY_BUCKETS, unit: str = "s") -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, self, buckets, unit), Histogram)
+
+    def register_collector(self, name: str, collect):
+        """注册收集函数
+
+        Args:
+            name: 快照中的名称
+            collect: 无参函数，返回可序列化为 JSON 的字典
+        """
+        with self._lock:
+            self._collectors[name] = collect
+
+    def snapshot(self) -> dict:
+        """所有指标的当前值"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            collectors = dict(self._collectors)
+        result = {
+            "timestamp": time.time(),
+            "uptime": time.time() - self._started_at,
+            "metrics": {name: metric.snapshot() for name, metric in sorted(metrics.items())},
+        }
+        for name, collect in collectors.items():
+            try:
+                result["metrics"][name] = collect()
+            except Exception as e:
+                log.error(f"收集指标 {name} 失败: {e}")
+        return result
+
+    def summary_lines(self):
+        """生成便于阅读的摘要，每个延迟直方图一行"""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for name, metric in metrics:
+            if isinstance(metric, Histogram):
+                if not metric.count:
+                    continue
+                p50, p95 = metric.quantile(0.5), metric.quantile(0.95)
+                if metric.unit == "s":
+                    lines.append(f"{name}: {metric.count} 次，p50 {p50 * 1000:.2f} ms，p95 {p95 * 1000:.2f} ms")
+                else:
+                    lines.append(f"{name}: {metric.count} 次，p50 {p50:g}，p95 {p95:g} {metric.unit}")
+            elif metric.value:
+                lines.append(f"{name}: {metric.value}")
+        return lines
+
+    def dump(self, path: str):
+        """把快照写入 JSON 文件（先写临时文件再替换）"""
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+
+def get_metrics_file(config_file: str) -> str:
+    """获取指标导出文件路径"""
+    return os.path.join(os.path.dirname(os.path.abspath(config_file)), METRICS_FILE_NAME)
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
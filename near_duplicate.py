@@ -0,0 +1,239 @@
+import re
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+
+# MinHash 签名长度，分为 BANDS 段、每段 ROWS_PER_BAND 个值建立 LSH 索引
+SIGNATURE_SIZE = 64
+BANDS = 8
+ROWS_PER_BAND = SIGNATURE_SIZE // BANDS
+# 估计的 Jaccard 相似度不低于该值时判定为相似内容
+SIMILARITY_THRESHOLD = 0.7
+# 字符片段（shingle）长度
+SHINGLE_SIZE = 4
+# 短于该长度的内容不做相似检测，短文本的少量改动就足以让内容完全不同
+MIN_TEXT_LENGTH = 32
+# 参与相似检测的内容类型
+NEAR_DUPLICATE_TYPES = frozenset({"文本", "HTML"})
+# 记录最近处理结果的数量，供 wait_for 查询
+RECENT_RESULTS_SIZE = 64
+
+_MASK64 = (1 << 64) - 1
+_BIN_SHIFT = 64 - (SIGNATURE_SIZE.bit_length() - 1)
+_VALUE_MASK = (1 << _BIN_SHIFT) - 1
+_VALUE_SHIFT = _BIN_SHIFT - 32
+_EMPTY = 1 << 32
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+# 乘法哈希的参数，固定取值使签名在同一版本内可比较
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_HASH_INCREMENT = 0x632BE59BD9B4E019
+
+
+def shingles(text: str):
+    """把文本规范化（小写、合并空白）后切分为定长字符片段的哈希集合，对中英文和代码都适用"""
+    normalized = _WHITESPACE_PATTERN.sub(" ", text.lower()).strip()
+    if len(normalized) <= SHINGLE_SIZE:
+        pieces = {normalized}
+    else:
+        pieces = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    return {zlib.crc32(piece.encode("utf-8", "surrogatepass")) for piece in pieces}
+
+
+def minhash(text: str) -> array:
+    """计算文本的 MinHash 签名
+
+    使用单次哈希分桶（one permutation hashing）：每个片段只哈希一次，
+    按高位分到 SIGNATURE_SIZE 个桶中各取最小值，空桶从右侧最近的非空桶借值。
+    两个签名中相同位置取值相等的比例近似两段文本片段集合的 Jaccard 相似度，
+    计算量与片段数量成正比，而不是片段数量乘以签名长度。
+
+    Args:
+        text: 文本
+
+    Returns:
+        array: SIGNATURE_SIZE 个整数
+    """
+    bins = [_EMPTY] * SIGNATURE_SIZE
+    for value in shingles(text):
+        value = (value * _HASH_MULTIPLIER + _HASH_INCREMENT) & _MASK64
+        index = value >> _BIN_SHIFT
+        low = (value & _VALUE_MASK) >> _VALUE_SHIFT
+        if low < bins[index]:
+            bins[index] = low
+
+    # 空桶从右侧最近的非空桶借值，并按距离区分，避免两个空桶偶然相等
+    for index in range(SIGNATURE_SIZE):
+        if bins[index] == _EMPTY:
+            for offset in range(1, SIGNATURE_SIZE):
+                borrowed = bins[(index + offset) % SIGNATURE_SIZE]
+                if borrowed < _EMPTY:
+                    bins[index] = _EMPTY + borrowed * SIGNATURE_SIZE + offset
+                    break
+    return array("Q", bins)
+
+
+def estimate_similarity(a: array, b: array) -> float:
+    """根据签名估计 Jaccard 相似度"""
+    return sum(1 for x, y in zip(a, b) if x == y) / SIGNATURE_SIZE
+
+
+def _band_keys(signature: array):
+    return [(band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+            for band in range(BANDS)]
+
+
+class NearDuplicateIndex:
+    """剪贴板历史的相似内容索引
+
+    订阅 ClipboardHistory 的变化，在历史记录线程中计算 MinHash 签名，不占用剪贴板监视线程。
+    签名根据条目的 text（快照的头尾片段）计算，没有时（短文本或从数据库加载的条目）使用预览。
+    签名按段建立 LSH 索引，查找候选只需要读取 BANDS 个桶，代价与历史总量基本无关。
+    相似的条目归入同一组，组编号为组内最早条目的摘要。
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, min_length: int = MIN_TEXT_LENGTH,
+                 content_types=NEAR_DUPLICATE_TYPES):
+        self.threshold = threshold
+        self.min_length = min_length
+        self.content_types = content_types
+        self._lock = threading.Lock()
+        self._processed = threading.Condition(self._lock)
+        self._signatures = {}
+        self._buckets = {}
+        self._group_of = {}
+        self._groups = {}
+        self._recent = OrderedDict()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def on_history_event(self, event, entry):
+        """ClipboardHistory 的订阅回调"""
+        if event == "add":
+            self.add(entry)
+        elif event == "touch":
+            with self._lock:
+                self._mark_processed(entry.digest)
+        elif event == "evict":
+            self.remove(entry.digest)
+
+    def accepts(self, entry) -> bool:
+        """条目是否参与相似检测"""
+        return entry.type in self.content_types and len(entry.text or entry.preview) >= self.min_length
+
+    def add(self, entry):
+        """计算签名并归组
+
+        Returns:
+            str: 组编号，不参与检测的条目返回 None
+        """
+        signature = minhash(entry.text or entry.preview) if self.accepts(entry) else None
+        with self._lock:
+            if signature is None or entry.digest in self._signatures:
+                self._mark_processed(entry.digest)
+                return self._group_of.get(entry.digest)
+
+            nearest = self._nearest(signature)
+            group_id = self._group_of[nearest] if nearest is not None else entry.digest
+            self._signatures[entry.digest] = signature
+            for key in _band_keys(signature):
+                self._buckets.setdefault(key, set()).add(entry.digest)
+            self._group_of[entry.digest] = group_id
+            self._groups.setdefault(group_id, set()).add(entry.digest)
+            self._mark_processed(entry.digest)
+            return group_id
+
+    def remove(self, digest):
+        """从索引中删除条目"""
+        with self._lock:
+            signature = self._signatures.pop(digest, None)
+            if signature is None:
+                return
+            for key in _band_keys(signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(digest)
+                    if not bucket:
+                        del self._buckets[key]
+            group_id = self._group_of.pop(digest)
+            members = self._groups[group_id]
+            members.discard(digest)
+            if not members:
+                del self._groups[group_id]
+
+    def _nearest(self, signature):
+        """在至少一段签名相同的候选中查找最相似的条目（需持有锁）"""
+        best = None
+        best_similarity = self.threshold
+        seen = set()
+        for key in _band_keys(signature):
+            for digest in self._buckets.get(key, ()):
+                if digest in seen:
+                    continue
+                seen.add(digest)
+                similarity = estimate_similarity(signature, self._signatures[digest])
+                if similarity >= best_similarity:
+                    best, best_similarity = digest, similarity
+        return best
+
+    def _mark_processed(self, digest):
+        """记录处理结果并唤醒等待者（需持有锁）"""
+        self._recent[digest] = True
+        self._recent.move_to_end(digest)
+        while len(self._recent) > RECENT_RESULTS_SIZE:
+            self._recent.popitem(last=False)
+        self._processed.notify_all()
+
+    def group_of(self, digest):
+        """条目所属的组编号，不在索引中时返回 None"""
+        with self._lock:
+            return self._group_of.get(digest)
+
+    def variants(self, digest):
+        """与条目同组的其他条目摘要"""
+        with self._lock:
+            group_id = self._group_of.get(digest)
+            if group_id is None:
+                return set()
+            return self._groups[group_id] - {digest}
+
+    def wait_for(self, digest, timeout: float):
+        """等待条目处理完成，返回其分组信息
+
+        供剪贴板监视线程在发送通知前短暂等待，指纹计算本身仍在历史记录线程中完成。
+
+        Args:
+            digest: 条目摘要
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            tuple: (组编号, 组内其他条目数量)，超时或条目不参与检测时返回 None
+        """
+        with self._lock:
+            self._processed.wait_for(lambda: digest in self._recent, timeout)
+            group_id = self._group_of.get(digest)
+            if group_id is None:
+                return None
+            return group_id, len(self._groups[group_id]) - 1
+
+    def collapse(self, entries):
+        """同组的条目只保留第一个（按传入顺序，通常为最新的一条）
+
+        Args:
+            entries: HistoryEntry 列表
+
+        Returns:
+            list: 折叠后的条目列表
+        """
+        seen_groups = set()
+        result = []
+        with self._lock:
+            for entry in entries:
+                group_id = self._group_of.get(entry.digest)
+                if group_id is not None:
+                    if group_id in seen_groups:
+                        continue
+                    seen_groups.add(group_id)
+                result.append(entry)
+        return result
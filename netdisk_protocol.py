@@ -0,0 +1,230 @@
+# netdisk:// 协议处理
+# 点击通知中的“访问网盘”会以 -url/-pwd 参数启动新进程。托盘程序运行时直接把请求转交给它，
+# 否则在本进程中解析网址、打开浏览器、复制提取码。本模块只依赖标准库，浏览器、剪贴板和通知模块
+# 用到时才导入，不加载 PyQt5、pystray、PIL。
+import os
+import sys
+from urllib.parse import urlparse, urlunparse, parse_qs
+
+import log
+from config_store import DEFAULT_CONFIG_FILE
+from single_instance import forward_to_instance, get_instance_file
+
+NETDISK_SCHEME = "netdisk://"
+
+
+def normalize_netdisk_url(url: str, pwd: str = None):
+    """把协议链接还原为网盘网址，并从查询参数中取出提取码
+
+    Args:
+        url: netdisk:// 链接或网盘网址
+        pwd: 命令行传入的提取码，已提供时不从网址中提取
+
+    Returns:
+        tuple: (网址, 提取码)
+    """
+    # 去除可能存在的引号
+    url = url.strip('"')
+
+    # 处理URL，移除netdisk://前缀并确保协议格式正确
+    if url.startswith(NETDISK_SCHEME):
+        url = url[len(NETDISK_SCHEME):]
+
+    # 确保URL包含正确的协议格式
+    if not (url.startswith("http://") or url.startswith("https://")):
+        url = "https://" + url
+
+    # 修复重复的查询参数问题
+    # 如果URL包含多个问号，只保留第一个问号
+    question_mark_pos = url.find('?')
+    if question_mark_pos > 0 and url.find('?', question_mark_pos + 1) > 0:
+        url = url[:question_mark_pos] + '?' + url[question_mark_pos + 1:].replace('?', '&')
+        log.debug(f"修复后的URL: {url}")
+
+    # 从URL中提取提取码 (如果存在)
+    try:
+        parsed_url = urlparse(url)
+        query_params = parse_qs(parsed_url.query)
+
+        if 'pwd' in query_params and not pwd:
+            # 获取提取码，并确保不包含额外的pwd参数
+            extracted_pwd = query_params['pwd'][0]
+
+            # 清理提取码中可能的额外pwd参数
+            if '?pwd=' in extracted_pwd or '&pwd=' in extracted_pwd:
+                extracted_pwd = extracted_pwd.split('?pwd=')[0].split('&pwd=')[0]
+                log.debug(f"清理后的提取码: {extracted_pwd}")
+
+            pwd = extracted_pwd
+            log.debug(f"从URL中提取到提取码: {pwd}")
+
+            # 从URL中移除pwd参数
+            clean_params = {k: v[0] for k, v in query_params.items() if k != 'pwd'}
+            clean_query = "&".join([f"{k}={v}" for k, v in clean_params.items()])
+
+            url_parts = list(parsed_url)
+            url_parts[4] = clean_query
+            url = urlunparse(url_parts)
+
+    except Exception as e:
+        log.error(f"解析URL时出错: {e}")
+
+    return url, pwd
+
+
+def open_netdisk(url: str, pwd: str = None):
+    """没有运行中的实例时在本进程中打开网盘网址，有提取码时复制到剪贴板并提示"""
+    log.debug(f"最终URL: {url}, 提取码: {pwd}")
+
+    # 打开网盘链接
+    import webbrowser
+    webbrowser.open(url)
+
+    # 如果有提取码，复制到剪贴板
+    if pwd:
+        import pyperclip
+        from win11toast import toast
+        pyperclip.copy(pwd)
+        toast('提取码已复制到剪贴板', f'如自动填充失败，可手动粘贴: {pwd}')
+
+
+def open_netdisk_in_instance(url: str, pwd: str = None):
+    """在托盘程序中打开转交来的网盘网址
+
+    提取码交给剪贴板 I/O 工作线程写入，与剪贴板监视的读取串行进行，
+    不会与其争用 OpenClipboard。本函数在共用的阻塞任务线程池中执行，
+    因此不等待写入结果，通知也使用不阻塞的 notify，不占用线程池的线程。
+    """
+    log.debug(f"最终URL: {url}, 提取码: {pwd}")
+
+    import webbrowser
+    webbrowser.open(url)
+
+    if pwd:
+        # 托盘程序已加载这些模块，这里导入不会增加协议处理进程的依赖
+        from clipboard_io import clipboard_worker
+        from win11toast import notify
+
+        def on_copied(future):
+            error = future.exception()
+            if error is not None:
+                log.error(f"复制提取码失败: {error}")
+                notify('提取码复制失败', f'请手动输入提取码: {pwd}')
+            else:
+                notify('提取码已复制到剪贴板', f'如自动填充失败，可手动粘贴: {pwd}')
+
+        clipboard_worker.set_text(pwd).add_done_callback(on_copied)
+
+
+def handle_instance_message(message: dict):
+    """处理协议处理进程转交给托盘程序的请求"""
+    if message.get("action") == "open_netdisk" and message.get("url"):
+        open_netdisk_in_instance(message["url"], message.get("pwd"))
+    else:
+        log.warning(f"未知的实例请求: {message.get('action')}")
+
+
+def register_netdisk_protocol():
+    """注册 netdisk:// 协议处理器"""
+    import winreg
+    from win11toast import toast
+
+    try:
+        # 使用当前可执行文件路径，而不是Python解释器
+        executable_path = sys.executable
+
+        # 对于已打包的EXE文件，直接使用可执行文件作为处理程序
+        # 确保传递的参数格式正确
+        command = f'"{executable_path}" -url "%1"'
+
+        # 创建注册表项
+        with winreg.CreateKey(winreg.HKEY_CLASSES_ROOT, "netdisk") as key:
+            winreg.SetValue(key, "", winreg.REG_SZ, "URL:Netdisk Protocol")
+            winreg.SetValueEx(key, "URL Protocol", 0, winreg.REG_SZ, "")
+
+            with winreg.CreateKey(key, "shell\\open\\command") as cmd_key:
+                winreg.SetValue(cmd_key, "", winreg.REG_SZ, command)
+
+        toast("协议注册成功", "现在可以使用 netdisk:// 链接打开网盘")
+        return True
+
+    except Exception as e:
+        toast("协议注册失败", str(e))
+        log.error(f"注册协议处理器失败: {e}")
+        return False
+
+
+def register_with_admin_check() -> bool:
+    """有管理员权限时注册协议，否则提示以管理员身份启动
+
+    Returns:
+        bool: 是否已尝试注册
+    """
+    import ctypes
+
+    # 检查是否已有管理员权限
+    try:
+        is_admin = ctypes.windll.shell32.IsUserAnAdmin()
+    except:
+        is_admin = False
+
+    if is_admin:
+        # 已经有管理员权限，直接注册
+        register_netdisk_protocol()
+        return True
+
+    from win11toast import toast
+    toast(
+        "请关闭本应用并以管理员身份启动",
+        "注册协议时遇到问题：权限不足，拒绝访问"
+    )
+    return False
+
+
+def terminate_process(code: int = 0):
+    """使用Windows API直接终止进程，不显示终端窗口"""
+    # 直接结束进程不会等待后台线程，先写出剩余的日志
+    log.flush(timeout=0.5)
+    try:
+        import ctypes
+        pid = os.getpid()
+        # 获取进程句柄
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(1, False, pid)
+        # 终止进程
+        kernel32.TerminateProcess(handle, code)
+        kernel32.CloseHandle(handle)
+    except Exception as e:
+        # 备用方案：使用os._exit
+        print(f"使用Windows API终止失败: {e}")
+        os._exit(code)
+
+
+def handle_netdisk_protocol(
+    url: str = None,
+    pwd: str = None,
+    register: bool = False
+):
+    """处理netdisk://协议请求（命令行处理入口点）"""
+
+    log.debug(f"处理协议请求: url={url}, pwd={pwd}, register={register}")
+
+    # 处理注册协议请求
+    if register:
+        terminate_process(code=0 if register_with_admin_check() else 1)
+
+    # 没有URL参数，退出
+    if not url:
+        log.error("缺少必要的URL参数")
+        terminate_process(code=1)
+
+    url, pwd = normalize_netdisk_url(url, pwd)
+
+    # 托盘程序正在运行时交给它处理，本进程不再初始化浏览器和通知
+    message = {"action": "open_netdisk", "url": url, "pwd": pwd}
+    if forward_to_instance(get_instance_file(DEFAULT_CONFIG_FILE), message):
+        log.debug("已转交给运行中的实例处理")
+    else:
+        open_netdisk(url, pwd)
+
+    terminate_process()
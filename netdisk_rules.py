@@ -1,104 +1,122 @@
 # 网盘规则定义
+# keywords 为匹配结果中必然包含的字符串，文本中不含任何一个时跳过该规则的正则匹配
 NETDISK_RULES = {
     'baidu': {
         'name': '百度网盘',
         'reg': r'(?:https?:\/\/)?(?:[^\/\s]*?)?(?:pan|yun|eyun)\.baidu\.com\/(?:s\/[\w~-]+|share\/\S{4,}|doc\/share\/\S+)',
+        'keywords': ('.baidu.com/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{4})',
         'open_with_pwd': '{url}#pwd={pwd}'
     },
     'aliyun': {
         'name': '阿里云盘',
         'reg': r'(?:https?:\/\/)?(?:www\.)?(?:aliyundrive\.com\/s|alipan\.com\/s|alywp\.net)\/[a-zA-Z\d-]+',
+        'keywords': ('aliyundrive.com/s/', 'alipan.com/s/', 'alywp.net/'),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{4,6})',
         'open_with_pwd': '{url}?pwd={pwd}'
     },
     'lanzou': {
         'name': '蓝奏云',
         'reg': r'(?:https?:\/\/)?(?:[a-zA-Z\d\-.]+)?(?:lanzou[a-z]|lanzn|lanzoux?)\.com\/(?:[a-zA-Z\d_\-]+|\w+\/\w+)',
+        'keywords': ('lanzou', 'lanzn'),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{3,6})',
         'open_with_pwd': '{url}?pwd={pwd}'
     },
     '123pan': {
         'name': '123云盘',
         'reg': r'(?:https?:\/\/)?(?:www\.)?123pan\.com\/s\/[\w-]+',
+        'keywords': ('123pan.com/s/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{4,6})',
         'open_with_pwd': '{url}?pwd={pwd}'
     },
     'tianyi': {
         'name': '天翼云盘',
         'reg': r'(?:https?:\/\/)?cloud\.189\.cn\/(?:t\/|web\/share\?code=)?[a-zA-Z\d]+',
+        'keywords': ('cloud.189.cn/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?(?:\s*|\()?([a-zA-Z0-9]{4,6})(?:\))?',
         'open_with_pwd': '{url}?pwd={pwd}'
     },
     'quark': {
         'name': '夸克网盘',
         'reg': r'(?:https?:\/\/)?pan\.quark\.cn\/s\/[a-zA-Z\d-]+',
+        'keywords': ('pan.quark.cn/s/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{4,6})',
         'open_with_pwd': '{url}?pwd={pwd}'
     },
     'weiyun': {
         'name': '腾讯微云',
         'reg': r'(?:https?:\/\/)?share\.weiyun\.com\/[a-zA-Z\d]+',
+        'keywords': ('share.weiyun.com/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{6})',
         'open_with_pwd': '{url}?pwd={pwd}'
     },
     'caiyun': {
         'name': '移动云盘',
         'reg': r'(?:https?:\/\/)?(?:caiyun\.139\.com\/[mw]\/i(?:\?|\/)|caiyun\.139\.com\/front\/#\/detail\?linkID=)[a-zA-Z\d]+',
+        'keywords': ('caiyun.139.com/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{4})',
         'open_with_pwd': '{url}&pwd={pwd}'
     },
     'xunlei': {
         'name': '迅雷云盘',
         'reg': r'(?:https?:\/\/)?pan\.xunlei\.com\/s\/[a-zA-Z\d_-]+',
+        'keywords': ('pan.xunlei.com/s/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{4})',
         'open_with_pwd': '{url}?pwd={pwd}'
     },
     '360': {
         'name': '360云盘',
         'reg': r'(?:https?:\/\/)?(?:yunpan\.360\.cn\/surl_[\w]+|[\w\.]+\.link\.yunpan\.360\.cn\/lk\/surl_[\w]+)',
+        'keywords': ('yunpan.360.cn/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?(?:\s*|\()?([a-zA-Z0-9]{4})(?:\))?|#([a-zA-Z0-9]{4})',
         'open_with_pwd': '{url}#{pwd}'
     },
     '115': {
         'name': '115网盘',
         'reg': r'(?:https?:\/\/)?115\.com\/s\/[a-zA-Z\d]+',
+        'keywords': ('115.com/s/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{4})',
         'open_with_pwd': '{url}#{pwd}'
     },
     'cowtransfer': {
         'name': '奶牛快传',
         'reg': r'(?:https?:\/\/)?cowtransfer\.com\/s\/[a-zA-Z\d-]+',
+        'keywords': ('cowtransfer.com/s/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{4,6})',
         'open_with_pwd': '{url}?pwd={pwd}'
     },
     'ctfile': {
         'name': '城通网盘',
         'reg': r'(?:https?:\/\/)?(?:[\w-]+\.)?ctfile\.com\/(?:f|d)\/\d+-\d+',
+        'keywords': ('ctfile.com/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?(?:\s*|\()?(\d{4})(?:\))?',
         'open_with_pwd': '{url}?p={pwd}'
     },
     'flowus': {
         'name': 'FlowUs息流',
         'reg': r'(?:https?:\/\/)?flowus\.cn\/[\w-]+\/share\/[\w-]+',
+        'keywords': ('flowus.cn/',),
         'pwd_reg': r'',  # 通常不需要提取码
         'open_with_pwd': '{url}'
     },
     'mega': {
         'name': 'Mega网盘',
         'reg': r'(?:https?:\/\/)?mega\.nz\/(?:#!|file\/)[a-zA-Z\d!#_-]+',
+        'keywords': ('mega.nz/',),
         'pwd_reg': r'',  # 特殊加密方式，不使用常规提取码
         'open_with_pwd': '{url}'
     },
     'weibo': {
         'name': '新浪微盘',
         'reg': r'(?:https?:\/\/)?vdisk\.weibo\.com\/(?:s\/|lc\/)[a-zA-Z\d]+',
+        'keywords': ('vdisk.weibo.com/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([A-Z0-9]{4})',
         'open_with_pwd': '{url}?pwd={pwd}'
     },
     'wenshushu': {
         'name': '文叔叔',
         'reg': r'(?:https?:\/\/)?(?:www\.)?wenshushu\.cn\/(?:box|f)\/[\w-]+',
+        'keywords': ('wenshushu.cn/',),
         'pwd_reg': r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{4,6})',
         'open_with_pwd': '{url}?pwd={pwd}'
     }
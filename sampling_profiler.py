@@ -0,0 +1,163 @@
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import log
+
+# 采样间隔与默认采样时长（秒）
+SAMPLE_INTERVAL = 0.005
+DEFAULT_PROFILE_DURATION = 30.0
+# 单个调用栈保留的最大深度，超出部分从栈底截断
+MAX_STACK_DEPTH = 128
+# 输出文件名前缀，与 config.json 位于同一目录
+PROFILE_FILE_PREFIX = "profile"
+
+
+def get_profile_base(config_file: str) -> str:
+    """获取本次分析输出文件的路径前缀（不含扩展名）"""
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    return os.path.join(os.path.dirname(os.path.abspath(config_file)), f"{PROFILE_FILE_PREFIX}-{stamp}")
+
+
+class SamplingProfiler:
+    """采样分析器
+
+    在后台线程中按固定间隔读取所有线程的调用栈（sys._current_frames），
+    不使用 sys.setprofile，未启动时没有任何开销，运行期间也不改变被采样线程的执行。
+    结束后写出两个文件：
+    - .collapsed：每行为 "线程;函数;函数 次数"，可直接用 flamegraph.pl 或 speedscope 打开
+    - .pstats：可用 pstats.Stats 或 snakeviz 查看，时间为采样数乘以采样间隔的估计值
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, output_base: str, duration: float = DEFAULT_PROFILE_DURATION, on_finished=None) -> bool:
+        """开始采样，duration 秒后自动停止并写出结果
+
+        Args:
+            output_base: 输出文件路径前缀，分别加上 .collapsed 和 .pstats
+            duration: 采样时长（秒）
+            on_finished: on_finished(paths)，写出结果后在采样线程中调用，失败时 paths 为 None
+
+        Returns:
+            bool: 是否已启动，已有采样在进行时返回 False
+        """
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(output_base, duration, on_finished),
+                name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+        log.info(f"开始性能采样，持续 {duration:g} 秒")
+        return True
+
+    def stop(self):
+        """提前结束采样，结果仍会写出"""
+        self._stop.set()
+
+    def _run(self, output_base, duration, on_finished):
+        stacks = Counter()
+        own_ident = threading.get_ident()
+        deadline = time.perf_counter() + duration
+        samples = 0
+        started = time.perf_counter()
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stacks[(names.get(ident, f"thread-{ident}"), self._stack_of(frame))] += 1
+            # 不持有被采样线程的栈帧，避免延长其中局部变量的生命周期
+            frame = None
+            samples += 1
+            self._stop.wait(self.interval)
+        elapsed = time.perf_counter() - started
+
+        paths = None
+        try:
+            paths = (self._write_collapsed(output_base + ".collapsed", stacks),
+                     self._write_pstats(output_base + ".pstats", stacks, elapsed / max(samples, 1)))
+            log.info(f"性能采样完成：{samples} 次采样，{elapsed:.1f} 秒，结果已写入 {output_base}.*")
+        except Exception as e:
+            log.error(f"写出性能采样结果失败: {e}")
+        finally:
+            with self._lock:
+                self._thread = None
+        if on_finished is not None:
+            on_finished(paths)
+
+    @staticmethod
+    def _stack_of(frame):
+        """从栈底到栈顶的 (文件, 行号, 函数名) 元组"""
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    @staticmethod
+    def _write_collapsed(path, stacks):
+        lines = Counter()
+        for (thread_name, stack), count in stacks.items():
+            names = [thread_name.replace(";", "_").replace(" ", "_")]
+            names.extend(f"{name} ({os.path.basename(filename)}:{lineno})".replace(";", "_").replace(" ", "_")
+                         for filename, lineno, name in stack)
+            lines[";".join(names)] += count
+        with open(path, 'w', encoding='utf-8') as f:
+            for line, count in sorted(lines.items()):
+                f.write(f"{line} {count}\n")
+        return path
+
+    @staticmethod
+    def _write_pstats(path, stacks, seconds_per_sample):
+        """按 pstats 的 marshal 格式写出
+
+        每个函数记录 (调用次数, 原始调用次数, 自身时间, 累计时间, 调用方)，
+        调用次数取包含该函数的采样数，递归调用在同一个样本中只计一次。
+        """
+        own = Counter()
+        total = Counter()
+        edges = Counter()
+        for (_, stack), count in stacks.items():
+            if not stack:
+                continue
+            own[stack[-1]] += count
+            for func in set(stack):
+                total[func] += count
+            seen_edges = set()
+            for caller, callee in zip(stack, stack[1:]):
+                if (caller, callee) not in seen_edges:
+                    seen_edges.add((caller, callee))
+                    edges[(caller, callee)] += count
+
+        callers = {}
+        for (caller, callee), count in edges.items():
+            callers.setdefault(callee, {})[caller] = (count, count, own[callee] * seconds_per_sample,
+                                                      count * seconds_per_sample)
+        stats = {
+            func: (count, count, own[func] * seconds_per_sample, count * seconds_per_sample, callers.get(func, {}))
+            for func, count in total.items()
+        }
+        with open(path, 'wb') as f:
+            marshal.dump(stats, f)
+        return path
+
+
+# 全局采样分析器
+profiler = SamplingProfiler()
@@ -0,0 +1,211 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import log
+from metrics import metrics
+
+# 已取消的任务超过堆的一半（且不少于该数量）时重建堆，清除取消的任务
+COMPACT_MIN_CANCELLED = 64
+# 执行阻塞操作（读取剪贴板、打开浏览器、等待通知等）的线程数
+BLOCKING_WORKERS = 4
+
+# 任务实际执行时刻与计划时刻之差，以及任务在调度线程中的执行时间
+scheduler_lag_histogram = metrics.histogram("scheduler.lag")
+scheduler_run_histogram = metrics.histogram("scheduler.run_time")
+
+
+class ScheduledJob:
+    """调度器中的一个定时任务，由 Scheduler.schedule 返回"""
+
+    __slots__ = ("deadline", "callback", "args", "cancelled", "_scheduler")
+
+    def __init__(self, scheduler, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self._scheduler = scheduler
+
+    def cancel(self):
+        """取消任务，已经开始执行的任务不受影响"""
+        self._scheduler.cancel(self)
+
+
+class Scheduler:
+    """单线程定时任务调度器
+
+    所有延迟任务放在一个按到期时间排序的堆中，由同一个常驻线程执行，
+    提交和取消都不创建线程：提交为 O(log n)，取消只做标记（O(1)），
+    取消的任务在到期时跳过，积累过多时整体重建堆。
+    任务在调度线程中依次执行，应尽快返回；会阻塞的操作用 run_blocking 交给
+    阻塞线程池，完成后再通过 call_soon 回到调度线程继续处理。
+    shutdown 取消所有未执行的任务，用于退出程序时有序停止。
+    """
+
+    def __init__(self, name: str = "scheduler", blocking_workers: int = BLOCKING_WORKERS):
+        self.name = name
+        self.blocking_workers = blocking_workers
+        self._heap = []
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._condition = threading.Condition(threading.Lock())
+        self._thread = None
+        self._pool = None
+        self._closed = False
+        self._job_stats = {}  # 回调名称 -> [次数, 总执行时间, 最长执行时间]
+
+    def schedule(self, delay: float, callback, *args) -> ScheduledJob:
+        """在 delay 秒后于调度线程中调用 callback(*args)
+
+        Returns:
+            ScheduledJob: 可用于取消任务
+        """
+        job = ScheduledJob(self, time.perf_counter() + max(0.0, delay), callback, args)
+        with self._condition:
+            if self._closed:
+                job.cancelled = True
+                return job
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            heapq.heappush(self._heap, (job.deadline, next(self._counter), job))
+            # 新任务成为最早到期的任务时才需要唤醒调度线程
+            if self._heap[0][2] is job:
+                self._condition.notify()
+        return job
+
+    def call_soon(self, callback, *args) -> ScheduledJob:
+        """尽快在调度线程中调用 callback(*args)"""
+        return self.schedule(0.0, callback, *args)
+
+    def run_blocking(self, callback, *args):
+        """在阻塞线程池中调用 callback(*args)
+
+        Returns:
+            Future: 调用结果；调度器已关闭时为已取消的 Future
+        """
+        with self._condition:
+            if self._pool is None and not self._closed:
+                self._pool = ThreadPoolExecutor(max_workers=self.blocking_workers,
+                                                thread_name_prefix=f"{self.name}-blocking")
+            pool = self._pool
+        if pool is None:
+            future = Future()
+            future.cancel()
+            return future
+        try:
+            return pool.submit(callback, *args)
+        except RuntimeError:
+            # 与 shutdown 同时提交时线程池已关闭
+            future = Future()
+            future.cancel()
+            return future
+
+    def call_when_done(self, future, callback, *args):
+        """future 完成后在调度线程中调用 callback(future, *args)，已取消时不调用"""
+        def done(completed):
+            if not completed.cancelled():
+                self.call_soon(callback, completed, *args)
+        future.add_done_callback(done)
+
+    def cancel(self, job: ScheduledJob):
+        """取消任务（重复取消无副作用）"""
+        with self._condition:
+            if job.cancelled:
+                return
+            job.cancelled = True
+            self._cancelled += 1
+            if self._cancelled >= COMPACT_MIN_CANCELLED and self._cancelled * 2 > len(self._heap):
+                self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+
+    def pending(self) -> int:
+        """尚未执行且未取消的任务数"""
+        with self._condition:
+            return len(self._heap) - self._cancelled
+
+    def stats(self) -> dict:
+        """各回调的执行次数与执行时间（秒），按总执行时间排序"""
+        with self._condition:
+            pending = len(self._heap) - self._cancelled
+            jobs = {name: list(values) for name, values in self._job_stats.items()}
+        return {
+            "pending": pending,
+            "jobs": {
+                name: {"count": count, "total": total, "avg": total / count, "max": maximum}
+                for name, (count, total, maximum) in sorted(jobs.items(), key=lambda item: -item[1][1])
+            },
+        }
+
+    def shutdown(self, timeout: float = 1.0):
+        """取消所有未执行的任务并停止调度线程
+
+        正在执行的任务和阻塞线程池中已开始的调用会在超时前等待其结束，
+        之后提交的任务直接被取消。
+        """
+        with self._condition:
+            self._closed = True
+            for _, _, job in self._heap:
+                job.cancelled = True
+            self._heap.clear()
+            self._cancelled = 0
+            self._condition.notify()
+            thread, pool = self._thread, self._pool
+        deadline = time.perf_counter() + timeout
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(max(0.0, deadline - time.perf_counter()))
+        if pool is not None:
+            for worker in list(getattr(pool, "_threads", ())):
+                worker.join(max(0.0, deadline - time.perf_counter()))
+
+    def _run(self):
+        """调度线程：等待最早到期的任务并执行"""
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    deadline, _, job = self._heap[0]
+                    if job.cancelled:
+                        heapq.heappop(self._heap)
+                        self._cancelled -= 1
+                        continue
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        heapq.heappop(self._heap)
+                        # 出堆后不再计入取消数，之后的 cancel 只是标记
+                        job.cancelled = True
+                        break
+                    self._condition.wait(remaining)
+            started = time.perf_counter()
+            scheduler_lag_histogram.observe(started - deadline)
+            name = getattr(job.callback, "__qualname__", None) or repr(job.callback)
+            try:
+                job.callback(*job.args)
+            except Exception as e:
+                log.error(f"定时任务 {name} 出错: {e}")
+            elapsed = time.perf_counter() - started
+            scheduler_run_histogram.observe(elapsed)
+            with self._condition:
+                stats = self._job_stats.get(name)
+                if stats is None:
+                    stats = self._job_stats[name] = [0, 0.0, 0.0]
+                stats[0] += 1
+                stats[1] += elapsed
+                if elapsed > stats[2]:
+                    stats[2] = elapsed
+            job = None
+
+
+# 全局调度器
+scheduler = Scheduler()
+metrics.register_collector("scheduler", scheduler.stats)
@@ -0,0 +1,181 @@
+import hmac
+import json
+import os
+import secrets
+import socket
+import threading
+
+import log
+
+# 实例信息文件名，与 config.json 位于同一目录，内容为监听端口和访问令牌
+INSTANCE_FILE_NAME = "instance.json"
+# 客户端连接与等待回复的超时时间（秒），超时后转为独立处理
+CONNECT_TIMEOUT = 0.3
+REPLY_TIMEOUT = 1.0
+# 单条消息的最大字节数
+MAX_MESSAGE_SIZE = 64 * 1024
+
+
+def get_instance_file(config_file: str) -> str:
+    """获取实例信息文件路径
+
+    Args:
+        config_file: 配置文件路径
+
+    Returns:
+        str: 与配置文件同目录的实例信息文件
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(config_file)), INSTANCE_FILE_NAME)
+
+
+def forward_to_instance(instance_file: str, message: dict, timeout: float = CONNECT_TIMEOUT) -> bool:
+    """把请求转交给正在运行的实例
+
+    Args:
+        instance_file: 实例信息文件
+        message: 请求内容，必须包含 "action"
+        timeout: 连接超时时间（秒）
+
+    Returns:
+        bool: 运行中的实例已接收请求；没有实例或连接失败时返回 False，由调用方自行处理
+    """
+    try:
+        with open(instance_file, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        port, token = int(info["port"]), str(info["token"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+    data = json.dumps(dict(message, token=token), ensure_ascii=False).encode("utf-8") + b"\n"
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=timeout) as conn:
+            conn.settimeout(REPLY_TIMEOUT)
+            conn.sendall(data)
+            reply = conn.recv(16)
+    except OSError as e:
+        log.debug(f"无法连接到运行中的实例: {e}")
+        return False
+    return reply.startswith(b"ok")
+
+
+class InstanceServer:
+    """在托盘程序中接收其他进程转交的请求
+
+    监听 127.0.0.1 的随机端口，端口和随机令牌写入实例信息文件，
+    只接受带有正确令牌的请求。收到请求后立即回复，再通过 submit 调用处理函数
+    （默认为每个请求启动一个线程），处理函数中弹出的通知等耗时操作不会阻塞后续请求。
+    """
+
+    def __init__(self, instance_file: str, handler, submit=None):
+        """
+        Args:
+            instance_file: 实例信息文件
+            handler: handler(message)，message 为去掉令牌后的请求字典
+            submit: submit(function, message)，在其他线程中执行 function(message)，例如 scheduler.run_blocking
+        """
+        self.instance_file = instance_file
+        self.handler = handler
+        self.submit = submit
+        self._token = secrets.token_hex(16)
+        self._socket = None
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._socket.getsockname()[1] if self._socket is not None else None
+
+    def start(self) -> bool:
+        """开始监听并写入实例信息文件
+
+        Returns:
+            bool: 是否启动成功
+        """
+        try:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.bind(("127.0.0.1", 0))
+            self._socket.listen(8)
+            self._write_instance_file()
+        except OSError as e:
+            log.error(f"启动实例通信服务失败: {e}")
+            self.close()
+            return False
+
+        self._thread = threading.Thread(target=self._serve, name="instance-server", daemon=True)
+        self._thread.start()
+        log.debug(f"实例通信服务已启动，端口 {self.port}")
+        return True
+
+    def close(self):
+        """停止监听并删除实例信息文件"""
+        if self._socket is None:
+            return
+        try:
+            # 只删除自己写入的文件，避免删掉之后启动的实例的信息
+            with open(self.instance_file, 'r', encoding='utf-8') as f:
+                if json.load(f).get("token") == self._token:
+                    os.remove(self.instance_file)
+        except (OSError, ValueError):
+            pass
+        try:
+            self._socket.close()
+        except OSError:
+            pass
+        self._socket = None
+
+    def _write_instance_file(self):
+        """原子写入端口和令牌"""
+        temp_path = self.instance_file + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"port": self.port, "token": self._token, "pid": os.getpid()}, f)
+        os.replace(temp_path, self.instance_file)
+
+    def _serve(self):
+        """后台线程主循环"""
+        while self._socket is not None:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                break
+            # 单个异常请求不能结束接受连接的循环
+            try:
+                try:
+                    message = self._receive(conn)
+                finally:
+                    conn.close()
+                if message is not None:
+                    if self.submit is not None:
+                        self.submit(self._dispatch, message)
+                    else:
+                        threading.Thread(target=self._dispatch, args=(message,), daemon=True).start()
+            except Exception as e:
+                log.error(f"处理实例连接失败: {e}")
+
+    def _receive(self, conn):
+        """读取一条请求并回复，令牌不正确时返回 None"""
+        conn.settimeout(REPLY_TIMEOUT)
+        data = b""
+        try:
+            while not data.endswith(b"\n") and len(data) < MAX_MESSAGE_SIZE:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+            message = json.loads(data.decode("utf-8"))
+            token = message.pop("token", "")
+            # 按字节比较，含非 ASCII 字符的令牌不会让 compare_digest 抛出 TypeError
+            if not isinstance(token, str) or not hmac.compare_digest(token.encode("utf-8"),
+                                                                      self._token.encode("utf-8")):
+                log.warning("收到令牌不正确的实例请求，已忽略")
+                conn.sendall(b"denied\n")
+                return None
+            conn.sendall(b"ok\n")
+            return message
+        except (OSError, ValueError, AttributeError) as e:
+            log.debug(f"读取实例请求失败: {e}")
+            return None
+
+    def _dispatch(self, message):
+        try:
+            self.handler(message)
+        except Exception as e:
+            log.error(f"处理实例请求失败: {e}")
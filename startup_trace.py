@@ -0,0 +1,114 @@
+import threading
+import time
+
+import log
+
+# 各阶段的耗时预算（秒），调试报告中标出超出预算的阶段，便于发现启动变慢
+STARTUP_BUDGETS = {
+    "导入模块": 1.5,
+    "加载配置": 0.05,
+    "载入历史": 0.3,
+    "Qt 初始化": 0.3,
+    "预览控制器": 0.05,
+    "构建预览窗口": 0.5,
+    "字体加载": 0.3,
+    "托盘图标": 0.3,
+    "托盘就绪": 3.0,
+    "首个剪贴板快照": 3.0,
+}
+# 全部到达后输出启动报告的里程碑
+STARTUP_MILESTONES = ("托盘就绪", "首个剪贴板快照")
+
+
+class StartupTrace:
+    """记录启动过程中各阶段的耗时
+
+    阶段（phase）记录一段代码的开始和结束，可以嵌套；里程碑（mark）只记录到达的时刻，
+    用于托盘显示、首次读取剪贴板这类发生在其他线程中的事件。
+    所有时间都相对于本模块被导入的时刻（main.py 最先导入本模块）。
+    """
+
+    def __init__(self, milestones=STARTUP_MILESTONES, budgets=None):
+        self.origin = time.perf_counter()
+        self.milestones = tuple(milestones)
+        self.budgets = STARTUP_BUDGETS if budgets is None else budgets
+        self.phases = []
+        self.marks = {}
+        self._depth = threading.local()
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def phase(self, name: str):
+        """记录一个阶段的上下文管理器"""
+        return _Phase(self, name)
+
+    def mark(self, name: str):
+        """记录到达里程碑的时刻，只记录第一次；全部里程碑到达后输出报告"""
+        elapsed = time.perf_counter() - self.origin
+        with self._lock:
+            if name in self.marks:
+                return
+            self.marks[name] = elapsed
+            complete = not self._reported and all(m in self.marks for m in self.milestones)
+            if complete:
+                self._reported = True
+        if complete:
+            self.report()
+
+    def _record(self, name, start, end, depth):
+        with self._lock:
+            self.phases.append((name, start - self.origin, end - self.origin, depth))
+
+    def exceeded(self):
+        """超出预算的阶段和里程碑
+
+        Returns:
+            list: (名称, 耗时, 预算) 列表
+        """
+        with self._lock:
+            durations = [(name, end - start) for name, start, end, _ in self.phases]
+            durations.extend(self.marks.items())
+        return [(name, value, self.budgets[name]) for name, value in durations
+                if name in self.budgets and value > self.budgets[name]]
+
+    def lines(self):
+        """生成报告文本，每个阶段或里程碑一行"""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+            marks = sorted(self.marks.items(), key=lambda item: item[1])
+        over = {name for name, _, _ in self.exceeded()}
+        entries = [(start, f"{'  ' * depth}{name}: {(end - start) * 1000:.1f} ms（{start * 1000:.0f} ms 起）", name)
+                   for name, start, end, depth in phases]
+        entries.extend((elapsed, f"{name}: 启动后 {elapsed * 1000:.0f} ms", name) for name, elapsed in marks)
+        entries.sort(key=lambda entry: entry[0])
+        return [text + ("  [超出预算]" if name in over else "") for _, text, name in entries]
+
+    def report(self):
+        """以调试级别输出启动报告（--debug 时可见）"""
+        if not log.is_enabled_for(log.DEBUG):
+            return
+        log.debug("启动耗时：\n" + "\n".join(self.lines()))
+
+
+class _Phase:
+    __slots__ = ("_trace", "_name", "_start", "_depth")
+
+    def __init__(self, trace, name):
+        self._trace = trace
+        self._name = name
+
+    def __enter__(self):
+        local = self._trace._depth
+        self._depth = getattr(local, "value", 0)
+        local.value = self._depth + 1
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self._trace._depth.value = self._depth
+        self._trace._record(self._name, self._start, end, self._depth)
+
+
+# 全局启动记录
+startup_trace = StartupTrace()
@@ -0,0 +1,73 @@
+import os
+import signal
+import sys
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from analysis_pool import AnalysisPool
+from text_analysis import classify_text
+
+# 分析进程处理需要约一秒以上的文本，便于在执行中途结束进程或超时
+SLOW_TEXT = "def handler(event): value = compute(event['x'] + 1)  # 注释\n" * 300_000
+WAIT_TIMEOUT = 30.0
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="通过 /dev/shm 检查共享内存是否释放")
+
+
+@pytest.fixture
+def pool():
+    analysis = AnalysisPool(workers=1, threshold=16)
+    yield analysis
+    analysis.shutdown()
+
+
+def shm_exists(shm):
+    return os.path.exists(f"/dev/shm/{shm.name.lstrip('/')}")
+
+
+def wait_until(predicate, timeout=WAIT_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def shm_names():
+    return set(os.listdir("/dev/shm"))
+
+
+def test_offloaded_round_trip(pool):
+    text = "def main(): pass\n" * 4
+    result = pool.run("classify_text", text, True, timeout=WAIT_TIMEOUT)
+    assert result["type"] == classify_text(text, True)["type"]
+    assert not pool._pending
+
+
+def test_killed_worker_fails_its_job_and_is_replaced(pool):
+    pool.run("classify_text", "x" * 64, True, timeout=WAIT_TIMEOUT)
+    future = pool.submit("classify_text", SLOW_TEXT, True)
+    (_, shm, _), = pool._pending.values()
+    wait_until(lambda: pool._running)
+    worker = pool._processes[0]
+    os.kill(worker.pid, signal.SIGKILL)
+
+    with pytest.raises(RuntimeError, match="意外退出"):
+        future.result(timeout=WAIT_TIMEOUT)
+    assert not pool._pending
+    assert not shm_exists(shm)
+
+    wait_until(lambda: pool._processes and pool._processes[0] is not worker)
+    assert pool._processes[0].is_alive()
+    assert pool.run("classify_text", "x" * 64, True, timeout=WAIT_TIMEOUT) is not None
+
+
+def test_run_timeout_drops_pending_job(pool):
+    pool.run("classify_text", "x" * 64, True, timeout=WAIT_TIMEOUT)
+    before = shm_names()
+    with pytest.raises(FutureTimeoutError):
+        pool.run("classify_text", SLOW_TEXT, True, timeout=0.01)
+    # 分析进程仍在执行放弃的任务，其结果返回后直接丢弃
+    assert not pool._pending
+    assert shm_names() <= before
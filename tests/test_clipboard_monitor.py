@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在单独的进程中以替身模块导入 func，不影响其他测试
+SCRIPT = """
+import sys
+sys.path.insert(0, "benchmarks")
+from bench_startup import install_stubs
+install_stubs()
+import log
+log.set_console(False)
+import func
+from clipboard_snapshot import ClipboardSnapshot
+
+scheduled = []
+func.scheduler.schedule = lambda delay, callback, *args: scheduled.append(callback)
+func.previous_content = ClipboardSnapshot("文本", "old", sequence=1)
+
+def broken(*args):
+    raise RuntimeError("boom")
+
+# 处理变化时出错
+func.dispatch_clipboard_change = broken
+func.handle_clipboard_content(ClipboardSnapshot("文本", "new", sequence=2))
+assert scheduled == [func.poll_clipboard], scheduled
+
+# 检查剪贴板时出错
+func.get_sequence_number = broken
+func.poll_clipboard()
+assert scheduled == [func.poll_clipboard] * 2, scheduled
+
+# 提交读取任务时出错
+func.get_sequence_number = lambda: 3
+func.scheduler.run_blocking = broken
+func.poll_clipboard()
+assert scheduled == [func.poll_clipboard] * 3, scheduled
+print("ok")
+"""
+
+
+def test_monitor_keeps_polling_after_errors():
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=REPO_DIR, capture_output=True,
+                            text=True, encoding="utf-8", timeout=60)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "ok" in result.stdout
@@ -0,0 +1,74 @@
+from clipboard_snapshot import ClipboardSnapshot
+from clipboard_state import ClipboardState
+
+
+class StubClipboard:
+    """模拟系统剪贴板：序列号可手动推进，记录读取次数"""
+
+    def __init__(self, text="hello", sequence=1):
+        self.text = text
+        self.sequence = sequence
+        self.reads = 0
+
+    def get_sequence_number(self):
+        return self.sequence
+
+    def read_snapshot(self):
+        self.reads += 1
+        return ClipboardSnapshot.from_payload("文本", self.text, self.text, sequence=self.sequence)
+
+    def copy(self, text):
+        self.text = text
+        self.sequence += 1
+
+
+def make_state(clipboard):
+    state = ClipboardState()
+    state.configure(sequence_source=clipboard.get_sequence_number, refresher=clipboard.read_snapshot)
+    return state
+
+
+def test_ctrl_hold_preview_does_not_read_unchanged_clipboard():
+    clipboard = StubClipboard()
+    state = make_state(clipboard)
+    # 监视循环读取一次并发布
+    state.publish(clipboard.read_snapshot())
+    clipboard.reads = 0
+
+    # 多次按住 Ctrl 预览，序列号未变化
+    for _ in range(100):
+        assert not state.is_stale()
+        snapshot = state.get_fresh()
+        assert snapshot.content == "hello"
+
+    assert clipboard.reads == 0
+
+
+def test_changed_clipboard_is_read_once_and_published():
+    clipboard = StubClipboard()
+    state = make_state(clipboard)
+    state.publish(clipboard.read_snapshot())
+    received = []
+    state.subscribe(received.append)
+    clipboard.reads = 0
+
+    clipboard.copy("world")
+    assert state.is_stale()
+    assert state.get_fresh().content == "world"
+    # 刷新后的快照已发布，再次预览不会重复读取
+    assert state.get_fresh().content == "world"
+
+    assert clipboard.reads == 1
+    assert [snapshot.content for snapshot in received] == ["world"]
+    assert state.version == 2
+
+
+def test_republishing_same_content_does_not_notify():
+    clipboard = StubClipboard()
+    state = make_state(clipboard)
+    received = []
+    state.subscribe(received.append)
+
+    assert state.publish(clipboard.read_snapshot())
+    assert not state.publish(clipboard.read_snapshot())
+    assert len(received) == 1
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import namedtuple
+
+import pytest
+
+from ctrl_hold import KEY_DOWN, KEY_UP, CtrlHoldDetector, hook_repeat_counter
+from scheduler import Scheduler
+
+HOLD_DELAY = 0.05
+# 等待回调的最长时间（秒），只在失败时才会等满
+CALLBACK_TIMEOUT = 2.0
+
+KeyEvent = namedtuple("KeyEvent", "event_type name")
+
+
+class KeyInjector:
+    """代替键盘钩子，向检测器注入按键事件并记录回调"""
+
+    def __init__(self, hold_delay=HOLD_DELAY):
+        self.scheduler = Scheduler(name="test-scheduler")
+        self.events = []
+        self.changed = threading.Condition()
+        self.detector = CtrlHoldDetector(hold_delay, self.on_hold, self.on_release, scheduler=self.scheduler)
+
+    def on_hold(self):
+        self._record(("hold", self.detector.pressed))
+
+    def on_release(self, held_for):
+        self._record(("release", held_for))
+
+    def _record(self, event):
+        with self.changed:
+            self.events.append(event)
+            self.changed.notify_all()
+
+    def down(self, name="left ctrl"):
+        self.detector.handle_event(KeyEvent(KEY_DOWN, name))
+
+    def up(self, name="left ctrl"):
+        self.detector.handle_event(KeyEvent(KEY_UP, name))
+
+    def wait_for(self, count):
+        """等待回调数达到 count，返回回调类型列表"""
+        with self.changed:
+            assert self.changed.wait_for(lambda: len(self.events) >= count, CALLBACK_TIMEOUT), self.events
+            return [kind for kind, _ in self.events]
+
+    def settle(self):
+        """等待已经到期或已提交的任务全部执行"""
+        done = threading.Event()
+        self.scheduler.schedule(HOLD_DELAY * 2, done.set)
+        assert done.wait(CALLBACK_TIMEOUT)
+
+
+@pytest.fixture
+def keys():
+    injector = KeyInjector()
+    yield injector
+    injector.scheduler.shutdown()
+
+
+def test_tap_does_not_trigger(keys):
+    keys.down()
+    keys.up()
+    keys.settle()
+    assert keys.events == []
+    assert not keys.detector.pressed
+
+
+def test_hold_with_auto_repeat(keys):
+    repeats = hook_repeat_counter.value
+    keys.down()
+    # 按住时系统持续发送自动重复的按下事件，不能重新开始计时
+    for _ in range(20):
+        keys.down()
+        time.sleep(HOLD_DELAY / 10)
+    assert keys.wait_for(1) == ["hold"]
+    assert keys.events[0] == ("hold", True)
+    assert hook_repeat_counter.value - repeats == 20
+
+    keys.up()
+    assert keys.wait_for(2) == ["hold", "release"]
+    held_for = keys.events[1][1]
+    assert held_for >= HOLD_DELAY
+    assert not keys.detector.pressed
+
+
+def test_left_right_overlap(keys):
+    keys.down("left ctrl")
+    keys.down("right ctrl")
+    # 松开其中一个时另一个仍按着，计时继续
+    keys.up("left ctrl")
+    assert keys.wait_for(1) == ["hold"]
+    assert keys.detector.pressed
+    keys.settle()
+    assert len(keys.events) == 1
+
+    keys.up("right ctrl")
+    assert keys.wait_for(2) == ["hold", "release"]
+
+
+def test_release_cancels_pending_hold_across_keys(keys):
+    keys.down("right ctrl")
+    keys.down("left ctrl")
+    keys.up("right ctrl")
+    keys.up("left ctrl")
+    keys.settle()
+    assert keys.events == []
+
+
+def test_re_press_after_hold(keys):
+    for count in (2, 4):
+        keys.down()
+        keys.wait_for(count - 1)
+        keys.up()
+        keys.wait_for(count)
+    assert [kind for kind, _ in keys.events] == ["hold", "release", "hold", "release"]
+
+
+def test_stray_release_is_ignored(keys):
+    keys.up("right ctrl")
+    keys.down("left ctrl")
+    # 没有按下过的右 Ctrl 松开，不影响左 Ctrl 的计时
+    keys.up("right ctrl")
+    assert keys.wait_for(1) == ["hold"]
+    keys.up("left ctrl")
+    assert keys.wait_for(2) == ["hold", "release"]
+
+
+def test_rapid_taps_stay_bounded(keys):
+    taps = 10000
+    baseline = threading.active_count()
+    peak = baseline
+    started = time.perf_counter()
+    for index in range(taps):
+        keys.down()
+        keys.up()
+        if index % 100 == 0:
+            peak = max(peak, threading.active_count())
+    elapsed = time.perf_counter() - started
+    print(f"{taps} 次短按：每次 {elapsed / taps * 1e6:.1f} µs，线程数 {baseline} -> 最多 {peak}")
+
+    # 只有调度线程一个常驻线程，取消的计时任务不会积累
+    assert peak <= baseline + 1
+    keys.settle()
+    assert keys.scheduler.pending() == 0
+    assert len(keys.scheduler._heap) < 100
+    assert keys.events == []
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_script(code):
+    return subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True,
+                          text=True, encoding="utf-8", timeout=30)
+
+
+def test_error_before_exit_is_written(tmp_path):
+    log_file = tmp_path / "app.log"
+    result = run_script(
+        "import log, sys\n"
+        f"log.set_log_file({str(log_file)!r})\n"
+        "log.error('启动失败: %s', 'boom')\n"
+        "sys.exit(3)\n"
+    )
+    assert result.returncode == 3
+    assert "启动失败: boom" in result.stdout
+    assert "ERROR" in log_file.read_text(encoding="utf-8")
+
+
+def test_main_reports_unsupported_platform():
+    if sys.platform == "win32":
+        return
+    result = run_script("import runpy; runpy.run_path('main.py', run_name='__main__')")
+    assert result.returncode == 1
+    assert "这个程序仅适用于Windows系统" in result.stdout
+
+
+def test_failed_rotation_keeps_writing(tmp_path, monkeypatch):
+    import log
+
+    path = tmp_path / "app.log"
+    sink = log._RotatingFile(str(path), max_bytes=100, backup_count=2)
+    sink.write("a" * 90 + "\n")
+
+    def locked(source, target):
+        # Windows 上其他进程打开着日志文件时重命名失败
+        raise PermissionError(13, "文件被占用", source)
+
+    monkeypatch.setattr(log.os, "replace", locked)
+    sink.write("b" * 20 + "\n")
+    sink.write("c" * 20 + "\n")
+    monkeypatch.undo()
+    sink.flush()
+    assert path.read_text(encoding="utf-8").endswith("b" * 20 + "\n" + "c" * 20 + "\n")
+
+    # 再写入 max_bytes 之后重新尝试轮换
+    sink.write("d" * 120 + "\n")
+    sink.close()
+    assert (tmp_path / "app.log.1").exists()
+    assert path.read_text(encoding="utf-8") == "d" * 120 + "\n"
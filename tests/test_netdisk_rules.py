@@ -0,0 +1,52 @@
+import re
+
+import pytest
+
+from netdisk_rules import NETDISK_RULES
+from text_analysis import detect_netdisk_link_raw
+
+# 每个规则的示例链接
+SAMPLE_LINKS = {
+    'baidu': 'https://pan.baidu.com/s/1AbC-dEf_g',
+    'aliyun': 'https://www.alipan.com/s/AbCdEf123',
+    'lanzou': 'https://wwi.lanzoux.com/iAbCd123',
+    '123pan': 'https://www.123pan.com/s/abc-DEF',
+    'tianyi': 'https://cloud.189.cn/t/AbCdEf',
+    'quark': 'https://pan.quark.cn/s/abc123',
+    'weiyun': 'https://share.weiyun.com/AbC123',
+    'caiyun': 'https://caiyun.139.com/m/i?AbC123',
+    'xunlei': 'https://pan.xunlei.com/s/VAbc_123',
+    '360': 'https://yunpan.360.cn/surl_abc123',
+    '115': 'https://115.com/s/sw3abc',
+    'cowtransfer': 'https://cowtransfer.com/s/abc-123',
+    'ctfile': 'https://url.ctfile.com/f/123-456',
+    'flowus': 'https://flowus.cn/team/share/abc-123',
+    'mega': 'https://mega.nz/file/AbC!123',
+    'weibo': 'https://vdisk.weibo.com/s/AbC123',
+    'wenshushu': 'https://www.wenshushu.cn/f/abc-123',
+}
+
+
+def test_every_rule_has_a_sample():
+    assert set(SAMPLE_LINKS) == set(NETDISK_RULES)
+
+
+@pytest.mark.parametrize("disk_type", sorted(NETDISK_RULES))
+def test_keywords_cover_rule_matches(disk_type):
+    rule = NETDISK_RULES[disk_type]
+    text = f"分享文件：{SAMPLE_LINKS[disk_type]} 提取码: ab12"
+    match = re.search(rule['reg'], text)
+    assert match is not None
+    # 关键词过滤不能漏掉正则能匹配的链接
+    assert any(keyword in match.group(0) for keyword in rule['keywords'])
+
+
+def test_detects_link_after_prefilter():
+    result = detect_netdisk_link_raw(f"代码片段 def main(): pass\n分享：{SAMPLE_LINKS['quark']} 提取码: ab12")
+    assert result['type'] == 'quark'
+    assert result['pwd'] == 'ab12'
+
+
+def test_text_without_keywords_is_skipped():
+    text = "def handler(event): value = compute(event['x'] + 1)\n" * 1000
+    assert detect_netdisk_link_raw(text) is None
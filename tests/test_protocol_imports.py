@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 协议处理路径不应加载的托盘程序依赖
+HEAVY_MODULES = ("PyQt5", "pystray", "PIL", "func", "win32clipboard")
+# netdisk_protocol 及其依赖的累计导入耗时上限（秒），正常约为 20-30 ms
+IMPORT_TIME_BUDGET = 0.5
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable, *args], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+
+
+def test_protocol_handler_does_not_import_tray_dependencies():
+    code = (
+        "import sys, netdisk_protocol\n"
+        f"print(' '.join(name for name in sys.modules if name.split('.')[0] in {HEAVY_MODULES!r}))\n"
+    )
+    loaded = run_python("-c", code).stdout.split()
+    assert loaded == []
+
+
+def test_protocol_handler_import_time():
+    # -X importtime 的每行为 "import time: 自身耗时 | 累计耗时 | 模块名"，单位微秒
+    report = run_python("-X", "importtime", "-c", "import netdisk_protocol").stderr
+    cumulative = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total) / 1e6
+
+    assert not [name for name in cumulative if name.split(".")[0] in HEAVY_MODULES]
+    assert cumulative["netdisk_protocol"] < IMPORT_TIME_BUDGET
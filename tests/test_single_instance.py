@@ -0,0 +1,124 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from single_instance import CONNECT_TIMEOUT, InstanceServer, forward_to_instance
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 转交请求的耗时上限（秒），本机回环连接通常在 1 ms 以内
+FORWARD_LATENCY_BUDGET = 0.05
+# 从启动协议处理进程到托盘程序收到请求的耗时上限（秒），主要是解释器启动时间
+ACTIVATION_LATENCY_BUDGET = 2.0
+
+
+class Receiver:
+    """记录收到的请求及时刻"""
+
+    def __init__(self):
+        self.messages = []
+        self.received = threading.Event()
+
+    def __call__(self, message):
+        self.messages.append((time.perf_counter(), message))
+        self.received.set()
+
+    def wait(self, timeout=5.0):
+        assert self.received.wait(timeout), "运行中的实例没有收到请求"
+        self.received.clear()
+        return self.messages[-1]
+
+
+@pytest.fixture
+def server(tmp_path):
+    receiver = Receiver()
+    instance = InstanceServer(str(tmp_path / "instance.json"), receiver)
+    assert instance.start()
+    yield instance, receiver
+    instance.close()
+
+
+def test_forward_latency(server):
+    instance, receiver = server
+    latencies = []
+    for _ in range(100):
+        started = time.perf_counter()
+        assert forward_to_instance(instance.instance_file, {"action": "open_netdisk", "url": "u", "pwd": "p"})
+        received_at, message = receiver.wait()
+        latencies.append(received_at - started)
+    assert message == {"action": "open_netdisk", "url": "u", "pwd": "p"}
+    print(f"转交请求耗时：中位数 {statistics.median(latencies) * 1000:.3f} ms，最长 {max(latencies) * 1000:.3f} ms")
+    assert statistics.median(latencies) < FORWARD_LATENCY_BUDGET
+
+
+def test_protocol_activation_end_to_end(server):
+    instance, receiver = server
+    code = (
+        "import netdisk_protocol\n"
+        f"netdisk_protocol.get_instance_file = lambda config_file: {instance.instance_file!r}\n"
+        "netdisk_protocol.handle_netdisk_protocol(url='netdisk://pan.baidu.com/s/1abc?pwd=x1y2')\n"
+    )
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, check=True, timeout=30)
+    exited_at = time.perf_counter()
+    received_at, message = receiver.wait()
+    print(f"协议激活：{(received_at - started) * 1000:.1f} ms 后收到请求，{(exited_at - started) * 1000:.1f} ms 后进程退出")
+    assert message == {"action": "open_netdisk", "url": "https://pan.baidu.com/s/1abc", "pwd": "x1y2"}
+    assert received_at - started < ACTIVATION_LATENCY_BUDGET
+
+
+def test_wrong_token_is_denied(server, tmp_path):
+    instance, receiver = server
+    forged = tmp_path / "forged.json"
+    forged.write_text(json.dumps({"port": instance.port, "token": "forged"}), encoding="utf-8")
+    assert not forward_to_instance(str(forged), {"action": "open_netdisk", "url": "u"})
+    time.sleep(0.05)
+    assert receiver.messages == []
+
+
+def test_no_instance_falls_back_quickly(server, tmp_path):
+    instance, _ = server
+    instance_file = instance.instance_file
+    instance.close()
+    assert not os.path.exists(instance_file)
+
+    started = time.perf_counter()
+    assert not forward_to_instance(instance_file, {"action": "open_netdisk", "url": "u"})
+    # 实例信息文件残留但进程已退出时，连接被拒绝，同样立即返回
+    with open(instance_file, "w", encoding="utf-8") as f:
+        json.dump({"port": instance.port or 1, "token": "stale"}, f)
+    assert not forward_to_instance(instance_file, {"action": "open_netdisk", "url": "u"})
+    assert time.perf_counter() - started < CONNECT_TIMEOUT
+
+
+def send_raw(port, data):
+    with socket.create_connection(("127.0.0.1", port), timeout=1.0) as conn:
+        conn.sendall(data)
+        conn.shutdown(socket.SHUT_WR)
+        try:
+            return conn.recv(64)
+        except OSError:
+            return b""
+
+
+def test_malformed_requests_do_not_stop_server(server):
+    instance, receiver = server
+    malformed = [
+        json.dumps({"action": "open_netdisk", "token": "令牌"}, ensure_ascii=False).encode("utf-8") + b"\n",
+        b"[1, 2, 3]\n",
+        b"\xff\xfe\n",
+        b"",
+    ]
+    for data in malformed:
+        assert send_raw(instance.port, data) in (b"", b"denied\n")
+    assert receiver.messages == []
+
+    # 异常请求之后仍能正常转交
+    assert forward_to_instance(instance.instance_file, {"action": "open_netdisk", "url": "u"})
+    assert receiver.wait()[1] == {"action": "open_netdisk", "url": "u"}
@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_headless_startup_within_budget():
+    # 替身模块会替换 sys.modules 中的条目，在单独的进程中运行，不影响其他测试
+    result = subprocess.run([sys.executable, os.path.join("benchmarks", "bench_startup.py")], cwd=REPO_DIR,
+                            capture_output=True, text=True, encoding="utf-8", timeout=60)
+    print(result.stdout)
+    assert "托盘就绪" in result.stdout
+    assert "首个剪贴板快照" in result.stdout
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,232 @@
+import re
+import time
+
+from netdisk_rules import NETDISK_RULES
+
+# 尝试导入语法高亮库
+try:
+    from pygments import highlight
+    from pygments.lexers import get_lexer_by_name, guess_lexer
+    from pygments.formatters import HtmlFormatter
+    PYGMENTS_AVAILABLE = True
+except ImportError:
+    PYGMENTS_AVAILABLE = False
+
+# 代码高亮的配色
+HIGHLIGHT_STYLE = 'monokai'
+
+
+def clean_text_for_netdisk_detection(text):
+    """
+    清理文本，去除可能的干扰字符，为网盘链接检测做准备
+    """
+    # 1. 移除所有emoji字符
+    emoji_pattern = re.compile(
+        "["
+        "\U0001F600-\U0001F64F"  # emoticons
+        "\U0001F300-\U0001F5FF"  # symbols & pictographs
+        "\U0001F680-\U0001F6FF"  # transport & map symbols
+        "\U0001F700-\U0001F77F"  # alchemical symbols
+        "\U0001F780-\U0001F7FF"  # Geometric Shapes
+        "\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
+        "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
+        "\U0001FA00-\U0001FA6F"  # Chess Symbols
+        "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
+        "\U00002702-\U000027B0"  # Dingbats
+        "\U000024C2-\U0001F251"
+        "]+", flags=re.UNICODE)
+    text = emoji_pattern.sub(r'', text)
+    
+    # 2. 尝试移除中文字符（因为链接中通常不含中文）
+    text = re.sub(r'[\u4e00-\u9fff]', '', text)
+    
+    # 3. 尝试移除一些常见的干扰符号（保留URL中可能出现的基本符号）
+    text = re.sub(r'[@#$%^&*()_+=<>{}\[\]|\\\'",]', '', text)
+    
+    return text
+
+
+
+def is_url(text):
+    """检查文本是否为URL"""
+    url_pattern = re.compile(
+        r'^(https?|ftp)://[^\s/$.?#].[^\s]*$|'
+        r'^www\.[^\s/$.?#].[^\s]*$|'
+        r'^[^\s/$.?#]+\.(com|net|org|edu|gov|mil|io|co|ai|app|dev|top|xyz)[^\s]*$'
+    )
+    return url_pattern.match(text) is not None
+
+
+
+def is_email(text):
+    """检查文本是否为邮箱地址"""
+    email_pattern = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+    return email_pattern.match(text) is not None
+
+
+
+def detect_netdisk_link(text):
+    """
+    检测文本中的网盘链接及提取码
+    返回格式: {'type': '网盘类型', 'name': '网盘名称', 'url': '链接', 'pwd': '提取码'}
+    """
+    if not text:
+        return None
+        
+    # 清理文本
+    text = text.replace('\u200b', '').strip()
+    original_text = text  # 保存原始文本用于提取码检测
+    
+    # 尝试在原始文本中检测
+    result = detect_netdisk_link_raw(text)
+    if result:
+        return result
+    
+    # 如果原始文本没有检测到，尝试清理干扰字符后再检测
+    cleaned_text = clean_text_for_netdisk_detection(text)
+    if cleaned_text != text:  # 确保清理后文本有变化
+        result = detect_netdisk_link_raw(cleaned_text)
+        if result:
+            # 从原始文本中提取提取码
+            for disk_type, rule in NETDISK_RULES.items():
+                if disk_type == result['type'] and rule['pwd_reg']:
+                    pwd_match = re.search(rule['pwd_reg'], original_text)
+                    if pwd_match:
+                        result['pwd'] = pwd_match.group(1)
+                        break
+            
+            # 如果没找到具体平台的提取码，尝试通用提取码正则
+            if not result.get('pwd'):
+                general_pwd_match = re.search(r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{3,6})', original_text)
+                if general_pwd_match:
+                    result['pwd'] = general_pwd_match.group(1)
+            return result
+    
+    return None
+
+
+
+def detect_netdisk_link_raw(text):
+    """原始网盘链接检测逻辑，从原detect_netdisk_link分离"""
+    # 检查每个网盘规则
+    for disk_type, rule in NETDISK_RULES.items():
+        # 文本中不含该网盘的域名时不可能匹配，跳过正则（长文本上部分规则的匹配代价很高）
+        keywords = rule.get('keywords')
+        if keywords and not any(keyword in text for keyword in keywords):
+            continue
+        # 首先匹配基本URL，不包括查询参数
+        url_match = re.search(rule['reg'], text)
+        if url_match:
+            # 获取基本URL
+            url_base = url_match.group(0)
+            if not url_base.startswith('http'):
+                url_base = 'https://' + url_base
+            
+            # 先检查URL中是否已包含提取码参数
+            pwd_from_url = None
+            url_pwd_match = re.search(r'[?&]pwd=([a-zA-Z0-9]{4,8})', text)
+            if url_pwd_match:
+                pwd_from_url = url_pwd_match.group(1)
+                
+            # 检查文本中是否有单独的提取码
+            pwd_from_text = None
+            pwd_match = re.search(rule['pwd_reg'], text)
+            if pwd_match:
+                pwd_from_text = pwd_match.group(1)
+            
+            # 如果没有找到提取码，尝试使用通用正则
+            if not pwd_from_text and not pwd_from_url:
+                general_pwd_match = re.search(r'(?:提取|访问|密)[码碼][:：]?\s*([a-zA-Z0-9]{3,6})', text)
+                if general_pwd_match:
+                    pwd_from_text = general_pwd_match.group(1)
+            
+            # 优先使用URL中的提取码
+            pwd = pwd_from_url or pwd_from_text
+            
+            # 获取完整URL，保留原始查询参数
+            url = url_base
+            url_query_match = re.search(r'^(https?://[^?#]+)(\?.+)$', text)
+            if url_query_match and url_pwd_match:
+                url = url_query_match.group(0)
+            
+            return {
+                'type': disk_type,
+                'name': rule['name'],
+                'url': url,
+                'pwd': pwd,
+                'pwd_in_url': pwd_from_url is not None
+            }
+    return None
+
+
+def classify_text(text, netdisk_detection: bool = True) -> dict:
+    """识别文本内容的类型
+
+    只依赖文本本身，可以在分析进程中执行。
+
+    Args:
+        text: 剪贴板文本
+        netdisk_detection: 是否检测网盘链接
+
+    Returns:
+        dict: {"type": 内容类型, "netdisk_info": 网盘信息或 None, "timings": 各检测步骤耗时（秒）}
+    """
+    timings = {}
+    if netdisk_detection:
+        started = time.perf_counter()
+        netdisk_info = detect_netdisk_link(text)
+        timings["netdisk_link"] = time.perf_counter() - started
+        if netdisk_info:
+            return {"type": "网盘链接", "netdisk_info": netdisk_info, "timings": timings}
+
+    started = time.perf_counter()
+    matched = is_url(text)
+    timings["url"] = time.perf_counter() - started
+    if matched:
+        return {"type": "网址", "netdisk_info": None, "timings": timings}
+
+    started = time.perf_counter()
+    matched = is_email(text)
+    timings["email"] = time.perf_counter() - started
+    if matched:
+        return {"type": "邮箱", "netdisk_info": None, "timings": timings}
+    return {"type": "文本", "netdisk_info": None, "timings": timings}
+
+
+def detect_language(text):
+    """尝试检测代码的语言"""
+    if not PYGMENTS_AVAILABLE:
+        return "text"
+
+    try:
+        lexer = guess_lexer(text)
+        return lexer.name.lower()
+    except:
+        return "text"
+
+
+def highlight_code(code, style: str = HIGHLIGHT_STYLE):
+    """识别语言并生成语法高亮的 HTML
+
+    Args:
+        code: 代码文本
+        style: pygments 配色名称
+
+    Returns:
+        tuple: (HTML, CSS)，pygments 不可用或高亮失败时返回 None
+    """
+    if not PYGMENTS_AVAILABLE:
+        return None
+    try:
+        lexer = get_lexer_by_name(detect_language(code), stripall=True)
+        formatter = HtmlFormatter(style=style)
+        return highlight(code, lexer, formatter), formatter.get_style_defs('.highlight')
+    except Exception:
+        return None
+
+
+# 可以交给分析进程执行的任务，第一个参数为文本，其余参数需可序列化
+ANALYSIS_JOBS = {
+    "classify_text": classify_text,
+    "highlight_code": highlight_code,
+}